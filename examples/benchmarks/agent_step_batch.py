@@ -0,0 +1,71 @@
+''' Benchmark of the batched action selection of DQNAgent and NFSPAgent in
+    RLCard, against one step per decision
+'''
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from rlcard.agents import DQNAgent, NFSPAgent
+
+def run(args):
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+    device = torch.device('cpu')
+    obs = np.random.randint(2, size=(args.batch_size, args.state_size)).astype(np.float64)
+    legal_mask = np.random.random_sample((args.batch_size, args.num_actions)) < 0.1
+    legal_mask[:, 0] = True
+    states = []
+    for i in range(args.batch_size):
+        legal_actions = {action: None for action in np.flatnonzero(legal_mask[i])}
+        states.append({'obs': obs[i], 'legal_actions': legal_actions, 'raw_legal_actions': list(legal_actions)})
+
+    dqn_agent = DQNAgent(num_actions=args.num_actions, state_shape=[args.state_size], mlp_layers=[512, 512], device=device)
+    nfsp_agent = NFSPAgent(num_actions=args.num_actions, state_shape=[args.state_size], hidden_layers_sizes=[512, 512],
+                           q_mlp_layers=[512, 512], device=device)
+    nfsp_agent._mode = 'average_policy'
+    for name, agent in [('dqn', dqn_agent), ('nfsp', nfsp_agent)]:
+        start = time.perf_counter()
+        for state in states:
+            agent.step(state)
+        step_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.num_batches):
+            agent.step_batch(obs, legal_mask)
+        batch_time = (time.perf_counter() - start) / args.num_batches
+        print('{:<6} step {:>10.0f} decisions/sec   step_batch {:>10.0f} decisions/sec'.format(
+            name, args.batch_size / step_time, args.batch_size / batch_time))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Batched action selection benchmark in RLCard")
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=1024,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=901,
+    )
+    parser.add_argument(
+        '--num_actions',
+        type=int,
+        default=309,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
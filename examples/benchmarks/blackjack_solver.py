@@ -0,0 +1,49 @@
+''' Exact Blackjack values in RLCard: the basic strategy table and the
+    payoff of the optimal agent in the blackjack environment
+'''
+import argparse
+import time
+
+import rlcard
+from rlcard.agents import BlackjackOptimalAgent
+from rlcard.games.blackjack.solver import BlackjackSolver, format_strategy_table
+from rlcard.utils import set_seed, tournament
+
+def run(args):
+    start = time.perf_counter()
+    table = BlackjackSolver(args.num_decks).get_strategy_table()
+    print('Basic strategy, {} decks, solved in {:.2f} sec'.format(args.num_decks, time.perf_counter() - start))
+    print(format_strategy_table(table))
+
+    set_seed(args.seed)
+    env = rlcard.make('blackjack', config={'seed': args.seed, 'game_num_decks': args.num_decks})
+    for composition_dependent in [False, True]:
+        env.set_agents([BlackjackOptimalAgent(args.num_decks, composition_dependent)])
+        start = time.perf_counter()
+        payoff = tournament(env, args.num_games)[0]
+        print('{:<24} {:>8.4f} payoff {:>8.0f} games/sec'.format(
+            'composition dependent' if composition_dependent else 'basic strategy',
+            payoff, args.num_games / (time.perf_counter() - start)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Blackjack solver benchmark in RLCard")
+    parser.add_argument(
+        '--num_decks',
+        type=int,
+        default=1,
+        help='0 for the infinite deck',
+    )
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,69 @@
+''' Benchmark of the vectorized Blackjack games in RLCard, playing the basic
+    strategy in the blackjack environment and in VectorBlackjackGame
+'''
+import argparse
+import time
+
+import numpy as np
+
+import rlcard
+from rlcard.agents import BlackjackOptimalAgent
+from rlcard.games.blackjack.solver import BlackjackSolver
+from rlcard.games.blackjack.vector_game import VectorBlackjackGame, get_policy_array
+from rlcard.utils import set_seed, tournament
+
+def run(args):
+    table = BlackjackSolver(args.num_decks).get_strategy_table()
+
+    set_seed(args.seed)
+    env = rlcard.make('blackjack', config={'seed': args.seed, 'game_num_decks': args.num_decks})
+    agent = BlackjackOptimalAgent(args.num_decks, composition_dependent=False)
+    agent.strategy_table = table
+    env.set_agents([agent])
+    start = time.perf_counter()
+    payoff = tournament(env, args.num_env_games)[0]
+    elapsed = time.perf_counter() - start
+    print('{:<8} {:>8.4f} payoff {:>10.0f} games/sec'.format('env', payoff, args.num_env_games / elapsed))
+
+    policy = get_policy_array(table)
+    game = VectorBlackjackGame(args.batch_size, num_decks=args.num_decks, np_random=np.random.RandomState(args.seed))
+    payoffs = []
+    start = time.perf_counter()
+    for _ in range(args.num_batches):
+        payoffs.append(game.play(policy))
+    elapsed = time.perf_counter() - start
+    num_games = args.batch_size * args.num_batches
+    print('{:<8} {:>8.4f} payoff {:>10.0f} games/sec'.format('vector', np.mean(payoffs), num_games / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Vectorized Blackjack benchmark in RLCard")
+    parser.add_argument(
+        '--num_decks',
+        type=int,
+        default=1,
+        help='0 for the infinite deck',
+    )
+    parser.add_argument(
+        '--num_env_games',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=1000000,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=4,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
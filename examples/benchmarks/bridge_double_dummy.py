@@ -0,0 +1,91 @@
+''' Benchmark of the Bridge double dummy solver in RLCard
+
+Times single solves of DoubleDummySolver on deals of num_cards per hand,
+then full double dummy tables of 13-card deals against the target time
+per table, with DDS if it is installed and with DoubleDummySolver if asked.
+'''
+import argparse
+import time
+
+import numpy as np
+
+from rlcard.games.bridge.double_dummy import DoubleDummySolver, calc_dd_table, has_dds
+
+def get_deals(np_random, num_deals, num_cards):
+    deals = []
+    for _ in range(num_deals):
+        card_ids = np_random.permutation(52)
+        deals.append([sum(1 << int(card_id) for card_id in card_ids[13*i:13*i+num_cards]) for i in range(4)])
+    return deals
+
+def run(args):
+    np_random = np.random.RandomState(args.seed)
+    deals = get_deals(np_random, args.num_deals, args.num_cards)
+    for strain, name in [(4, 'no trump'), (3, 'spades')]:
+        num_nodes = 0
+        start = time.perf_counter()
+        for hands in deals:
+            solver = DoubleDummySolver(hands, strain)
+            solver.solve(0)
+            num_nodes += solver.node_count
+        elapsed = time.perf_counter() - start
+        print('{:<10} {:>8.3f} sec/solve {:>10.0f} nodes/solve {:>8.0f} nodes/sec'.format(
+            name, elapsed / len(deals), num_nodes / len(deals), num_nodes / elapsed))
+
+    deals = get_deals(np_random, args.num_tables, 13)
+    backends = []
+    if has_dds():
+        backends.append(('dds', True))
+    else:
+        print('DDS is not installed (pip install rlcard[bridge])')
+    if args.fallback_tables:
+        backends.append(('python', False))
+    for name, use_dds in backends:
+        times = []
+        for hands in deals[:args.num_tables if use_dds else args.fallback_tables]:
+            start = time.perf_counter()
+            calc_dd_table(hands, use_dds)
+            times.append(time.perf_counter() - start)
+        print('{:<10} {:>8.3f} sec/table {:>8.3f} max sec/table, target {:.3f} sec/table: {}'.format(
+            name, np.mean(times), np.max(times), args.target, 'met' if np.mean(times) < args.target else 'missed'))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Bridge double dummy solver benchmark in RLCard")
+    parser.add_argument(
+        '--num_deals',
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        '--num_cards',
+        type=int,
+        default=8,
+        help='Cards per hand of the single solves, 13 for full deals',
+    )
+    parser.add_argument(
+        '--num_tables',
+        type=int,
+        default=20,
+        help='Full deals whose double dummy tables are timed',
+    )
+    parser.add_argument(
+        '--fallback_tables',
+        type=int,
+        default=0,
+        help='Full deals whose tables are also timed without DDS, which takes minutes per table',
+    )
+    parser.add_argument(
+        '--target',
+        type=float,
+        default=1.0,
+        help='The most seconds per full table',
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,45 @@
+''' Benchmark of random Bridge games through the RLCard environment
+'''
+import argparse
+import time
+
+import numpy as np
+
+import rlcard
+
+def run(args):
+    np_random = np.random.RandomState(args.seed)
+    env = rlcard.make('bridge', config={'seed': args.seed})
+
+    num_steps = 0
+    extract_time = 0.0
+    start = time.perf_counter()
+    for _ in range(args.num_games):
+        state, _ = env.reset()
+        while not env.is_over():
+            actions = list(state['legal_actions'].keys())
+            state, _ = env.step(actions[np_random.randint(len(actions))])
+            extract_start = time.perf_counter()
+            env._extract_state(None)
+            extract_time += time.perf_counter() - extract_start
+            num_steps += 1
+    elapsed = time.perf_counter() - start - extract_time
+    print('{} games, {} steps, {:.0f} steps/sec, {:.0f} states/sec'.format(
+        args.num_games, num_steps, num_steps / elapsed, num_steps / extract_time))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Bridge environment benchmark in RLCard")
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=200,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,117 @@
+''' Benchmark of the DMC actors in RLCard, running the model themselves or
+    sending their requests to an inference server, with one or several envs
+    per actor
+'''
+import argparse
+import os
+import time
+
+import torch
+from torch import multiprocessing as mp
+
+import rlcard
+from rlcard.agents.dmc_agent.model import DMCModel
+from rlcard.agents.dmc_agent.inference import InferenceClient, serve
+
+def run_env(env):
+    while True:
+        yield env.run(is_training=True)
+
+def play(i, env, model, duration, counts, barrier):
+    torch.set_num_threads(1)
+    if getattr(model, 'num_envs', 1) > 1:
+        episodes = model.run_envs(env, i)
+    else:
+        env.seed(i)
+        env.set_agents(model.get_agents())
+        episodes = run_env(env)
+    # the actors start together, after all of them are spawned
+    barrier.wait()
+    # an actor with several envs finishes its first games late, so the
+    # count starts once each env has played a game
+    for _ in range(getattr(model, 'num_envs', 1)):
+        next(episodes)
+    num_decisions = 0
+    start = time.perf_counter()
+    for trajectories, _ in episodes:
+        num_decisions += sum(len(trajectory) // 2 for trajectory in trajectories)
+        if time.perf_counter() - start >= duration:
+            break
+    counts[i] = num_decisions / (time.perf_counter() - start)
+
+def run(args):
+    env = rlcard.make(args.env)
+    action_shape = env.action_shape
+    if action_shape[0] is None:
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+    model = DMCModel(env.state_shape, action_shape, device='cpu')
+    model.share_memory()
+    model.eval()
+    ctx = mp.get_context('spawn')
+    num_cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+
+    # No server, then a server with each number of envs per actor
+    for num_servers, num_envs in [(0, 1)] + [(1, num_envs) for num_envs in args.envs_per_actor]:
+        counts = torch.zeros(args.num_actors).share_memory_()
+        processes = []
+        barrier = ctx.Barrier(args.num_actors)
+        actor_models = [model] * args.num_actors
+        if num_servers > 0:
+            request_queue = ctx.Queue()
+            actor_models = [InferenceClient(i, request_queue, ctx.SimpleQueue(), env.state_shape, action_shape, args.max_actions,
+                                            num_envs=num_envs)
+                            for i in range(args.num_actors)]
+            server = ctx.Process(target=serve, args=(0, 'cpu', model, request_queue,
+                                                     {client.actor_id: client for client in actor_models},
+                                                     args.num_actors * num_envs, args.latency))
+            server.start()
+        for i in range(args.num_actors):
+            process = ctx.Process(target=play, args=(i, env, actor_models[i], args.duration, counts, barrier))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        if num_servers > 0:
+            request_queue.put(None)
+            server.join()
+        print('{:<8} {:>3} actors {:>3} envs/actor {:>10.0f} decisions/sec {:>10.0f} decisions/sec/core'.format(
+            'server' if num_servers > 0 else 'local', args.num_actors, num_envs,
+            counts.sum().item(), counts.sum().item() / num_cores))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DMC inference server benchmark in RLCard")
+    parser.add_argument(
+        '--env',
+        type=str,
+        default='doudizhu',
+    )
+    parser.add_argument(
+        '--num_actors',
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=20,
+    )
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0.002,
+    )
+    parser.add_argument(
+        '--envs_per_actor',
+        type=int,
+        nargs='+',
+        default=[1, 4, 16],
+    )
+    parser.add_argument(
+        '--max_actions',
+        type=int,
+        default=512,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,159 @@
+''' Benchmark of the DMC rollout buffers in RLCard: episodes written to the
+    shared buffers through the ring of the actor, and batches gathered from
+    the contiguous buffers, against the per-step writes and the stacked
+    batches of lists of tensors
+'''
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from rlcard.agents.dmc_agent.utils import RolloutRing, create_buffers
+
+def make_episodes(args):
+    np.random.seed(args.seed)
+    episodes = []
+    for _ in range(args.num_episodes):
+        num_steps = np.random.randint(args.min_episode_length, args.max_episode_length + 1)
+        episodes.append(dict(
+            state=np.random.randint(2, size=(num_steps, args.state_size)).astype(np.int8),
+            action=np.random.randint(2, size=(num_steps, args.action_size)).astype(np.int8),
+            payoff=float(np.random.choice([-1, 1])),
+        ))
+    return episodes
+
+def write_lists(args, episodes, buffers):
+    ''' The lists of the actor before, written one step at a time
+    '''
+    T = args.unroll_length
+    done_buf, episode_return_buf, target_buf, state_buf, action_buf = [], [], [], [], []
+    index = 0
+    for episode in episodes:
+        num_steps = len(episode['state'])
+        done_buf.extend([False for _ in range(num_steps-1)])
+        done_buf.append(True)
+        episode_return_buf.extend([0.0 for _ in range(num_steps-1)])
+        episode_return_buf.append(episode['payoff'])
+        target_buf.extend([episode['payoff'] for _ in range(num_steps)])
+        for state, action in zip(episode['state'], episode['action']):
+            state_buf.append(torch.from_numpy(state))
+            action_buf.append(torch.from_numpy(action))
+        while len(target_buf) > T:
+            for t in range(T):
+                buffers['done'][index][t, ...] = done_buf[t]
+                buffers['episode_return'][index][t, ...] = episode_return_buf[t]
+                buffers['target'][index][t, ...] = target_buf[t]
+                buffers['state'][index][t, ...] = state_buf[t]
+                buffers['action'][index][t, ...] = action_buf[t]
+            index = (index + 1) % args.num_buffers
+            done_buf = done_buf[T:]
+            episode_return_buf = episode_return_buf[T:]
+            target_buf = target_buf[T:]
+            state_buf = state_buf[T:]
+            action_buf = action_buf[T:]
+
+def write_ring(args, episodes, buffers):
+    T = args.unroll_length
+    ring = RolloutRing(buffers)
+    index = 0
+    for episode in episodes:
+        num_steps = len(episode['state'])
+        done = np.zeros(num_steps, dtype=bool)
+        done[-1] = True
+        episode_return = np.zeros(num_steps, dtype=np.float32)
+        episode_return[-1] = episode['payoff']
+        ring.append(
+            done=done,
+            episode_return=episode_return,
+            target=np.full(num_steps, episode['payoff'], dtype=np.float32),
+            state=episode['state'],
+            action=episode['action'],
+        )
+        while len(ring) > T:
+            ring.pop(buffers, index)
+            index = (index + 1) % args.num_buffers
+
+def run(args):
+    torch.set_num_threads(1)
+    episodes = make_episodes(args)
+    num_steps = sum(len(episode['state']) for episode in episodes)
+    buffers = create_buffers(args.unroll_length, args.num_buffers, [[args.state_size]], [[args.action_size]], ['cpu'])['cpu'][0]
+
+    for name, write in [('lists', write_lists), ('ring', write_ring)]:
+        start = time.perf_counter()
+        write(args, episodes, buffers)
+        elapsed = time.perf_counter() - start
+        print('{:<10} {:>10.0f} steps/sec written'.format(name, num_steps / elapsed))
+
+    indices = [np.random.choice(args.num_buffers, args.batch_size, replace=False) for _ in range(args.num_batches)]
+    # the buffers before, one tensor per buffer
+    views = {key: [buffer[m] for m in range(args.num_buffers)] for key, buffer in buffers.items()}
+    start = time.perf_counter()
+    for batch_indices in indices:
+        {key: torch.stack([views[key][m] for m in batch_indices], dim=1) for key in views}
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>10.0f} batches/sec gathered'.format('stack', args.num_batches / elapsed))
+    start = time.perf_counter()
+    for batch_indices in indices:
+        index = torch.from_numpy(batch_indices)
+        {key: buffer.index_select(0, index).transpose(0, 1) for key, buffer in buffers.items()}
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>10.0f} batches/sec gathered'.format('gather', args.num_batches / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DMC rollout buffer benchmark in RLCard")
+    parser.add_argument(
+        '--num_episodes',
+        type=int,
+        default=5000,
+    )
+    parser.add_argument(
+        '--min_episode_length',
+        type=int,
+        default=5,
+    )
+    parser.add_argument(
+        '--max_episode_length',
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        '--unroll_length',
+        type=int,
+        default=100,
+    )
+    parser.add_argument(
+        '--num_buffers',
+        type=int,
+        default=50,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=500,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=790,
+    )
+    parser.add_argument(
+        '--action_size',
+        type=int,
+        default=54,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,64 @@
+''' Benchmark of the async training of DQNAgent in RLCard, where a learner
+    thread trains while the env is stepped, against training in feed
+'''
+import argparse
+import time
+
+import torch
+
+import rlcard
+from rlcard.agents import DQNAgent, RandomAgent
+from rlcard.utils import reorganize, set_seed
+
+def run(args):
+    env = rlcard.make(args.env, config={'seed': args.seed})
+    set_seed(args.seed)
+    for async_training in [False, True]:
+        agent = DQNAgent(num_actions=env.num_actions,
+                         state_shape=env.state_shape[0],
+                         mlp_layers=[256, 256],
+                         batch_size=args.batch_size,
+                         replay_memory_init_size=args.batch_size,
+                         device=torch.device('cpu'),
+                         async_training=async_training)
+        env.set_agents([agent] + [RandomAgent(num_actions=env.num_actions) for _ in range(1, env.num_players)])
+        num_steps = 0
+        start = time.perf_counter()
+        for _ in range(args.num_episodes):
+            trajectories, payoffs = env.run(is_training=True)
+            for ts in reorganize(trajectories, payoffs)[0]:
+                agent.feed(ts)
+                num_steps += 1
+        acting_time = time.perf_counter() - start
+        agent.stop_learner()
+        elapsed = time.perf_counter() - start
+        num_updates = agent.learner.num_updates if async_training else num_steps - args.batch_size + 1
+        print('\n{:<6} {:>8.0f} episodes/sec while acting {:>8.0f} episodes/sec with all {} updates'.format(
+            'async' if async_training else 'sync', args.num_episodes / acting_time, args.num_episodes / elapsed, num_updates))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DQN async training benchmark in RLCard")
+    parser.add_argument(
+        '--env',
+        type=str,
+        default='leduc-holdem',
+    )
+    parser.add_argument(
+        '--num_episodes',
+        type=int,
+        default=2000,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
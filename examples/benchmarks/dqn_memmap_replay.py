@@ -0,0 +1,77 @@
+''' Benchmark of the DQN replay memories in RLCard, in RAM and in memory-mapped
+    files, with binary states of the size of the DouDizhu observations
+'''
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from rlcard.agents.dqn_agent import Memory, MemmapMemory
+
+def get_num_bytes(memory):
+    num_bytes = 0
+    for name in MemmapMemory.ARRAY_NAMES:
+        num_bytes += getattr(memory, name).nbytes
+    return num_bytes
+
+def run(args):
+    np.random.seed(args.seed)
+    states = np.random.randint(2, size=(1000, args.state_size)).astype(np.int8)
+    memory_dir = tempfile.mkdtemp()
+    try:
+        for name, memory in [('ram', Memory(args.capacity, args.batch_size, args.num_actions, obs_dtype=np.float32)),
+                             ('memmap', MemmapMemory(args.capacity, args.batch_size, args.num_actions, os.path.join(memory_dir, 'replay'), obs_dtype=np.float32, pack_bits=True))]:
+            start = time.perf_counter()
+            for i in range(args.capacity):
+                memory.save(states[i % 1000], i % args.num_actions, 0.0, states[(i + 1) % 1000], [0, 1], False)
+            save_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(args.num_batches):
+                memory.sample()
+            elapsed = time.perf_counter() - start
+            print('{:<8} {:>8.0f} bytes/transition {:>8.0f} saves/sec {:>10.0f} samples/sec'.format(
+                name, get_num_bytes(memory) / args.capacity, args.capacity / save_time, args.num_batches * args.batch_size / elapsed))
+            del memory
+    finally:
+        shutil.rmtree(memory_dir)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DQN memory-mapped replay benchmark in RLCard")
+    parser.add_argument(
+        '--capacity',
+        type=int,
+        default=200000,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=901,
+    )
+    parser.add_argument(
+        '--num_actions',
+        type=int,
+        default=309,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,64 @@
+''' Benchmark of the DQN replay memories in RLCard, uniform and prioritized
+'''
+import argparse
+import time
+
+import numpy as np
+
+from rlcard.agents.dqn_agent import Memory, PrioritizedMemory
+
+def run(args):
+    np.random.seed(args.seed)
+    state = np.random.random_sample(args.state_size)
+    for name, memory in [('uniform', Memory(args.capacity, args.batch_size, args.num_actions)),
+                         ('prioritized', PrioritizedMemory(args.capacity, args.batch_size, args.num_actions))]:
+        start = time.perf_counter()
+        for i in range(args.capacity):
+            memory.save(state, i % args.num_actions, 0.0, state, [0, 1], False)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.num_batches):
+            batch = memory.sample()
+            if name == 'prioritized':
+                memory.update_priorities(batch[-2], np.random.random_sample(args.batch_size))
+        elapsed = time.perf_counter() - start
+        print('{:<12} {:>10.0f} saves/sec {:>10.0f} samples/sec {:>8.0f} batches/sec'.format(
+            name, args.capacity / save_time, args.num_batches * args.batch_size / elapsed, args.num_batches / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DQN replay memory benchmark in RLCard")
+    parser.add_argument(
+        '--capacity',
+        type=int,
+        default=1000000,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=36,
+    )
+    parser.add_argument(
+        '--num_actions',
+        type=int,
+        default=4,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
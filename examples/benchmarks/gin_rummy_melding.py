@@ -0,0 +1,52 @@
+''' Benchmark of the Gin Rummy meld search in RLCard
+'''
+import argparse
+import time
+
+import numpy as np
+
+import rlcard.games.gin_rummy.judge as judge
+from rlcard.games.gin_rummy.utils import melding
+from rlcard.games.gin_rummy.utils import utils
+
+def sample_hands(num_hands, seed):
+    np_random = np.random.RandomState(seed)
+    deck = utils.get_deck()
+    hands = []
+    for _ in range(num_hands):
+        # Draw from 7 ranks so that most hands have several melds
+        indices = np_random.choice(28, 11, replace=False)
+        hands.append([deck[13 * (i // 7) + i % 7] for i in indices])
+    return hands
+
+def run(args):
+    hands = sample_hands(args.num_hands, args.seed)
+
+    for name in ['cold cache', 'warm cache']:
+        start = time.perf_counter()
+        knocks = 0
+        for hand in hands:
+            knock_cards, _ = judge.get_going_out_cards(hand=hand, going_out_deadwood_count=10)
+            for card in hand:
+                melding.get_best_meld_clusters(hand=[x for x in hand if x != card])
+            knocks += len(knock_cards) > 0
+        elapsed = time.perf_counter() - start
+        print('{:<12} {:>10.0f} hands/sec ({} hands can knock in {})'.format(
+            name, len(hands) / elapsed, knocks, len(hands)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Gin Rummy meld search benchmark in RLCard")
+    parser.add_argument(
+        '--num_hands',
+        type=int,
+        default=2000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
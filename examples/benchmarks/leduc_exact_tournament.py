@@ -0,0 +1,45 @@
+''' Benchmark of the exact Leduc Hold'em tournament in RLCard, against
+    the sampled tournament
+'''
+import argparse
+import time
+
+import rlcard
+from rlcard.agents import RandomAgent
+from rlcard.models.leducholdem_rule_models import LeducHoldemRuleAgentV2
+from rlcard.utils import exact_tournament, set_seed, tournament
+
+def run(args):
+    set_seed(args.seed)
+    env = rlcard.make('leduc-holdem', config={'seed': args.seed})
+    env.set_agents([RandomAgent(env.num_actions), LeducHoldemRuleAgentV2()])
+
+    start = time.perf_counter()
+    payoffs = tournament(env, args.num_games)
+    print('{:<24} {:>8.4f} payoff {:>10.3f} sec'.format(
+        'tournament {} games'.format(args.num_games), payoffs[0], time.perf_counter() - start))
+
+    start = time.perf_counter()
+    payoffs = exact_tournament(env)
+    print('{:<24} {:>8.4f} payoff {:>10.3f} sec'.format('exact, with compile', payoffs[0], time.perf_counter() - start))
+
+    start = time.perf_counter()
+    payoffs = exact_tournament(env)
+    print('{:<24} {:>8.4f} payoff {:>10.3f} sec'.format('exact', payoffs[0], time.perf_counter() - start))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Exact Leduc Hold'em tournament benchmark in RLCard")
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,53 @@
+''' Benchmark of the Mahjong win (hu) detection in RLCard
+'''
+import argparse
+import time
+
+import numpy as np
+
+from rlcard.games.mahjong import Judger, Player
+from rlcard.games.mahjong.utils import init_deck, decompose_suit
+
+def sample_players(num_hands, seed):
+    np_random = np.random.RandomState(seed)
+    deck = init_deck()
+    players = []
+    for _ in range(num_hands):
+        player = Player(0, np_random)
+        indices = np_random.choice(len(deck), 14, replace=False)
+        player.hand = [deck[i] for i in indices]
+        players.append(player)
+    return players
+
+def run(args):
+    judger = Judger(np.random.RandomState(args.seed))
+    players = sample_players(args.num_hands, args.seed)
+
+    decompose_suit.cache_clear()
+    for name in ['cold cache', 'warm cache']:
+        start = time.perf_counter()
+        wins = 0
+        for player in players:
+            win, _ = judger.judge_hu(player)
+            wins += win
+        elapsed = time.perf_counter() - start
+        print('{:<12} {:>10.0f} checks/sec ({} wins in {} hands)'.format(
+            name, len(players) / elapsed, wins, len(players)))
+    print(decompose_suit.cache_info())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Mahjong hu detection benchmark in RLCard")
+    parser.add_argument(
+        '--num_hands',
+        type=int,
+        default=100000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,43 @@
+''' Benchmark of full random Mahjong games in RLCard
+'''
+import argparse
+import time
+
+import numpy as np
+
+from rlcard.games.mahjong import Game
+
+def run(args):
+    np_random = np.random.RandomState(args.seed)
+    game = Game()
+    game.np_random.seed(args.seed)
+
+    num_steps = 0
+    start = time.perf_counter()
+    for _ in range(args.num_games):
+        state, _ = game.init_game()
+        while not game.is_over():
+            actions = game.get_legal_actions(state)
+            action = actions[np_random.randint(len(actions))]
+            state, _ = game.step(action)
+            num_steps += 1
+    elapsed = time.perf_counter() - start
+    print('{} games, {} steps, {:.0f} steps/sec, {:.1f} games/sec'.format(
+        args.num_games, num_steps, num_steps / elapsed, args.num_games / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Mahjong random game benchmark in RLCard")
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=200,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,101 @@
+''' Benchmark of the NFSP reservoir buffer in RLCard, against batches built
+    from a list of transitions
+'''
+import argparse
+import random
+import time
+
+import numpy as np
+
+from rlcard.agents.nfsp_agent import ReservoirBuffer, Transition
+
+def run(args):
+    np.random.seed(args.seed)
+    info_states = np.random.randint(2, size=(args.episode_length, args.state_size)).astype(np.float64)
+    action_probs = np.random.random_sample((args.episode_length, args.num_actions))
+    num_episodes = args.stream_size // args.episode_length
+
+    # a list of transitions, batched with np.array
+    data = []
+    add_calls = 0
+    start = time.perf_counter()
+    for _ in range(num_episodes):
+        for info_state, probs in zip(info_states, action_probs):
+            if len(data) < args.capacity:
+                data.append(Transition(info_state=info_state, action_probs=probs))
+            else:
+                idx = np.random.randint(0, add_calls + 1)
+                if idx < args.capacity:
+                    data[idx] = Transition(info_state=info_state, action_probs=probs)
+            add_calls += 1
+    add_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.num_batches):
+        transitions = random.sample(data, args.batch_size)
+        np.array([t.info_state for t in transitions]).astype(np.float32)
+        np.array([t.action_probs for t in transitions]).astype(np.float32)
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>10.0f} adds/sec {:>8.0f} batches/sec'.format('list', num_episodes * args.episode_length / add_time, args.num_batches / elapsed))
+
+    for name in ['add', 'add_many']:
+        reservoir_buffer = ReservoirBuffer(args.capacity)
+        start = time.perf_counter()
+        for _ in range(num_episodes):
+            if name == 'add':
+                for info_state, probs in zip(info_states, action_probs):
+                    reservoir_buffer.add(Transition(info_state=info_state, action_probs=probs))
+            else:
+                reservoir_buffer.add_many(info_states, action_probs)
+        add_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.num_batches):
+            reservoir_buffer.sample(args.batch_size)
+        elapsed = time.perf_counter() - start
+        print('{:<10} {:>10.0f} adds/sec {:>8.0f} batches/sec'.format(name, num_episodes * args.episode_length / add_time, args.num_batches / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("NFSP reservoir buffer benchmark in RLCard")
+    parser.add_argument(
+        '--capacity',
+        type=int,
+        default=200000,
+    )
+    parser.add_argument(
+        '--stream_size',
+        type=int,
+        default=1000000,
+    )
+    parser.add_argument(
+        '--episode_length',
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=256,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=2000,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=901,
+    )
+    parser.add_argument(
+        '--num_actions',
+        type=int,
+        default=309,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
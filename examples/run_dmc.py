@@ -22,8 +22,13 @@ def train(args):
         savedir=args.savedir,
         save_interval=args.save_interval,
         num_actor_devices=args.num_actor_devices,
-        num_actors=args.num_actors,
+        num_actors=None if args.num_actors < 0 else args.num_actors,
         training_device=args.training_device,
+        cpu_affinity=not args.no_cpu_affinity,
+        num_learner_cores=args.num_learner_cores,
+        world_size=args.world_size,
+        rank=args.rank,
+        init_method=args.init_method,
     )
 
     # Train DMC Agents
@@ -82,7 +87,8 @@ if __name__ == '__main__':
         '--num_actors',
         default=5,
         type=int,
-        help='The number of actors for each simulation device',
+        help='The number of actors for each simulation device, -1 for one per free CPU core. '
+             'A learner host (rank 0) may have 0',
     )
     parser.add_argument(
         '--training_device',
@@ -90,6 +96,35 @@ if __name__ == '__main__':
         type=str,
         help='The index of the GPU used for training models',
     )
+    parser.add_argument(
+        '--num_learner_cores',
+        default=None,
+        type=int,
+        help='The CPU cores of the learner when training on CPU (default: a quarter of them)',
+    )
+    parser.add_argument(
+        '--no_cpu_affinity',
+        action='store_true',
+        help='Do not pin the learner and the actors to CPU cores when training on CPU',
+    )
+    parser.add_argument(
+        '--world_size',
+        default=1,
+        type=int,
+        help='The number of hosts: a learner host (rank 0) and actor hosts',
+    )
+    parser.add_argument(
+        '--rank',
+        default=0,
+        type=int,
+        help='The rank of this host',
+    )
+    parser.add_argument(
+        '--init_method',
+        default='tcp://127.0.0.1:29500',
+        type=str,
+        help='The address of the learner host, as tcp://host:port',
+    )
 
     args = parser.parse_args()
 
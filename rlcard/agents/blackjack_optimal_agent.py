@@ -0,0 +1,74 @@
+from rlcard.games.blackjack.solver import BlackjackSolver, get_card_value, get_hand, get_score, HIT, STAND
+
+
+class BlackjackOptimalAgent(object):
+    ''' An agent that plays Blackjack with the exact values of BlackjackSolver.
+        Use it as a baseline for the agents trained on the blackjack environment.
+    '''
+
+    def __init__(self, num_decks=1, composition_dependent=True):
+        ''' Initilize the agent
+
+        Args:
+            num_decks (int): The number of decks of the environment, 'game_num_decks'
+            composition_dependent (bool): Whether to play by all the cards seen. If False,
+                play the basic strategy, which only looks at the total and the dealer's up card
+        '''
+        self.use_raw = False
+        self.num_decks = num_decks
+        self.composition_dependent = composition_dependent
+        self.solver = BlackjackSolver(num_decks)
+        self.strategy_table = None
+
+    def step(self, state):
+        ''' Predict the action given the curent state in gerenerating training data.
+
+        Args:
+            state (dict): An dictionary that represents the current state
+
+        Returns:
+            action (int): The action with the highest expected payoff
+        '''
+        return self.eval_step(state)[0]
+
+    def eval_step(self, state):
+        ''' Predict the action given the current state for evaluation.
+
+        Args:
+            state (dict): An dictionary that represents the current state
+
+        Returns:
+            action (int): The action with the highest expected payoff
+            info (dict): The expected payoffs of the actions
+        '''
+        raw_obs = state['raw_obs']
+        hand, dealer_hand = raw_obs['state']
+        up_card = dealer_hand[-1]
+        if self.composition_dependent:
+            # the hands of the other players are seen too
+            seen = []
+            for key, cards in raw_obs.items():
+                if key.startswith('player'):
+                    seen.extend(cards)
+            for card in hand:
+                seen.remove(card)
+            hit_value, stand_value = self.solver.get_action_values(hand, up_card, seen)
+        else:
+            hit_value, stand_value = self._get_table_values(hand, up_card)
+
+        action = HIT if hit_value > stand_value else STAND
+        info = {}
+        info['values'] = {'hit': hit_value, 'stand': stand_value}
+        info['probs'] = {'hit': float(action == HIT), 'stand': float(action != HIT)}
+        return action, info
+
+    def _get_table_values(self, hand, up_card):
+        ''' Look up the expected payoffs of the basic strategy
+        '''
+        if self.strategy_table is None:
+            self.strategy_table = self.solver.get_strategy_table()
+        hard, soft = get_hand([get_card_value(card) for card in hand])
+        table = self.strategy_table['soft' if soft else 'hard']
+        row = table['totals'].index(get_score(hard, soft))
+        column = get_card_value(up_card) - 1
+        return table['hit_values'][row, column], table['stand_values'][row, column]
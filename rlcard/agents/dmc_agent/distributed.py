@@ -0,0 +1,174 @@
+# Copyright 2021 RLCard Team of Texas A&M University
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+''' Multi-node DMC over torch.distributed
+
+Rank 0 is the learner host and the other ranks are actor hosts. The actors
+of an actor host fill its shared buffers as on one machine, and the host
+sends every full unroll to the learner host with point-to-point gloo
+messages:
+
+    actor host                       learner host
+    HEADER  (player_id, version) ->
+    UNROLL  (one tensor per key) ->  into a free buffer of the learner
+                                 <-  REPLY    (version, -1 to stop)
+                                 <-  WEIGHTS  (if the host's version is older)
+
+The learner host receives an unroll only once it has a free buffer for it,
+and an actor host waits for the reply before it sends the next one. So a
+slow learner blocks the actor hosts, whose actors then block on their own
+free buffers, and no queue grows without bound.
+'''
+
+import time
+
+import torch
+import torch.distributed as dist
+
+from .utils import log
+
+HEADER, REPLY, WEIGHTS, UNROLL = 0, 1, 2, 3
+
+def flatten_weights(model, num_players):
+    ''' Get the parameters of all the players of a model as one CPU tensor
+    '''
+    return torch.cat([
+        param.detach().reshape(-1).cpu()
+        for p in range(num_players)
+        for param in model.parameters(p)
+    ])
+
+def load_weights(model, num_players, weights):
+    ''' Copy the parameters from flatten_weights into a model, in place, so
+        that the processes sharing the model see them
+    '''
+    offset = 0
+    with torch.no_grad():
+        for p in range(num_players):
+            for param in model.parameters(p):
+                param.copy_(weights[offset:offset+param.numel()].view_as(param))
+                offset += param.numel()
+
+def send_unroll(buffers, index, dst):
+    ''' Send an unroll of a player's buffers, one message per key
+    '''
+    for k, key in enumerate(sorted(buffers)):
+        dist.send(buffers[key][index].cpu(), dst, tag=UNROLL+k)
+
+def recv_unroll(buffers, index, src):
+    ''' Receive an unroll into a player's buffers, or into tensors of the
+        shape of an unroll if index is None
+    '''
+    for k, key in enumerate(sorted(buffers)):
+        tensor = buffers[key] if index is None else buffers[key][index]
+        if tensor.device.type == 'cpu':
+            dist.recv(tensor, src, tag=UNROLL+k)
+        else:
+            received = torch.empty(tensor.shape, dtype=tensor.dtype)
+            dist.recv(received, src, tag=UNROLL+k)
+            tensor.copy_(received)
+
+def serve_learner(models, num_players, free_queue, full_queue, buffers):
+    ''' Send the unrolls of an actor host to the learner host, and load the
+        weights that it sends back, until the learner host stops
+
+    Args:
+        models (dict): The shared actor model of each device
+        num_players (int): The number of players
+        free_queue (dict): The free buffer indices of each device and player
+        full_queue (dict): The full buffer indices of each device and player
+        buffers (dict): The buffers of each device and player
+    '''
+    version = 0
+    header = torch.zeros(2, dtype=torch.int64)
+    reply = torch.zeros(1, dtype=torch.int64)
+    weights = flatten_weights(next(iter(models.values())), num_players)
+    while True:
+        sent = False
+        for device in buffers:
+            for p in range(num_players):
+                if full_queue[device][p].empty():
+                    continue
+                index = full_queue[device][p].get()
+                header[0], header[1] = p, version
+                dist.send(header, 0, tag=HEADER)
+                send_unroll(buffers[device][p], index, 0)
+                free_queue[device][p].put(index)
+                dist.recv(reply, 0, tag=REPLY)
+                if reply[0] < 0:
+                    return
+                if reply[0] > version:
+                    dist.recv(weights, 0, tag=WEIGHTS)
+                    for model in models.values():
+                        load_weights(model, num_players, weights)
+                    version = int(reply[0])
+                sent = True
+        if not sent:
+            time.sleep(0.001)
+
+def serve_actor_hosts(
+    num_hosts,
+    model,
+    num_players,
+    free_queue,
+    full_queue,
+    buffers,
+    stopping,
+    host_frames,
+    publish_every,
+):
+    ''' Receive the unrolls of the actor hosts into the learner's buffers, and
+        send them the weights, until all of them are stopped
+
+    Args:
+        num_hosts (int): The number of actor hosts, ranks 1 to num_hosts
+        model (object): The model whose weights the actor hosts get
+        num_players (int): The number of players
+        free_queue (list): The free buffer indices of each player
+        full_queue (list): The full buffer indices of each player
+        buffers (list): The buffers of each player
+        stopping (threading.Event): Set when the learner is done. The free
+            queues then get None, so that a wait for a free buffer ends
+        host_frames (torch.Tensor): The frames received from each actor host
+        publish_every (int): The number of unrolls received between two
+            snapshots of the weights
+    '''
+    header = torch.zeros(2, dtype=torch.int64)
+    reply = torch.zeros(1, dtype=torch.int64)
+    # Where the unrolls go once the learner is done
+    discarded = [{key: torch.empty(buffer.shape[1:], dtype=buffer.dtype) for key, buffer in player_buffers.items()}
+                 for player_buffers in buffers]
+    version, weights, received, num_stopped = 0, None, 0, 0
+    while num_stopped < num_hosts:
+        src = dist.recv(header, tag=HEADER)
+        player_id, host_version = header.tolist()
+        index = None if stopping.is_set() else free_queue[player_id].get()
+        if index is None:
+            recv_unroll(discarded[player_id], None, src)
+            reply[0] = -1
+            dist.send(reply, src, tag=REPLY)
+            num_stopped += 1
+            log.info('Actor host %i stopped.', src)
+            continue
+        recv_unroll(buffers[player_id], index, src)
+        full_queue[player_id].put(index)
+        host_frames[src-1] += buffers[player_id]['done'].shape[1]
+        if weights is None or received % publish_every == 0:
+            weights = flatten_weights(model, num_players)
+            version += 1
+        received += 1
+        reply[0] = version
+        dist.send(reply, src, tag=REPLY)
+        if host_version < version:
+            dist.send(weights, src, tag=WEIGHTS)
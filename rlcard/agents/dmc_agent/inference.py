@@ -0,0 +1,294 @@
+# Copyright 2021 RLCard Team of Texas A&M University
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+''' Batched inference for the DMC actors
+
+Instead of running the model in every actor process, the actors send their
+requests to inference server processes, which gather the requests of many
+actors into one forward pass. Each actor owns a slot of shared-memory tensors
+for the observation, the features of the legal actions and the values of
+each of its envs, so that only small (actor_id, slot, player_id, num_actions)
+tuples go through the queues. The server runs a micro-batch when it holds
+max_batch_size requests or when the first request has waited max_latency
+seconds.
+
+An actor with several envs does not wait for the reply of one env before it
+steps the others: it sends a request for every env that waits for a decision,
+and then steps each env whose reply came back. So the server gets several
+requests per actor in a batch, and the actors do not idle while it runs them.
+'''
+
+import collections
+import copy
+import queue
+import time
+import traceback
+
+import numpy as np
+import torch
+
+from .model import get_action_features
+from .utils import log
+
+class InferenceClient:
+    ''' The shared-memory slots of an actor, one per env, and its queues to an
+        inference server
+    '''
+    def __init__(
+        self,
+        actor_id,
+        request_queue,
+        reply_queue,
+        state_shape,
+        action_shape,
+        max_actions,
+        exp_epsilon=0.01,
+        num_envs=1,
+    ):
+        self.actor_id = actor_id
+        self.request_queue = request_queue
+        self.reply_queue = reply_queue
+        self.action_shape = action_shape
+        self.exp_epsilon = exp_epsilon
+        self.num_envs = num_envs
+        self.obs_sizes = [int(np.prod(shape)) for shape in state_shape]
+        self.action_sizes = [int(np.prod(shape)) for shape in action_shape]
+        self.max_actions = max_actions
+        self.obs = torch.zeros((num_envs, max(self.obs_sizes))).share_memory_()
+        self.actions = torch.zeros((num_envs, max_actions, max(self.action_sizes))).share_memory_()
+        self.values = torch.zeros((num_envs, max_actions)).share_memory_()
+        self.num_actions = [0] * num_envs
+
+    def submit(self, slot, player_id, obs, action_values):
+        ''' Send a request to the inference server, without waiting for the reply
+
+        Args:
+            slot (int): The slot of the request, one per env of the actor
+            player_id (int): The player, whose model gives the values
+            obs (numpy.array): The float32 observation
+            action_values (numpy.array): (num_legal_actions, ...) float32 action features
+        '''
+        num_actions = len(action_values)
+        self.num_actions[slot] = num_actions
+        if num_actions > self.max_actions:
+            # The features do not fit in the slot, so they go through the queue
+            self.request_queue.put((self.actor_id, slot, player_id, num_actions, obs, action_values))
+            return
+        self.obs[slot, :obs.size] = torch.from_numpy(obs.reshape(-1))
+        self.actions[slot, :num_actions, :self.action_sizes[player_id]] = torch.from_numpy(action_values.reshape(num_actions, -1))
+        self.request_queue.put((self.actor_id, slot, player_id, num_actions))
+
+    def receive(self):
+        ''' Wait for a reply of the inference server, and also get the replies
+            that are already there
+
+        Returns:
+            (list): The (slot, values) of each reply
+        '''
+        replies = [self.reply_queue.get()]
+        while not self.reply_queue.empty():
+            replies.append(self.reply_queue.get())
+        results = []
+        for slot, values in replies:
+            if values is None:
+                values = self.values[slot, :self.num_actions[slot]].numpy().copy()
+            results.append((slot, values))
+        return results
+
+    def predict(self, player_id, obs, action_values):
+        ''' Get the values of the legal actions from the inference server
+
+        Args:
+            player_id (int): The player, whose model gives the values
+            obs (numpy.array): The float32 observation
+            action_values (numpy.array): (num_legal_actions, ...) float32 action features
+
+        Returns:
+            (numpy.array): The values of the actions
+        '''
+        self.submit(0, player_id, obs, action_values)
+        return self.receive()[0][1]
+
+    def run_envs(self, env, seed):
+        ''' Play games on num_envs copies of an env, with a request in flight
+            for each copy, instead of one game at a time as Env.run
+
+        Args:
+            env (Env): The env to copy
+            seed (int): The seed of the actor. The copies get the seeds
+                seed * num_envs to seed * num_envs + num_envs - 1
+
+        Returns:
+            (generator): The (trajectories, payoffs) of each game, as Env.run
+        '''
+        envs = [copy.deepcopy(env) for _ in range(self.num_envs)]
+        trajectories = [None] * self.num_envs
+        action_keys = [None] * self.num_envs
+        # The envs that explore, whose random action needs no values
+        exploring = collections.deque()
+
+        def request(slot, state, player_id):
+            trajectories[slot][player_id].append(state)
+            action_keys[slot], obs, action_values = get_action_features(state, self.action_shape[player_id])
+            if self.exp_epsilon > 0 and np.random.rand() < self.exp_epsilon:
+                exploring.append((slot, None))
+            else:
+                self.submit(slot, player_id, obs, action_values)
+
+        def reset(slot):
+            trajectories[slot] = [[] for _ in range(envs[slot].num_players)]
+            state, player_id = envs[slot].reset()
+            request(slot, state, player_id)
+
+        for slot in range(self.num_envs):
+            envs[slot].seed(seed * self.num_envs + slot)
+            reset(slot)
+
+        while True:
+            if exploring:
+                replies = list(exploring)
+                exploring.clear()
+            else:
+                replies = self.receive()
+            for slot, values in replies:
+                if values is None:
+                    action = np.random.choice(action_keys[slot])
+                else:
+                    action = action_keys[slot][np.argmax(values)]
+                player_id = envs[slot].get_player_id()
+                state, next_player_id = envs[slot].step(action)
+                trajectories[slot][player_id].append(action)
+                if not envs[slot].is_over():
+                    request(slot, state, next_player_id)
+                    continue
+                for player_id in range(envs[slot].num_players):
+                    trajectories[slot][player_id].append(envs[slot].get_state(player_id))
+                yield trajectories[slot], envs[slot].get_payoffs()
+                reset(slot)
+
+    def get_agents(self):
+        return [DMCInferenceAgent(self, player_id) for player_id in range(len(self.obs_sizes))]
+
+class DMCInferenceAgent:
+    ''' A DMC agent that gets its values from an inference server
+    '''
+    def __init__(self, client, player_id):
+        self.use_raw = False
+        self.client = client
+        self.player_id = player_id
+        self.exp_epsilon = client.exp_epsilon
+        self.action_shape = client.action_shape[player_id]
+
+    def step(self, state):
+        action_keys, values = self.predict(state)
+
+        if self.exp_epsilon > 0 and np.random.rand() < self.exp_epsilon:
+            action = np.random.choice(action_keys)
+        else:
+            action_idx = np.argmax(values)
+            action = action_keys[action_idx]
+
+        return action
+
+    def eval_step(self, state):
+        action_keys, values = self.predict(state)
+
+        action_idx = np.argmax(values)
+        action = action_keys[action_idx]
+
+        info = {}
+        info['values'] = {state['raw_legal_actions'][i]: float(values[i]) for i in range(len(action_keys))}
+
+        return action, info
+
+    def predict(self, state):
+        action_keys, obs, action_values = get_action_features(state, self.action_shape)
+        return action_keys, self.client.predict(self.player_id, obs, action_values)
+
+def predict_batch(model, device, clients, requests):
+    ''' Run the requests of a micro-batch, one forward pass per player, and
+        reply to the actors
+    '''
+    for player_id in sorted(set(request[2] for request in requests)):
+        group = [request for request in requests if request[2] == player_id]
+        obs, actions, counts = [], [], []
+        for request in group:
+            client, slot, num_actions = clients[request[0]], request[1], request[3]
+            if len(request) > 4:
+                obs.append(torch.from_numpy(request[4].reshape(-1)))
+                actions.append(torch.from_numpy(request[5].reshape(num_actions, -1)))
+            else:
+                obs.append(client.obs[slot, :client.obs_sizes[player_id]])
+                actions.append(client.actions[slot, :num_actions, :client.action_sizes[player_id]])
+            counts.append(num_actions)
+        counts = torch.tensor(counts)
+        obs = torch.repeat_interleave(torch.stack(obs), counts, dim=0)
+        actions = torch.cat(actions)
+        with torch.no_grad():
+            values = model.get_agent(player_id).forward(obs.to(device), actions.to(device)).cpu()
+        for request, request_values in zip(group, torch.split(values, counts.tolist())):
+            client, slot = clients[request[0]], request[1]
+            if len(request) > 4:
+                client.reply_queue.put((slot, request_values.numpy()))
+            else:
+                client.values[slot, :request[3]] = request_values
+                client.reply_queue.put((slot, None))
+
+def serve(
+    i,
+    device,
+    model,
+    request_queue,
+    clients,
+    max_batch_size,
+    max_latency,
+):
+    ''' Run an inference server until it gets None
+
+    Args:
+        i (int): The index of the server
+        device (str): The device of the model, an index of GPU or `cpu`
+        model (DMCModel): The model of the actors, shared with the learner
+        request_queue (multiprocessing.Queue): The requests of the actors
+        clients (dict): The InferenceClient of the actors, by actor id
+        max_batch_size (int): The most requests in a micro-batch
+        max_latency (float): The most seconds that the first request waits
+    '''
+    try:
+        log.info('Device %s Inference server %i started.', str(device), i)
+        device = 'cuda:'+str(device) if device != "cpu" else "cpu"
+        stopping = False
+        while not stopping:
+            request = request_queue.get()
+            if request is None:
+                break
+            requests = [request]
+            deadline = time.perf_counter() + max_latency
+            while len(requests) < max_batch_size:
+                try:
+                    request = request_queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                requests.append(request)
+            predict_batch(model, device, clients, requests)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        log.error('Exception in inference server %i', i)
+        traceback.print_exc()
+        print()
+        raise e
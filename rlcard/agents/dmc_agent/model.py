@@ -18,6 +18,31 @@ import numpy as np
 import torch
 from torch import nn
 
+def get_action_features(state, action_shape):
+    ''' Get the observation and the features of the legal actions of a state
+
+    Args:
+        state (dict): The state of the env
+        action_shape (list): The shape of the action features, one-hot encoding
+            of the action ids if the env gives no features
+
+    Returns:
+        action_keys (numpy.array): The legal action ids
+        obs (numpy.array): The float32 observation
+        action_values (numpy.array): (num_legal_actions, ...) float32 action features
+    '''
+    obs = state['obs'].astype(np.float32)
+    legal_actions = state['legal_actions']
+    action_keys = np.array(list(legal_actions.keys()))
+    action_values = list(legal_actions.values())
+    # One-hot encoding if there is no action features
+    for i in range(len(action_values)):
+        if action_values[i] is None:
+            action_values[i] = np.zeros(action_shape[0])
+            action_values[i][action_keys[i]] = 1
+    action_values = np.array(action_values, dtype=np.float32)
+    return action_keys, obs, action_values
+
 class DMCNet(nn.Module):
     def __init__(
         self,
@@ -90,16 +115,7 @@ class DMCAgent:
 
     def predict(self, state):
         # Prepare obs and actions
-        obs = state['obs'].astype(np.float32)
-        legal_actions = state['legal_actions']
-        action_keys = np.array(list(legal_actions.keys()))
-        action_values = list(legal_actions.values())
-        # One-hot encoding if there is no action features
-        for i in range(len(action_values)):
-            if action_values[i] is None:
-                action_values[i] = np.zeros(self.action_shape[0])
-                action_values[i][action_keys[i]] = 1
-        action_values = np.array(action_values, dtype=np.float32)
+        action_keys, obs, action_values = get_action_features(state, self.action_shape)
 
         obs = np.repeat(obs[np.newaxis, :], len(action_keys), axis=0)
 
@@ -21,10 +21,13 @@ import pprint
 from collections import deque
 
 import torch
+import torch.distributed as dist
 from torch import multiprocessing as mp
 from torch import nn
 
+from .distributed import serve_actor_hosts, serve_learner
 from .file_writer import FileWriter
+from .inference import InferenceClient, serve
 from .model import DMCModel
 from .pettingzoo_model import DMCModelPettingZoo
 from .utils import (
@@ -33,6 +36,8 @@ from .utils import (
     create_optimizers,
     act,
     log,
+    plan_cpu_cores,
+    run_pinned,
 )
 from .pettingzoo_utils import (
     create_buffers_pettingzoo,
@@ -90,7 +95,8 @@ class DMCTrainer:
         xpid (string): Experiment id (default: dmc)
         save_interval (int): Time interval (in minutes) at which to save the model
         num_actor_devices (int): The number devices used for simulation
-        num_actors (int): Number of actors for each simulation device
+        num_actors (int): Number of actors for each simulation device. If None, one
+            per CPU core left after the learner and the inference servers
         training_device (str): The index of the GPU used for training models, or `cpu`.
         savedir (string): Root dir where experiment data will be saved
         total_frames (int): Total environment frames to train for
@@ -104,6 +110,28 @@ class DMCTrainer:
         alpha (float): RMSProp smoothing constant
         momentum (float): RMSProp momentum
         epsilon (float): RMSProp epsilon
+        num_inference_servers (int): Number of inference server processes for each
+            simulation device. If 0, every actor runs the model itself
+        inference_batch_size (int): The most decisions that a server evaluates in one
+            forward pass, one per env of its actors if not given
+        inference_latency (float): The most seconds that a server waits to fill a batch
+        inference_max_actions (int): The most legal actions sent through shared memory,
+            the number of actions of the env if not given. States with more legal
+            actions go through the queues
+        inference_envs_per_actor (int): The envs that an actor steps with the
+            inference servers. It sends a request for each env that waits for a
+            decision before it waits for the replies
+        cpu_affinity (bool): On CPU (cuda is empty), whether to pin the learner and
+            each actor to disjoint cores. The actors always run with one torch
+            thread, and the learner with as many as it has cores
+        num_learner_cores (int): The cores of the learner on CPU, a quarter of the
+            available cores if not given
+        world_size (int): The number of hosts. If more than 1, rank 0 is the learner
+            host and the others are actor hosts, which send their unrolls to it
+        rank (int): The rank of this host
+        init_method (str): The URL where the hosts meet, see torch.distributed
+        publish_every (int): The number of unrolls that the learner host receives
+            between two snapshots of the weights for the actor hosts
     """
     def __init__(
         self,
@@ -127,14 +155,28 @@ class DMCTrainer:
         learning_rate=0.0001,
         alpha=0.99,
         momentum=0,
-        epsilon=0.00001
+        epsilon=0.00001,
+        num_inference_servers=0,
+        inference_batch_size=None,
+        inference_latency=0.002,
+        inference_max_actions=None,
+        inference_envs_per_actor=1,
+        cpu_affinity=True,
+        num_learner_cores=None,
+        world_size=1,
+        rank=0,
+        init_method='tcp://127.0.0.1:29500',
+        publish_every=10,
     ):
         self.env = env
 
-        self.plogger = FileWriter(
-            xpid=xpid,
-            rootdir=savedir,
-        )
+        # Only the learner host logs
+        self.plogger = None
+        if rank == 0:
+            self.plogger = FileWriter(
+                xpid=xpid,
+                rootdir=savedir,
+            )
 
         self.checkpointpath = os.path.expandvars(
             os.path.expanduser('%s/%s/%s' % (savedir, xpid, 'model.tar')))
@@ -158,6 +200,15 @@ class DMCTrainer:
         self.alpha = alpha
         self.momentum = momentum
         self.epsilon = epsilon
+        self.num_inference_servers = num_inference_servers
+        self.inference_batch_size = inference_batch_size
+        self.inference_latency = inference_latency
+        self.inference_max_actions = inference_max_actions
+        self.inference_envs_per_actor = inference_envs_per_actor
+        self.world_size = world_size
+        self.rank = rank
+        self.init_method = init_method
+        self.publish_every = publish_every
 
         self.is_pettingzoo_env = is_pettingzoo_env
         if not self.is_pettingzoo_env:
@@ -192,6 +243,93 @@ class DMCTrainer:
         else:
             self.device_iterator = range(num_actor_devices)
 
+        # Split the cores between the learner and the actors
+        learner_cores, process_cores, self.num_actors = plan_cpu_cores(
+            num_actors,
+            num_learner_cores,
+            num_inference_servers,
+        )
+        self.learner_cores, self.process_cores = None, [None] * len(process_cores)
+        if cuda == "" and cpu_affinity:
+            self.learner_cores, self.process_cores = learner_cores, process_cores
+
+    def _start_inference_servers(self, ctx, device, model, processes):
+        """Start the inference servers of a device.
+
+        Returns:
+            (list): The InferenceClient of each actor
+        """
+        max_actions = self.inference_max_actions
+        if max_actions is None:
+            max_actions = self.env.num_actions
+        request_queues = [ctx.Queue() for _ in range(self.num_inference_servers)]
+        clients = []
+        for i in range(self.num_actors):
+            clients.append(InferenceClient(
+                i,
+                request_queues[i % self.num_inference_servers],
+                ctx.SimpleQueue(),
+                self.env.state_shape,
+                self.action_shape,
+                max_actions,
+                exp_epsilon=self.exp_epsilon,
+                num_envs=self.inference_envs_per_actor,
+            ))
+        for i in range(self.num_inference_servers):
+            server_clients = {client.actor_id: client for client in clients[i::self.num_inference_servers]}
+            max_batch_size = self.inference_batch_size or len(server_clients) * self.inference_envs_per_actor
+            server = ctx.Process(
+                target=run_pinned,
+                args=(self.process_cores[self.num_actors + i], 1, serve,
+                      i, device, model, request_queues[i], server_clients, max_batch_size, self.inference_latency))
+            server.start()
+            processes.append(server)
+        return clients
+
+    def _start_actors(self, ctx, models, buffers, free_queue, full_queue, processes):
+        """Start the actors of every device, and their inference servers if any.
+
+        Returns:
+            (torch.Tensor): The frames of each actor, by device
+        """
+        # Starting inference servers, whose clients act in place of the models.
+        # The trainer keeps the clients, as their queues must outlive the
+        # spawning of the processes
+        actor_models = {device: [models[device]] * self.num_actors for device in self.device_iterator}
+        if self.num_inference_servers > 0:
+            if self.is_pettingzoo_env:
+                raise ValueError('DMCTrainer: the inference servers do not support PettingZoo envs')
+            for device in self.device_iterator:
+                actor_models[device] = self._start_inference_servers(ctx, device, models[device], processes)
+        self.inference_clients = actor_models
+
+        # Starting actor processes, which count their frames
+        actor_frames = torch.zeros((len(self.device_iterator), self.num_actors), dtype=torch.int64).share_memory_()
+        for d, device in enumerate(self.device_iterator):
+            for i in range(self.num_actors):
+                actor = ctx.Process(
+                    target=run_pinned,
+                    args=(self.process_cores[i], 1, act_pettingzoo if self.is_pettingzoo_env else act,
+                          i, device, self.T, free_queue[device], full_queue[device], actor_models[device][i], buffers[device], self.env, actor_frames[d]))
+                actor.start()
+                processes.append(actor)
+        return actor_frames
+
+    def _run_actor_host(self, ctx, models, buffers, free_queue, full_queue):
+        """Run the actors of an actor host until the learner host stops them."""
+        actor_processes = []
+        self._start_actors(ctx, models, buffers, free_queue, full_queue, actor_processes)
+        for device in self.device_iterator:
+            for m in range(self.num_buffers):
+                for p in range(self.num_players):
+                    free_queue[device][p].put(m)
+        log.info('Actor host %i sending unrolls.', self.rank)
+        serve_learner(models, self.num_players, free_queue, full_queue, buffers)
+        for process in actor_processes:
+            process.terminate()
+        dist.destroy_process_group()
+        log.info('Actor host %i finished.', self.rank)
+
     def start(self):
         # Initialize actor models
         models = {}
@@ -229,6 +367,12 @@ class DMCTrainer:
             free_queue[device] = _free_queue
             full_queue[device] = _full_queue
 
+        if self.world_size > 1:
+            dist.init_process_group('gloo', init_method=self.init_method, rank=self.rank, world_size=self.world_size)
+            if self.rank > 0:
+                self._run_actor_host(ctx, models, buffers, free_queue, full_queue)
+                return
+
         # Learner model for training
         learner_model = self.model_func(self.training_device)
 
@@ -265,15 +409,13 @@ class DMCTrainer:
             log.info(f"Resuming preempted job, current stats:\n{stats}")
 
 
-        # Starting actor processes
-        for device in self.device_iterator:
-            num_actors = self.num_actors
-            for i in range(self.num_actors):
-                actor = ctx.Process(
-                    target=act_pettingzoo if self.is_pettingzoo_env else act,
-                    args=(i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env))
-                actor.start()
-                actor_processes.append(actor)
+        actor_frames = self._start_actors(ctx, models, buffers, free_queue, full_queue, actor_processes)
+
+        # The learner runs on the cores left by the actors
+        if self.learner_cores is not None:
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(0, self.learner_cores)
+            torch.set_num_threads(len(self.learner_cores))
 
         def batch_and_learn(i, device, position, local_lock, position_lock, lock=threading.Lock()):
             """Thread target for the learning process."""
@@ -331,6 +473,27 @@ class DMCTrainer:
                     thread.start()
                     threads.append(thread)
 
+        # Receiving the unrolls of the actor hosts into the buffers of the first device
+        host_frames = torch.zeros(self.world_size - 1, dtype=torch.int64)
+        if self.world_size > 1:
+            host_device = self.device_iterator[0]
+            stopping = threading.Event()
+            host_thread = threading.Thread(
+                target=serve_actor_hosts,
+                name='actor-hosts',
+                args=(
+                    self.world_size - 1,
+                    models[host_device],
+                    self.num_players,
+                    free_queue[host_device],
+                    full_queue[host_device],
+                    buffers[host_device],
+                    stopping,
+                    host_frames,
+                    self.publish_every)
+                )
+            host_thread.start()
+
         def checkpoint(frames):
             log.info('Saving checkpoint to %s', self.checkpointpath)
             _agents = learner_model.get_agents()
@@ -355,6 +518,8 @@ class DMCTrainer:
             last_checkpoint_time = timer() - self.save_interval * 60
             while frames < self.total_frames:
                 start_frames = frames
+                start_actor_frames = actor_frames.clone()
+                start_host_frames = host_frames.clone()
                 start_time = timer()
                 time.sleep(5)
 
@@ -370,12 +535,35 @@ class DMCTrainer:
                     fps,
                     pprint.pformat(stats),
                 )
+                if self.num_actors > 0:
+                    actor_fps = (actor_frames - start_actor_frames).double() / (end_time - start_time)
+                    log.info(
+                        'Actor fps: %s',
+                        ', '.join('%.1f' % actor_fps_ for actor_fps_ in actor_fps.flatten().tolist()),
+                    )
+                if self.world_size > 1:
+                    host_fps = (host_frames - start_host_frames).double() / (end_time - start_time)
+                    log.info(
+                        'Actor host fps: %s',
+                        ', '.join('%.1f' % host_fps_ for host_fps_ in host_fps.tolist()),
+                    )
         except KeyboardInterrupt:
             return
         else:
             for thread in threads:
                 thread.join()
             log.info('Learning finished after %d frames.', frames)
+            if self.world_size > 1:
+                stopping.set()
+                for p in range(self.num_players):
+                    free_queue[host_device][p].put(None)
+                host_thread.join()
+                dist.destroy_process_group()
 
         checkpoint(frames)
         self.plogger.close()
+
+        # The actors loop forever, so they are stopped once learning is done
+        for process in actor_processes:
+            process.terminate()
+            process.join()
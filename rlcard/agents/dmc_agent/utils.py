@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import logging
+import os
 import traceback
 
 import numpy as np
@@ -38,8 +39,10 @@ def get_batch(
 ):
     with lock:
         indices = [full_queue.get() for _ in range(batch_size)]
+    # One gather per key from the contiguous buffers, then (T, B, ...) views
+    index = torch.tensor(indices, device=buffers['done'].device)
     batch = {
-        key: torch.stack([buffers[key][m] for m in indices], dim=1)
+        key: buffers[key].index_select(0, index).transpose(0, 1)
         for key in buffers
     }
     for m in indices:
@@ -58,23 +61,166 @@ def create_buffers(
         buffers[device] = []
         for player_id in range(len(state_shape)):
             specs = dict(
-                done=dict(size=(T,), dtype=torch.bool),
-                episode_return=dict(size=(T,), dtype=torch.float32),
-                target=dict(size=(T,), dtype=torch.float32),
-                state=dict(size=(T,)+tuple(state_shape[player_id]), dtype=torch.int8),
-                action=dict(size=(T,)+tuple(action_shape[player_id]), dtype=torch.int8),
+                done=dict(size=(num_buffers, T), dtype=torch.bool),
+                episode_return=dict(size=(num_buffers, T), dtype=torch.float32),
+                target=dict(size=(num_buffers, T), dtype=torch.float32),
+                state=dict(size=(num_buffers, T)+tuple(state_shape[player_id]), dtype=torch.int8),
+                action=dict(size=(num_buffers, T)+tuple(action_shape[player_id]), dtype=torch.int8),
             )
-            _buffers = {key: [] for key in specs}
-            for _ in range(num_buffers):
-                for key in _buffers:
-                    if device == "cpu":
-                        _buffer = torch.empty(**specs[key]).to('cpu').share_memory_()
-                    else:
-                        _buffer = torch.empty(**specs[key]).to('cuda:'+str(device)).share_memory_()
-                    _buffers[key].append(_buffer)
-            buffers[device].append(_buffers)
+            buffers[device].append(create_player_buffers(specs, device))
     return buffers
 
+def create_player_buffers(specs, device):
+    ''' Create one contiguous shared tensor per key, whose first dimension
+        indexes the buffers
+    '''
+    _buffers = {}
+    for key in specs:
+        if device == "cpu":
+            _buffers[key] = torch.empty(**specs[key]).to('cpu').share_memory_()
+        else:
+            _buffers[key] = torch.empty(**specs[key]).to('cuda:'+str(device)).share_memory_()
+    return _buffers
+
+class RolloutRing:
+    ''' The steps of a player that an actor has not written to the shared
+        buffers yet, kept in a ring with a read and a write cursor
+
+    Episodes are appended with one slice assignment per key, and unrolls of
+    T steps are written to a shared buffer with one slice assignment per key,
+    or two when they wrap around the end of the ring.
+    '''
+    def __init__(self, buffers, capacity=None):
+        ''' Initialize the ring
+
+        Args:
+            buffers (dict): The (num_buffers, T, ...) shared tensors of the player
+            capacity (int): The initial number of steps, which grows when needed.
+                Default is 2 * T.
+        '''
+        self.T = buffers['done'].shape[1]
+        self.specs = {key: (tuple(buffer.shape[2:]), buffer.dtype) for key, buffer in buffers.items()}
+        self.capacity = capacity or 2 * self.T
+        self.data = {key: torch.empty((self.capacity,)+shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()}
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _spans(self, start, num_steps):
+        ''' Get the (ring start, ring end, offset) spans of num_steps steps
+            from a position of the ring
+        '''
+        first = min(num_steps, self.capacity - start)
+        spans = [(start, start + first, 0)]
+        if first < num_steps:
+            spans.append((0, num_steps - first, first))
+        return spans
+
+    def _grow(self, num_steps):
+        ''' Double the capacity until num_steps more steps fit, keeping the
+            steps in order from the start of the ring
+        '''
+        capacity = self.capacity
+        while capacity < self.size + num_steps:
+            capacity *= 2
+        for key, (shape, dtype) in self.specs.items():
+            data = torch.empty((capacity,)+shape, dtype=dtype)
+            for begin, end, offset in self._spans(self.head, self.size):
+                data[offset:offset+end-begin] = self.data[key][begin:end]
+            self.data[key] = data
+        self.capacity = capacity
+        self.head = 0
+
+    def append(self, **steps):
+        ''' Append the steps of an episode
+
+        Args:
+            steps: An array with the steps of the episode for each key of the buffers
+        '''
+        num_steps = len(steps['done'])
+        if self.size + num_steps > self.capacity:
+            self._grow(num_steps)
+        spans = self._spans((self.head + self.size) % self.capacity, num_steps)
+        for key in self.specs:
+            values = torch.as_tensor(steps[key])
+            for begin, end, offset in spans:
+                self.data[key][begin:end] = values[offset:offset+end-begin]
+        self.size += num_steps
+
+    def pop(self, buffers, index):
+        ''' Move the oldest T steps to a shared buffer
+
+        Args:
+            buffers (dict): The (num_buffers, T, ...) shared tensors of the player
+            index (int): The buffer to write to
+        '''
+        spans = self._spans(self.head, self.T)
+        for key in self.specs:
+            for begin, end, offset in spans:
+                buffers[key][index, offset:offset+end-begin] = self.data[key][begin:end]
+        self.head = (self.head + self.T) % self.capacity
+        self.size -= self.T
+
+def get_available_cores():
+    ''' Get the CPU cores that this process may run on
+    '''
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def plan_cpu_cores(
+    num_actors=None,
+    num_learner_cores=None,
+    num_inference_servers=0,
+    cores=None,
+):
+    ''' Split the CPU cores between the learner and the actor processes
+
+    The learner gets the first num_learner_cores cores, and every actor and
+    inference server one of the other cores, in turn. With a single core,
+    all of them share it.
+
+    Args:
+        num_actors (int): The number of actors, one per core left after the
+            learner and the inference servers if not given
+        num_learner_cores (int): The cores of the learner, a quarter of them if not given
+        num_inference_servers (int): The number of inference servers
+        cores (list): The cores to split, all the available cores if not given
+
+    Returns:
+        learner_cores (list): The cores of the learner
+        process_cores (list): The cores of each actor, then of each inference server
+        num_actors (int): The number of actors
+    '''
+    if cores is None:
+        cores = get_available_cores()
+    if len(cores) < 2:
+        learner_cores, actor_cores = list(cores), list(cores)
+    else:
+        if num_learner_cores is None:
+            num_learner_cores = max(1, len(cores) // 4)
+        num_learner_cores = min(num_learner_cores, len(cores) - 1)
+        learner_cores, actor_cores = list(cores[:num_learner_cores]), list(cores[num_learner_cores:])
+    if num_actors is None:
+        num_actors = max(1, len(actor_cores) - num_inference_servers)
+    process_cores = [[actor_cores[k % len(actor_cores)]] for k in range(num_actors + num_inference_servers)]
+    return learner_cores, process_cores, num_actors
+
+def run_pinned(cores, num_threads, target, *args):
+    ''' Run the target of a process on some cores, with some torch threads
+
+    Args:
+        cores (list): The cores to run on, any core if None
+        num_threads (int): The number of torch intra-op threads
+        target (callable): The function of the process, called with args
+    '''
+    if cores is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(num_threads)
+    target(*args)
+
 def create_optimizers(
     num_players,
     learning_rate,
@@ -94,6 +240,15 @@ def create_optimizers(
         optimizers.append(optimizer)
     return optimizers
 
+def run_env(env):
+    ''' Play games on an env, one at a time
+
+    Returns:
+        (generator): The (trajectories, payoffs) of each game
+    '''
+    while True:
+        yield env.run(is_training=True)
+
 def act(
     i,
     device,
@@ -102,57 +257,50 @@ def act(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    frame_counter=None,
 ):
     try:
         log.info('Device %s Actor %i started.', str(device), i)
 
         # Configure environment
-        env.seed(i)
-        env.set_agents(model.get_agents())
-
-        done_buf = [[] for _ in range(env.num_players)]
-        episode_return_buf = [[] for _ in range(env.num_players)]
-        target_buf = [[] for _ in range(env.num_players)]
-        state_buf = [[] for _ in range(env.num_players)]
-        action_buf = [[] for _ in range(env.num_players)]
-        size = [0 for _ in range(env.num_players)]
-
-        while True:
-            trajectories, payoffs = env.run(is_training=True)
+        if getattr(model, 'num_envs', 1) > 1:
+            # Step several envs, with a request to the inference server in flight for each
+            episodes = model.run_envs(env, i)
+        else:
+            env.seed(i)
+            env.set_agents(model.get_agents())
+            episodes = run_env(env)
+
+        rings = [RolloutRing(buffers[p]) for p in range(env.num_players)]
+
+        for trajectories, payoffs in episodes:
             for p in range(env.num_players):
-                size[p] += len(trajectories[p][:-1]) // 2
-                diff = size[p] - len(target_buf[p])
-                if diff > 0:
-                    done_buf[p].extend([False for _ in range(diff-1)])
-                    done_buf[p].append(True)
-                    episode_return_buf[p].extend([0.0 for _ in range(diff-1)])
-                    episode_return_buf[p].append(float(payoffs[p]))
-                    target_buf[p].extend([float(payoffs[p]) for _ in range(diff)])
+                num_steps = len(trajectories[p][:-1]) // 2
+                if num_steps > 0:
+                    done = np.zeros(num_steps, dtype=bool)
+                    done[-1] = True
+                    episode_return = np.zeros(num_steps, dtype=np.float32)
+                    episode_return[-1] = payoffs[p]
                     # State and action
-                    for i in range(0, len(trajectories[p])-2, 2):
-                        state = trajectories[p][i]['obs']
-                        action = env.get_action_feature(trajectories[p][i+1])
-                        state_buf[p].append(torch.from_numpy(state))
-                        action_buf[p].append(torch.from_numpy(action))
-                
-                while size[p] > T:
+                    states = [trajectories[p][i]['obs'] for i in range(0, 2*num_steps, 2)]
+                    actions = [env.get_action_feature(trajectories[p][i]) for i in range(1, 2*num_steps, 2)]
+                    rings[p].append(
+                        done=done,
+                        episode_return=episode_return,
+                        target=np.full(num_steps, payoffs[p], dtype=np.float32),
+                        state=np.stack(states),
+                        action=np.stack(actions),
+                    )
+                    if frame_counter is not None:
+                        frame_counter[i] += num_steps
+
+                while len(rings[p]) > T:
                     index = free_queue[p].get()
                     if index is None:
                         break
-                    for t in range(T):
-                        buffers[p]['done'][index][t, ...] = done_buf[p][t]
-                        buffers[p]['episode_return'][index][t, ...] = episode_return_buf[p][t]
-                        buffers[p]['target'][index][t, ...] = target_buf[p][t]
-                        buffers[p]['state'][index][t, ...] = state_buf[p][t]
-                        buffers[p]['action'][index][t, ...] = action_buf[p][t]
+                    rings[p].pop(buffers[p], index)
                     full_queue[p].put(index)
-                    done_buf[p] = done_buf[p][T:]
-                    episode_return_buf[p] = episode_return_buf[p][T:]
-                    target_buf[p] = target_buf[p][T:]
-                    state_buf[p] = state_buf[p][T:]
-                    action_buf[p] = action_buf[p][T:]
-                    size[p] -= T
 
     except KeyboardInterrupt:
         pass
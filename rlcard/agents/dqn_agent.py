@@ -26,13 +26,16 @@ SOFTWARE.
 '''
 
 import os
+import json
 import random
+import threading
 import numpy as np
 import torch
 import torch.nn as nn
 from collections import namedtuple
 from copy import deepcopy
 
+from rlcard.agents.learner_thread import LearnerThread
 from rlcard.utils.utils import remove_illegal
 
 Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done', 'legal_actions'])
@@ -213,7 +216,16 @@ class DQNAgent(object):
                  learning_rate=0.00005,
                  device=None,
                  save_path=None,
-                 save_every=float('inf'),):
+                 save_every=float('inf'),
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta_start=0.4,
+                 priority_beta_steps=100000,
+                 replay_memory_dir=None,
+                 replay_memory_pack_bits=False,
+                 async_training=False,
+                 update_to_data_ratio=None,
+                 publish_every=1):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -240,6 +252,23 @@ class DQNAgent(object):
             device (torch.device): whether to use the cpu or gpu
             save_path (str): The path to save the model checkpoints
             save_every (int): Save the model every X training steps
+            prioritized_replay (bool): Whether to sample the transitions in proportion
+              to their TD errors, see PrioritizedMemory
+            priority_alpha (float): How much the TD errors count in the priorities
+            priority_beta_start (float): The exponent of the importance-sampling weights,
+              which is annealed to 1 over priority_beta_steps timesteps
+            priority_beta_steps (int): Number of timesteps to anneal the exponent over
+            replay_memory_dir (str): If given, keep the replay memory in memory-mapped
+              files in this directory, see MemmapMemory
+            replay_memory_pack_bits (bool): Whether to bit-pack the states in the files,
+              which is only valid for environments whose states are all 0s and 1s
+            async_training (bool): Whether to train in a background LearnerThread. feed
+              only saves the transitions, and the agent acts with a copy of the
+              Q-network that the learner updates every publish_every updates
+            update_to_data_ratio (float): The number of updates per transition fed
+              in async training, 1 / train_every if not given
+            publish_every (int): Copy the weights to the acting network every X updates
+              in async training
         '''
         self.use_raw = False
         self.replay_memory_init_size = replay_memory_init_size
@@ -275,12 +304,37 @@ class DQNAgent(object):
         self.target_estimator = deepcopy(self.q_estimator)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        self.prioritized_replay = prioritized_replay
+        self.priority_beta_start = priority_beta_start
+        self.priority_beta_steps = priority_beta_steps
+        if prioritized_replay and replay_memory_dir is not None:
+            raise ValueError('DQNAgent: the prioritized replay memory cannot be kept in files')
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, num_actions, alpha=priority_alpha)
+        elif replay_memory_dir is not None:
+            self.memory = MemmapMemory(replay_memory_size, batch_size, num_actions, replay_memory_dir,
+                                       pack_bits=replay_memory_pack_bits)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, num_actions)
         
         # Checkpoint saving parameters
         self.save_path = save_path
         self.save_every = save_every
 
+        # The lock of the memory, and of the estimator while it is trained
+        self._lock = threading.RLock()
+        self._train_lock = threading.RLock()
+        self.async_training = async_training
+        self.update_to_data_ratio = 1 / train_every if update_to_data_ratio is None else update_to_data_ratio
+        self.publish_every = publish_every
+        if async_training:
+            self.acting_estimator = deepcopy(self.q_estimator)
+            self.learner = LearnerThread(self._sample_batch, self._train_batch, self._lock,
+                                         self.update_to_data_ratio, self._publish_weights, publish_every)
+        else:
+            self.acting_estimator = self.q_estimator
+            self.learner = None
+
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
             In stage 1, populate the memory without training
@@ -290,6 +344,13 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
+        if self.async_training:
+            with self._lock:
+                self.feed_memory(state['obs'], action, reward, next_state['obs'], list(next_state['legal_actions'].keys()), done)
+                self.total_t += 1
+                if self.total_t >= self.replay_memory_init_size:
+                    self.learner.add_data()
+            return
         self.feed_memory(state['obs'], action, reward, next_state['obs'], list(next_state['legal_actions'].keys()), done)
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
@@ -346,41 +407,123 @@ class DQNAgent(object):
             q_values (numpy.array): a 1-d array where each entry represents a Q value
         '''
         
-        q_values = self.q_estimator.predict_nograd(np.expand_dims(state['obs'], 0))[0]
+        with self._lock:
+            q_values = self.acting_estimator.predict_nograd(np.expand_dims(state['obs'], 0))[0]
         masked_q_values = -np.inf * np.ones(self.num_actions, dtype=float)
         legal_actions = list(state['legal_actions'].keys())
         masked_q_values[legal_actions] = q_values[legal_actions]
 
         return masked_q_values
 
+    def step_batch(self, obs, legal_mask):
+        ''' Predict the actions of a batch of states for genrating training data,
+            as step, with one forward pass
+
+        Args:
+            obs (numpy.array): (batch_size, ...) observations
+            legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+        Returns:
+            actions (numpy.array): (batch_size,) action ids
+        '''
+        return np.argmax(self.predict_batch(obs, legal_mask), axis=1)
+
+    def eval_step_batch(self, obs, legal_mask):
+        ''' Predict the actions of a batch of states for evaluation purpose,
+            as eval_step, with one forward pass
+
+        Args:
+            obs (numpy.array): (batch_size, ...) observations
+            legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+        Returns:
+            actions (numpy.array): (batch_size,) action ids
+            info (dict): 'values', the (batch_size, num_actions) masked Q-values
+        '''
+        masked_q_values = self.predict_batch(obs, legal_mask)
+        return np.argmax(masked_q_values, axis=1), {'values': masked_q_values}
+
+    def predict_batch(self, obs, legal_mask):
+        ''' Predict the masked Q-values of a batch of states
+
+        Args:
+            obs (numpy.array): (batch_size, ...) observations
+            legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+        Returns:
+            q_values (numpy.array): (batch_size, num_actions) Q-values, -inf for the illegal actions
+        '''
+        with self._lock:
+            q_values = self.acting_estimator.predict_nograd(np.asarray(obs))
+        return np.where(np.asarray(legal_mask, dtype=bool), q_values, -np.inf)
+
     def train(self):
+        ''' Train the network on a batch sampled from the memory
+        '''
+        with self._lock:
+            batch = self._sample_batch()
+        self._train_batch(batch)
+
+    def _sample_batch(self):
+        ''' Sample a batch from the memory, with the lock held
+
+        Returns:
+            (tuple): the batch of Memory.sample, then the indices and the
+                importance-sampling weights, None without prioritized replay
+        '''
+        if self.prioritized_replay:
+            beta = min(1.0, self.priority_beta_start + (1.0 - self.priority_beta_start) * self.total_t / self.priority_beta_steps)
+            return self.memory.sample(beta)
+        return self.memory.sample() + (None, None)
+
+    def _train_batch(self, batch):
+        ''' Perform one gradient step on a sampled batch, see _sample_batch
+        '''
+        with self._train_lock:
+            reset_all_noise(self.q_estimator.qnet)
+            reset_all_noise(self.target_estimator.qnet)
+
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, indices, weights = batch
+
+            # Calculate best next actions using Q-network (Double DQN)
+            q_values_next = self.q_estimator.predict_nograd(next_state_batch)
+            best_actions = np.argmax(q_values_next, axis=1)
 
-        reset_all_noise(self.q_estimator.qnet)
-        reset_all_noise(self.target_estimator.qnet)
-
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
-    
-        # Calculate best next actions using Q-network (Double DQN)
-        q_values_next = self.q_estimator.predict_nograd(next_state_batch)
-        best_actions = np.argmax(q_values_next, axis=1)
-    
-        # Evaluate best next actions using Target-network (Double DQN)
-        q_values_next_target = self.target_estimator.predict_nograd(next_state_batch)
-        target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
-            self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
-    
-        # Perform gradient descent update
-        state_batch = np.array(state_batch)
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
-    
-        print(f'\rINFO - Step {self.total_t}, rl-loss: {loss}', end='')
-    
-        # Update the target estimator periodically
-        if self.train_t % self.update_target_estimator_every == 0:
-            self.q_estimator.update_target_network()
-            print("\nINFO - Copied model parameters to target network.")
+            # Evaluate best next actions using Target-network (Double DQN)
+            q_values_next_target = self.target_estimator.predict_nograd(next_state_batch)
+            target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
+                self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
+            # Perform gradient descent update
+            state_batch = np.array(state_batch)
+            loss, td_errors = self.q_estimator.update(state_batch, action_batch, target_batch, weights)
+            if self.prioritized_replay:
+                with self._lock:
+                    self.memory.update_priorities(indices, td_errors)
 
+            print(f'\rINFO - Step {self.total_t}, rl-loss: {loss}', end='')
+
+            # Update the target estimator periodically
+            if self.train_t % self.update_target_estimator_every == 0:
+                self.q_estimator.update_target_network()
+                print("\nINFO - Copied model parameters to target network.")
+
+    def _publish_weights(self):
+        ''' Copy the weights of the trained Q-network to the acting network
+        '''
+        with self._train_lock:
+            state_dict = deepcopy(self.q_estimator.qnet.state_dict())
+        with self._lock:
+            self.acting_estimator.qnet.load_state_dict(state_dict)
+
+    def stop_learner(self, wait=True):
+        ''' Stop the learner thread of async training, which publishes the weights
+
+        Args:
+            wait (bool): Whether to run the updates still owed for the transitions fed
+        '''
+        if self.learner is not None:
+            self.learner.stop(wait)
 
     def feed_memory(self, state, action, reward, next_state, legal_actions, done):
         ''' Feed transition to memory
@@ -399,6 +542,7 @@ class DQNAgent(object):
         self.device = device
         self.q_estimator.device = device
         self.target_estimator.device = device
+        self.acting_estimator.device = device
 
     def checkpoint_attributes(self):
         '''
@@ -406,11 +550,14 @@ class DQNAgent(object):
         Checkpoint attributes are used to save and restore the model in the middle of training
         Saves the model state dict, optimizer state dict, and all other instance variables
         '''
-        
+        # the learner thread of async training may be updating them
+        with self._train_lock, self._lock:
+            q_estimator = self.q_estimator.checkpoint_attributes()
+            memory = self.memory.checkpoint_attributes()
         return {
             'agent_type': 'DQNAgent',
-            'q_estimator': self.q_estimator.checkpoint_attributes(),
-            'memory': self.memory.checkpoint_attributes(),
+            'q_estimator': q_estimator,
+            'memory': memory,
             'total_t': self.total_t,
             'train_t': self.train_t,
             'replay_memory_init_size': self.replay_memory_init_size,
@@ -424,7 +571,13 @@ class DQNAgent(object):
             'train_every': self.train_every,
             'device': self.device,
             'save_path': self.save_path,
-            'save_every': self.save_every
+            'save_every': self.save_every,
+            'prioritized_replay': self.prioritized_replay,
+            'priority_beta_start': self.priority_beta_start,
+            'priority_beta_steps': self.priority_beta_steps,
+            'async_training': self.async_training,
+            'update_to_data_ratio': self.update_to_data_ratio,
+            'publish_every': self.publish_every,
         }
 
     @classmethod
@@ -454,6 +607,12 @@ class DQNAgent(object):
             device=checkpoint['device'],
             save_path=checkpoint['save_path'],
             save_every=checkpoint['save_every'],
+            prioritized_replay=checkpoint.get('prioritized_replay', False),
+            priority_beta_start=checkpoint.get('priority_beta_start', 0.4),
+            priority_beta_steps=checkpoint.get('priority_beta_steps', 100000),
+            async_training=checkpoint.get('async_training', False),
+            update_to_data_ratio=checkpoint.get('update_to_data_ratio'),
+            publish_every=checkpoint.get('publish_every', 1),
         )
         
         agent_instance.total_t = checkpoint['total_t']
@@ -461,7 +620,13 @@ class DQNAgent(object):
         
         agent_instance.q_estimator = Estimator.from_checkpoint(checkpoint['q_estimator'])
         agent_instance.target_estimator = deepcopy(agent_instance.q_estimator)
-        agent_instance.memory = Memory.from_checkpoint(checkpoint['memory'])
+        agent_instance.acting_estimator = deepcopy(agent_instance.q_estimator) if agent_instance.async_training else agent_instance.q_estimator
+        if agent_instance.prioritized_replay:
+            agent_instance.memory = PrioritizedMemory.from_checkpoint(checkpoint['memory'])
+        elif 'memory_dir' in checkpoint['memory']:
+            agent_instance.memory = MemmapMemory.from_checkpoint(checkpoint['memory'])
+        else:
+            agent_instance.memory = Memory.from_checkpoint(checkpoint['memory'])
 
         return agent_instance
                      
@@ -509,15 +674,17 @@ class Estimator:
             q_values = self.qnet(states_tensor).cpu().numpy()
         return q_values
 
-    def update(self, states, actions, targets):
+    def update(self, states, actions, targets, weights=None):
         """
         Update the Q-network using the given targets.
         Args:
             states (np.ndarray): Batch of states.
             actions (np.ndarray): Batch of actions.
             targets (np.ndarray): Batch of target Q-values.
+            weights (np.ndarray): Importance-sampling weights of the squared errors, if any.
         Returns:
             float: Loss for the current update.
+            np.ndarray: TD errors of the batch, before the update.
         """
         self.qnet.train()
         states_tensor = torch.tensor(states, dtype=torch.float32).to(self.device)
@@ -529,14 +696,19 @@ class Estimator:
         q_values = q_values.gather(1, actions_tensor.unsqueeze(-1)).squeeze(-1)
 
         # Compute loss
-        loss = self.loss_fn(q_values, targets_tensor)
+        if weights is None:
+            loss = self.loss_fn(q_values, targets_tensor)
+        else:
+            weights_tensor = torch.as_tensor(weights, dtype=torch.float32).to(self.device)
+            loss = (weights_tensor * (q_values - targets_tensor) ** 2).mean()
 
         # Perform optimization
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
 
-        return loss.item()
+        td_errors = (targets_tensor - q_values).detach().cpu().numpy()
+        return loss.item(), td_errors
 
     def update_target_network(self):
         """
@@ -613,20 +785,47 @@ class EstimatorNetwork(nn.Module):
         return self.fc_layers(s)
 
 class Memory(object):
-    ''' Memory for saving transitions
+    ''' Memory for saving transitions, in preallocated arrays used as a ring buffer
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, num_actions, obs_dtype=None):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions, for the legal action bitmasks
+            obs_dtype (numpy.dtype): the dtype to store the states, float32 for
+                float states and the state dtype otherwise if not given
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
-        self.memory = []
+        self.num_actions = num_actions
+        self.obs_dtype = obs_dtype
+        self.size = 0
+        self.next_index = 0
+        # The arrays are allocated with the first transition, which gives the state shape
+        self.states = None
+        self.next_states = None
+        self.actions = np.zeros(memory_size, dtype=np.int64)
+        self.rewards = np.zeros(memory_size, dtype=np.float32)
+        self.dones = np.zeros(memory_size, dtype=bool)
+        self.legal_actions = np.zeros((memory_size, (num_actions + 7) // 8), dtype=np.uint8)
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, state):
+        ''' Allocate the state arrays for states like the given one
+        '''
+        state = np.asarray(state)
+        obs_dtype = self.obs_dtype
+        if obs_dtype is None:
+            obs_dtype = np.float32 if np.issubdtype(state.dtype, np.floating) else state.dtype
+        self.states = np.zeros((self.memory_size,) + state.shape, dtype=obs_dtype)
+        self.next_states = np.zeros((self.memory_size,) + state.shape, dtype=obs_dtype)
 
     def save(self, state, action, reward, next_state, legal_actions, done):
-        ''' Save transition into memory
+        ''' Save transition into memory, over the oldest one once the memory is full
 
         Args:
             state (numpy.array): the current state
@@ -636,47 +835,413 @@ class Memory(object):
             legal_actions (list): the legal actions of the next state
             done (boolean): whether the episode is finished
         '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, done, legal_actions)
-        self.memory.append(transition)
+        if self.memory_size == 0:
+            return
+        if self.states is None:
+            self._allocate(state)
+        index = self.next_index
+        self.states[index] = state
+        self.next_states[index] = next_state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = done
+        legal_mask = np.zeros(self.num_actions, dtype=bool)
+        legal_mask[list(legal_actions)] = True
+        self.legal_actions[index] = np.packbits(legal_mask, bitorder='little')
+        self.next_index = (index + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
 
     def sample(self):
         ''' Sample a minibatch from the replay memory
 
         Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            done_batch (numpy.array): a batch of dones
+            legal_actions_batch (numpy.array): (batch_size, num_actions) masks
+                of the legal actions of the next states
         '''
-        samples = random.sample(self.memory, self.batch_size)
-        samples = tuple(zip(*samples))
-        return tuple(map(np.array, samples[:-1])) + (samples[-1],)
+        indices = np.array(random.sample(range(self.size), self.batch_size), dtype=np.int64)
+        return self.get_batch(indices)
+
+    def get_batch(self, indices):
+        ''' Gather the transitions at some indices of the memory, see sample
+        '''
+        legal_actions = np.unpackbits(self.legal_actions[indices], axis=1, count=self.num_actions, bitorder='little')
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices], legal_actions.astype(bool))
 
     def checkpoint_attributes(self):
-        ''' Returns the attributes that need to be checkpointed
+        ''' Returns the attributes that need to be checkpointed. The arrays
+            are saved as tensors, up to the size of the memory
         '''
-        
+        arrays = {}
+        for name in ['states', 'next_states', 'actions', 'rewards', 'dones', 'legal_actions']:
+            array = getattr(self, name)
+            arrays[name] = torch.from_numpy(array[:self.size].copy()) if array is not None else None
         return {
             'memory_size': self.memory_size,
             'batch_size': self.batch_size,
-            'memory': self.memory
+            'num_actions': self.num_actions,
+            'obs_dtype': None if self.obs_dtype is None else np.dtype(self.obs_dtype).str,
+            'size': self.size,
+            'next_index': self.next_index,
+            'arrays': arrays,
         }
-            
+
     @classmethod
     def from_checkpoint(cls, checkpoint):
-        ''' 
+        '''
         Restores the attributes from the checkpoint
-        
+
         Args:
             checkpoint (dict): the checkpoint dictionary
-            
+
         Returns:
             instance (Memory): the restored instance
         '''
-        
-        instance = cls(checkpoint['memory_size'], checkpoint['batch_size'])
-        instance.memory = checkpoint['memory']
+
+        instance = cls(checkpoint['memory_size'], checkpoint['batch_size'], checkpoint['num_actions'], checkpoint['obs_dtype'])
+        size = checkpoint['size']
+        instance.size = size
+        instance.next_index = checkpoint['next_index']
+        arrays = checkpoint['arrays']
+        if arrays['states'] is not None:
+            states = arrays['states'].numpy()
+            instance.states = np.zeros((instance.memory_size,) + states.shape[1:], dtype=states.dtype)
+            instance.next_states = np.zeros_like(instance.states)
+        for name in ['states', 'next_states', 'actions', 'rewards', 'dones', 'legal_actions']:
+            if arrays[name] is not None:
+                getattr(instance, name)[:size] = arrays[name].numpy()
         return instance
+
+
+class SumTree(object):
+    ''' A binary tree of priorities in one array, where each node holds the sum
+        of its children. Leaf i is at tree[capacity + i] and the root at tree[1].
+    '''
+
+    def __init__(self, size):
+        ''' Initialize
+
+        Args:
+            size (int): the number of leaves, rounded up to a power of 2
+        '''
+        self.depth = max(int(np.ceil(np.log2(max(size, 1)))), 0)
+        self.capacity = 1 << self.depth
+        self.tree = np.zeros(2 * self.capacity)
+
+    def total(self):
+        ''' Returns the sum of all priorities
+        '''
+        return self.tree[1]
+
+    def get(self, indices):
+        ''' Returns the priorities at some indices
+        '''
+        return self.tree[self.capacity + np.asarray(indices)]
+
+    def set(self, index, priority):
+        ''' Set one priority, adding the change to its ancestors in O(log N)
+        '''
+        node = self.capacity + index
+        path = node >> np.arange(self.depth + 1)
+        self.tree[path] += priority - self.tree[node]
+
+    def set_batch(self, indices, priorities):
+        ''' Set a batch of priorities, adding the changes to all their ancestors
+            at once in O(batch_size log N). Repeated indices keep the last priority.
+        '''
+        nodes = self.capacity + np.asarray(indices, dtype=np.int64)
+        priorities = np.broadcast_to(np.asarray(priorities, dtype=np.float64), nodes.shape)
+        # keep the last of the repeated indices
+        nodes, last = np.unique(nodes[::-1], return_index=True)
+        deltas = priorities[::-1][last] - self.tree[nodes]
+        paths = nodes[:, None] >> np.arange(self.depth + 1)
+        np.add.at(self.tree, paths.ravel(), np.repeat(deltas, self.depth + 1))
+
+    def find(self, values):
+        ''' Find the leaves where some prefix sums fall, descending one level at a time
+
+        Args:
+            values (numpy.array): values in [0, total)
+
+        Returns:
+            (numpy.array): the indices of the leaves
+        '''
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        for _ in range(self.depth):
+            nodes *= 2
+            left_sums = self.tree[nodes]
+            go_right = values >= left_sums
+            values -= left_sums * go_right
+            nodes += go_right
+        return nodes - self.capacity
+
+
+class PrioritizedMemory(Memory):
+    ''' Memory that samples transitions in proportion to their priority, which is
+        their last absolute TD error to the power alpha, with a SumTree
+    '''
+
+    def __init__(self, memory_size, batch_size, num_actions, obs_dtype=None, alpha=0.6, epsilon=1e-6):
+        ''' Initialize
+        Args:
+            memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions, for the legal action bitmasks
+            obs_dtype (numpy.dtype): the dtype to store the states, see Memory
+            alpha (float): how much the priorities count, 0 for uniform sampling
+            epsilon (float): added to the TD errors so that no priority is 0
+        '''
+        super().__init__(memory_size, batch_size, num_actions, obs_dtype)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.sum_tree = SumTree(memory_size)
+        self.max_priority = 1.0
+
+    def save(self, state, action, reward, next_state, legal_actions, done):
+        ''' Save transition into memory with the highest priority so far, so that
+            it is sampled at least once. See Memory.save
+        '''
+        if self.memory_size == 0:
+            return
+        index = self.next_index
+        super().save(state, action, reward, next_state, legal_actions, done)
+        self.sum_tree.set(index, self.max_priority)
+
+    def sample(self, beta=0.4):
+        ''' Sample a minibatch in proportion to the priorities, with one sample
+            from each of batch_size equal slices of the total priority
+
+        Args:
+            beta (float): the exponent of the importance-sampling weights,
+                from 0 for no correction to 1 for full correction
+
+        Returns:
+            the batch of Memory.sample, then
+            indices (numpy.array): the indices of the transitions, for update_priorities
+            weights (numpy.array): the importance-sampling weights, at most 1
+        '''
+        total = self.sum_tree.total()
+        bounds = np.arange(self.batch_size) * (total / self.batch_size)
+        values = bounds + np.random.random_sample(self.batch_size) * (total / self.batch_size)
+        indices = np.minimum(self.sum_tree.find(values), self.size - 1)
+        probs = np.maximum(self.sum_tree.get(indices), 1e-12) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return self.get_batch(indices) + (indices, weights.astype(np.float32))
+
+    def update_priorities(self, indices, td_errors):
+        ''' Set the priorities of sampled transitions from their TD errors
+
+        Args:
+            indices (numpy.array): the indices from sample
+            td_errors (numpy.array): the TD errors of the transitions
+        '''
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.sum_tree.set_batch(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def checkpoint_attributes(self):
+        ''' Returns the attributes that need to be checkpointed, see Memory
+        '''
+        attributes = super().checkpoint_attributes()
+        attributes['alpha'] = self.alpha
+        attributes['epsilon'] = self.epsilon
+        attributes['max_priority'] = self.max_priority
+        attributes['priorities'] = torch.from_numpy(self.sum_tree.get(np.arange(self.size)))
+        return attributes
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        '''
+        Restores the attributes from the checkpoint
+
+        Args:
+            checkpoint (dict): the checkpoint dictionary
+
+        Returns:
+            instance (PrioritizedMemory): the restored instance
+        '''
+        instance = super().from_checkpoint(checkpoint)
+        instance.alpha = checkpoint['alpha']
+        instance.epsilon = checkpoint['epsilon']
+        instance.max_priority = checkpoint['max_priority']
+        instance.sum_tree.set_batch(np.arange(instance.size), checkpoint['priorities'].numpy())
+        return instance
+
+
+class MemmapMemory(Memory):
+    ''' Memory whose arrays are memory-mapped .npy files in a directory, for replay
+        memories larger than the RAM. Binary states can be bit-packed, 8 values
+        per byte. A memory is reopened from its directory if the files exist, so that
+        it survives a restart of the training.
+    '''
+
+    ARRAY_NAMES = ['states', 'next_states', 'actions', 'rewards', 'dones', 'legal_actions']
+
+    def __init__(self, memory_size, batch_size, num_actions, memory_dir, obs_dtype=None, pack_bits=False, flush_every=10000):
+        ''' Initialize
+        Args:
+            memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled batches
+            num_actions (int): the number of actions, for the legal action bitmasks
+            memory_dir (str): the directory of the files
+            obs_dtype (numpy.dtype): the dtype of the sampled states, see Memory
+            pack_bits (bool): whether to bit-pack the states, for environments whose
+                states only ever hold 0s and 1s. A memory reopened from its files
+                keeps the setting it was created with
+            flush_every (int): write the arrays and the size of the memory to the
+                files every X transitions, so that a restart loses at most X
+        '''
+        super().__init__(memory_size, batch_size, num_actions, obs_dtype)
+        self.memory_dir = memory_dir
+        self.pack_bits = pack_bits
+        self.flush_every = flush_every
+        self.obs_shape = None
+        os.makedirs(memory_dir, exist_ok=True)
+        if os.path.exists(os.path.join(memory_dir, 'memory.json')):
+            self._open()
+        else:
+            for name in ['actions', 'rewards', 'dones', 'legal_actions']:
+                array = getattr(self, name)
+                setattr(self, name, self._open_array(name, 'w+', array.dtype, array.shape))
+
+    def _open_array(self, name, mode, dtype=None, shape=None):
+        ''' Open or create the memory-mapped file of an array
+        '''
+        path = os.path.join(self.memory_dir, name + '.npy')
+        return np.lib.format.open_memmap(path, mode=mode, dtype=dtype, shape=shape)
+
+    def _open(self):
+        ''' Reopen the files of a memory saved in the directory
+        '''
+        with open(os.path.join(self.memory_dir, 'memory.json')) as f:
+            meta = json.load(f)
+        if meta['memory_size'] != self.memory_size or meta['num_actions'] != self.num_actions:
+            raise ValueError('MemmapMemory: {} holds a memory of size {} for {} actions, not {} for {}'.format(
+                self.memory_dir, meta['memory_size'], meta['num_actions'], self.memory_size, self.num_actions))
+        self.size = meta['size']
+        self.next_index = meta['next_index']
+        self.pack_bits = meta['pack_bits']
+        self.obs_dtype = meta['obs_dtype']
+        self.obs_shape = None if meta['obs_shape'] is None else tuple(meta['obs_shape'])
+        for name in self.ARRAY_NAMES:
+            if self.obs_shape is not None or name not in ['states', 'next_states']:
+                setattr(self, name, self._open_array(name, 'r+'))
+
+    def _allocate(self, state):
+        ''' Create the state files for states like the given one
+        '''
+        state = np.asarray(state)
+        self.obs_shape = state.shape
+        if self.obs_dtype is None:
+            self.obs_dtype = np.float32 if np.issubdtype(state.dtype, np.floating) else state.dtype
+        self.obs_dtype = np.dtype(self.obs_dtype).str
+        if self.pack_bits:
+            shape, dtype = (self.memory_size, (state.size + 7) // 8), np.uint8
+        else:
+            shape, dtype = (self.memory_size,) + state.shape, self.obs_dtype
+        self.states = self._open_array('states', 'w+', dtype, shape)
+        self.next_states = self._open_array('next_states', 'w+', dtype, shape)
+        self.flush()
+
+    def _pack(self, state):
+        ''' Pack a binary state into bytes
+        '''
+        state = np.asarray(state).ravel()
+        if not ((state == 0) | (state == 1)).all():
+            raise ValueError('MemmapMemory: the states are bit-packed but a state is not binary, use pack_bits=False')
+        return np.packbits(state.astype(np.uint8), bitorder='little')
+
+    def _unpack(self, packed):
+        ''' Unpack a batch of packed states
+        '''
+        states = np.unpackbits(packed, axis=1, count=int(np.prod(self.obs_shape)), bitorder='little')
+        return states.astype(self.obs_dtype).reshape((len(packed),) + self.obs_shape)
+
+    def save(self, state, action, reward, next_state, legal_actions, done):
+        ''' Save transition into memory, see Memory.save
+        '''
+        if self.memory_size == 0:
+            return
+        if self.states is None:
+            self._allocate(state)
+        if self.pack_bits:
+            state, next_state = self._pack(state), self._pack(next_state)
+        super().save(state, action, reward, next_state, legal_actions, done)
+        if self.next_index % self.flush_every == 0:
+            self.flush()
+
+    def sample(self):
+        ''' Sample a minibatch from the replay memory, see Memory.sample. The
+            indices are sorted so that the files are read in order
+        '''
+        indices = np.array(random.sample(range(self.size), self.batch_size), dtype=np.int64)
+        indices.sort()
+        return self.get_batch(indices)
+
+    def get_batch(self, indices):
+        ''' Gather the transitions at some indices of the memory, see Memory.sample
+        '''
+        batch = super().get_batch(indices)
+        if not self.pack_bits:
+            return batch
+        return (self._unpack(batch[0]),) + batch[1:3] + (self._unpack(batch[3]),) + batch[4:]
+
+    def flush(self):
+        ''' Write the arrays and the size of the memory to the files
+        '''
+        for name in self.ARRAY_NAMES:
+            array = getattr(self, name)
+            if array is not None:
+                array.flush()
+        meta = {
+            'memory_size': self.memory_size,
+            'num_actions': self.num_actions,
+            'size': self.size,
+            'next_index': self.next_index,
+            'pack_bits': self.pack_bits,
+            'obs_dtype': self.obs_dtype,
+            'obs_shape': None if self.obs_shape is None else list(self.obs_shape),
+        }
+        # replace the file at once, so that a crash never leaves half of it
+        path = os.path.join(self.memory_dir, 'memory.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def checkpoint_attributes(self):
+        ''' Returns the attributes that need to be checkpointed. The arrays stay
+            in the files, which are flushed
+        '''
+        self.flush()
+        return {
+            'memory_size': self.memory_size,
+            'batch_size': self.batch_size,
+            'num_actions': self.num_actions,
+            'memory_dir': self.memory_dir,
+            'pack_bits': self.pack_bits,
+            'flush_every': self.flush_every,
+            'size': self.size,
+            'next_index': self.next_index,
+        }
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        '''
+        Restores the memory by reopening its files
+
+        Args:
+            checkpoint (dict): the checkpoint dictionary
+
+        Returns:
+            instance (MemmapMemory): the restored instance
+        '''
+        return cls(checkpoint['memory_size'], checkpoint['batch_size'], checkpoint['num_actions'],
+                   checkpoint['memory_dir'], pack_bits=checkpoint.get('pack_bits', False),
+                   flush_every=checkpoint['flush_every'])
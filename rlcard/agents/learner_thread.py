@@ -0,0 +1,92 @@
+''' A thread that runs the updates of an agent in the background, so that
+    acting in the environment and learning overlap
+'''
+
+import threading
+
+
+class LearnerThread(threading.Thread):
+    ''' Runs updates in the background, at a fixed ratio of updates to the data
+        fed by the acting thread.
+
+    The acting thread counts its data with add_data, holding the lock of the
+    buffer. The learner samples a batch with the lock held and updates the
+    model without it, then publishes the weights to the acting network every
+    publish_every updates.
+    '''
+
+    def __init__(self, sample, update, lock, update_to_data_ratio=1.0, publish=None, publish_every=1):
+        ''' Initialize the learner thread, which is started at once
+
+        Args:
+            sample (callable): Sample a batch from the buffer, called with the lock held
+            update (callable): Update the model on a batch
+            lock (threading.RLock): The lock of the buffer
+            update_to_data_ratio (float): The number of updates per data added
+            publish (callable): Copy the weights to the acting network
+            publish_every (int): Publish the weights every X updates
+        '''
+        super().__init__(daemon=True)
+        self.sample = sample
+        self.update = update
+        self.condition = threading.Condition(lock)
+        self.update_to_data_ratio = update_to_data_ratio
+        self.publish = publish
+        self.publish_every = publish_every
+        self.num_data = 0
+        self.num_updates = 0
+        self.error = None
+        self._stopping = False
+        self._drain = True
+        self.start()
+
+    def get_num_updates_due(self):
+        ''' Get the number of updates owed for the data added so far
+        '''
+        return int(self.num_data * self.update_to_data_ratio)
+
+    def add_data(self, num_data=1):
+        ''' Count new data in the buffer. Call it with the lock held.
+
+        Raises:
+            RuntimeError: If the learner failed, with the error as the cause
+        '''
+        if self.error is not None:
+            raise RuntimeError('LearnerThread: the learner failed') from self.error
+        self.num_data += num_data
+        self.condition.notify()
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    while not self._stopping and self.num_updates >= self.get_num_updates_due():
+                        self.condition.wait()
+                    if self._stopping and (not self._drain or self.num_updates >= self.get_num_updates_due()):
+                        break
+                    batch = self.sample()
+                self.update(batch)
+                self.num_updates += 1
+                if self.publish is not None and self.num_updates % self.publish_every == 0:
+                    self.publish()
+            if self.publish is not None:
+                self.publish()
+        except Exception as error:
+            self.error = error
+
+    def stop(self, wait=True):
+        ''' Stop the learner and publish the weights
+
+        Args:
+            wait (bool): Whether to run the updates still owed first
+
+        Raises:
+            RuntimeError: If the learner failed, with the error as the cause
+        '''
+        with self.condition:
+            self._stopping = True
+            self._drain = wait
+            self.condition.notify()
+        self.join()
+        if self.error is not None:
+            raise RuntimeError('LearnerThread: the learner failed') from self.error
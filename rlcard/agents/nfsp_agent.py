@@ -21,6 +21,7 @@ See the paper https://arxiv.org/abs/1603.01121 for more details.
 
 import os
 import random
+import threading
 import collections
 import enum
 import numpy as np
@@ -28,8 +29,11 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from copy import deepcopy
+
 from rlcard.agents.dqn_agent import DQNAgent
-from rlcard.utils.utils import remove_illegal
+from rlcard.agents.learner_thread import LearnerThread
+from rlcard.utils.utils import remove_illegal, remove_illegal_batch, sample_actions
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
 
@@ -62,10 +66,16 @@ class NFSPAgent(object):
                  q_batch_size=32,
                  q_train_every=1,
                  q_mlp_layers=None,
+                 q_replay_memory_dir=None,
+                 q_replay_memory_pack_bits=False,
                  evaluate_with='average_policy',
                  device=None,
                  save_path=None,
-                 save_every=float('inf')):
+                 save_every=float('inf'),
+                 async_training=False,
+                 sl_update_to_data_ratio=None,
+                 q_update_to_data_ratio=None,
+                 publish_every=1):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -91,7 +101,21 @@ class NFSPAgent(object):
             q_batch_size (int): The batch size of inner DQN agent.
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
+            q_replay_memory_dir (str): If given, keep the memory of inner DQN agent in
+              memory-mapped files in this directory, see dqn_agent.MemmapMemory.
+            q_replay_memory_pack_bits (bool): Whether to bit-pack the states in those
+              files, for environments whose states are all 0s and 1s.
             device (torch.device): Whether to use the cpu or gpu
+            async_training (bool): Whether to train the average policy and the inner
+              DQN agent in background threads, see DQNAgent. feed only adds the data,
+              and the agent acts with copies of the networks that the learners
+              update every publish_every updates.
+            sl_update_to_data_ratio (float): The number of average policy updates per
+              step fed in async training, 1 / train_every if not given.
+            q_update_to_data_ratio (float): The number of updates of inner DQN agent per
+              transition fed in async training, 1 / q_train_every if not given.
+            publish_every (int): Copy the weights to the acting networks every X updates
+              in async training.
         '''
         self.use_raw = False
         self._num_actions = num_actions
@@ -104,6 +128,7 @@ class NFSPAgent(object):
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
 
         self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._episode_transitions = []
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -123,7 +148,9 @@ class NFSPAgent(object):
         self._rl_agent = DQNAgent(q_replay_memory_size, q_replay_memory_init_size, \
             q_update_target_estimator_every, q_discount_factor, q_epsilon_start, q_epsilon_end, \
             q_epsilon_decay_steps, q_batch_size, num_actions, state_shape, q_train_every, q_mlp_layers, \
-            rl_learning_rate, device)
+            rl_learning_rate, device, replay_memory_dir=q_replay_memory_dir, replay_memory_pack_bits=q_replay_memory_pack_bits, \
+            async_training=async_training, \
+            update_to_data_ratio=q_update_to_data_ratio, publish_every=publish_every)
 
         # Build the average policy supervised model
         self._build_model()
@@ -134,6 +161,20 @@ class NFSPAgent(object):
         self.save_path = save_path
         self.save_every = save_every
 
+        # The lock of the reservoir buffer, and of the average policy network while it is trained
+        self._lock = threading.RLock()
+        self._train_lock = threading.RLock()
+        self.async_training = async_training
+        self.sl_update_to_data_ratio = 1 / train_every if sl_update_to_data_ratio is None else sl_update_to_data_ratio
+        self.publish_every = publish_every
+        if async_training:
+            self.acting_policy_network = deepcopy(self.policy_network)
+            self._sl_learner = LearnerThread(self._sample_sl_batch, self._train_sl_batch, self._lock,
+                                             self.sl_update_to_data_ratio, self._publish_weights, publish_every)
+        else:
+            self.acting_policy_network = self.policy_network
+            self._sl_learner = None
+
     def _build_model(self):
         ''' Build the average policy network
         '''
@@ -159,6 +200,14 @@ class NFSPAgent(object):
             ts (list): A list of 5 elements that represent the transition.
         '''
         self._rl_agent.feed(ts)
+        if self.async_training:
+            with self._lock:
+                self._flush_transitions()
+                self.total_t += 1
+                if len(self._reservoir_buffer) >= max(self._batch_size, self._min_buffer_size_to_learn):
+                    self._sl_learner.add_data()
+            return
+        self._flush_transitions()
         self.total_t += 1
         if self.total_t>0 and len(self._reservoir_buffer) >= self._min_buffer_size_to_learn and self.total_t%self._train_every == 0:
             sl_loss  = self.train_sl()
@@ -212,6 +261,46 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, info
 
+    def step_batch(self, obs, legal_mask):
+        ''' Returns the actions of a batch of states, as step, with one forward pass
+
+        Args:
+            obs (numpy.array): (batch_size, ...) observations
+            legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+        Returns:
+            actions (numpy.array): (batch_size,) action ids
+        '''
+        if self._mode == 'best_response':
+            actions = self._rl_agent.step_batch(obs, legal_mask)
+            one_hots = np.eye(self._num_actions)[actions]
+            self._episode_transitions.extend(zip(np.array(obs), one_hots))
+        elif self._mode == 'average_policy':
+            probs = remove_illegal_batch(self._act_batch(obs), legal_mask)
+            actions = sample_actions(probs)
+        return actions
+
+    def eval_step_batch(self, obs, legal_mask):
+        ''' Use the average policy for evaluation purpose, as eval_step, with
+            one forward pass for a batch of states
+
+        Args:
+            obs (numpy.array): (batch_size, ...) observations
+            legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+        Returns:
+            actions (numpy.array): (batch_size,) action ids
+            info (dict): 'probs', the (batch_size, num_actions) action probabilities
+                of the average policy, or the info of DQNAgent.eval_step_batch
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.eval_step_batch(obs, legal_mask)
+        elif self.evaluate_with == 'average_policy':
+            probs = remove_illegal_batch(self._act_batch(obs), legal_mask)
+            return sample_actions(probs), {'probs': probs}
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -232,15 +321,32 @@ class NFSPAgent(object):
         info_state = np.expand_dims(info_state, axis=0)
         info_state = torch.from_numpy(info_state).float().to(self.device)
 
-        with torch.no_grad():
-            log_action_probs = self.policy_network(info_state).cpu().numpy()
+        with self._lock, torch.no_grad():
+            log_action_probs = self.acting_policy_network(info_state).cpu().numpy()
 
         action_probs = np.exp(log_action_probs)[0]
 
         return action_probs
 
+    def _act_batch(self, info_states):
+        ''' Predict the action probabilities of a batch of observations
+
+        Args:
+            info_states (numpy.array): (batch_size, ...) obervations.
+
+        Returns:
+            action_probs (numpy.array): (batch_size, num_actions) action probabilities.
+        '''
+        info_states = torch.from_numpy(np.asarray(info_states)).float().to(self.device)
+
+        with self._lock, torch.no_grad():
+            log_action_probs = self.acting_policy_network(info_states).cpu().numpy()
+
+        return np.exp(log_action_probs)
+
     def _add_transition(self, state, probs):
-        ''' Adds the new transition to the reservoir buffer.
+        ''' Adds the new transition to the transitions of the episode, which
+            are added to the reservoir buffer at once when the agent is fed.
 
         Transitions are in the form (state, probs).
 
@@ -248,10 +354,15 @@ class NFSPAgent(object):
             state (numpy.array): The state.
             probs (numpy.array): The probabilities of each action.
         '''
-        transition = Transition(
-                info_state=state,
-                action_probs=probs)
-        self._reservoir_buffer.add(transition)
+        self._episode_transitions.append((state, probs))
+
+    def _flush_transitions(self):
+        ''' Adds the transitions of the episode to the reservoir buffer.
+        '''
+        if self._episode_transitions:
+            info_states, action_probs = zip(*self._episode_transitions)
+            self._reservoir_buffer.add_many(np.array(info_states), np.array(action_probs))
+            self._episode_transitions = []
 
     def train_sl(self):
         ''' Compute the loss on sampled transitions and perform a avg-network update.
@@ -262,34 +373,50 @@ class NFSPAgent(object):
         Returns:
             loss (float): The average loss obtained on this batch of transitions or `None`.
         '''
-        if (len(self._reservoir_buffer) < self._batch_size or
-                len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
-            return None
+        with self._lock:
+            self._flush_transitions()
+            if (len(self._reservoir_buffer) < self._batch_size or
+                    len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
+                return None
+            batch = self._sample_sl_batch()
+        return self._train_sl_batch(batch)
+
+    def _sample_sl_batch(self):
+        ''' Sample a batch from the reservoir buffer, with the lock held
+        '''
+        return self._reservoir_buffer.sample(self._batch_size)
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+    def _train_sl_batch(self, batch):
+        ''' Perform one avg-network update on a sampled batch
 
-        self.policy_network_optimizer.zero_grad()
-        self.policy_network.train()
+        Args:
+            batch (tuple): The info states and the action probabilities
 
-        # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
+        Returns:
+            loss (float): The average loss obtained on the batch.
+        '''
+        info_states, action_probs = batch
+        with self._train_lock:
+            self.policy_network_optimizer.zero_grad()
+            self.policy_network.train()
 
-        # (batch, num_actions)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
+            # (batch, state_size)
+            info_states = torch.from_numpy(info_states).float().to(self.device)
 
-        # (batch, num_actions)
-        log_forecast_action_probs = self.policy_network(info_states)
+            # (batch, num_actions)
+            eval_action_probs = torch.from_numpy(action_probs).to(self.device)
 
-        ce_loss = - (eval_action_probs * log_forecast_action_probs).sum(dim=-1).mean()
-        ce_loss.backward()
+            # (batch, num_actions)
+            log_forecast_action_probs = self.policy_network(info_states)
 
-        self.policy_network_optimizer.step()
-        ce_loss = ce_loss.item()
-        self.policy_network.eval()
+            ce_loss = - (eval_action_probs * log_forecast_action_probs).sum(dim=-1).mean()
+            ce_loss.backward()
 
-        self.train_t += 1
+            self.policy_network_optimizer.step()
+            ce_loss = ce_loss.item()
+            self.policy_network.eval()
+
+            self.train_t += 1
 
         if self.save_path and self.train_t % self.save_every == 0:
             # To preserve every checkpoint separately, 
@@ -299,6 +426,24 @@ class NFSPAgent(object):
 
         return ce_loss
 
+    def _publish_weights(self):
+        ''' Copy the weights of the trained average policy network to the acting network
+        '''
+        with self._train_lock:
+            state_dict = deepcopy(self.policy_network.state_dict())
+        with self._lock:
+            self.acting_policy_network.load_state_dict(state_dict)
+
+    def stop_learner(self, wait=True):
+        ''' Stop the learner threads of async training, which publish the weights
+
+        Args:
+            wait (bool): Whether to run the updates still owed for the data fed
+        '''
+        if self._sl_learner is not None:
+            self._sl_learner.stop(wait)
+        self._rl_agent.stop_learner(wait)
+
     def set_device(self, device):
         self.device = device
         self._rl_agent.set_device(device)
@@ -309,13 +454,18 @@ class NFSPAgent(object):
         Checkpoint attributes are used to save and restore the model in the middle of training
         Saves the model state dict, optimizer state dict, and all other instance variables
         '''
-        
+        # the learner thread of async training may be updating them
+        with self._train_lock, self._lock:
+            self._flush_transitions()
+            policy_network = self.policy_network.checkpoint_attributes()
+            reservoir_buffer = self._reservoir_buffer.checkpoint_attributes()
+            policy_network_optimizer = deepcopy(self.policy_network_optimizer.state_dict())
         return {
             'agent_type': 'NFSPAgent',
-            'policy_network': self.policy_network.checkpoint_attributes(),
-            'reservoir_buffer': self._reservoir_buffer.checkpoint_attributes(),
+            'policy_network': policy_network,
+            'reservoir_buffer': reservoir_buffer,
             'rl_agent': self._rl_agent.checkpoint_attributes(),
-            'policy_network_optimizer': self.policy_network_optimizer.state_dict(),
+            'policy_network_optimizer': policy_network_optimizer,
             'device': self.device,
             'anticipatory_param': self._anticipatory_param,
             'batch_size': self._batch_size,
@@ -327,6 +477,9 @@ class NFSPAgent(object):
             'train_t': self.train_t,
             'sl_learning_rate': self._sl_learning_rate,
             'train_every': self._train_every,
+            'async_training': self.async_training,
+            'sl_update_to_data_ratio': self.sl_update_to_data_ratio,
+            'publish_every': self.publish_every,
         }
     
     @classmethod
@@ -348,8 +501,15 @@ class NFSPAgent(object):
             evaluate_with=checkpoint['evaluate_with'],
             device=checkpoint['device'],
             q_mlp_layers=checkpoint['rl_agent']['q_estimator']['mlp_layers'],
+            q_replay_memory_size=checkpoint['rl_agent']['memory']['memory_size'],
+            q_replay_memory_dir=checkpoint['rl_agent']['memory'].get('memory_dir'),
+            q_replay_memory_pack_bits=checkpoint['rl_agent']['memory'].get('pack_bits', False),
             state_shape=checkpoint['rl_agent']['q_estimator']['state_shape'],
             hidden_layers_sizes=[],
+            async_training=checkpoint.get('async_training', False),
+            sl_update_to_data_ratio=checkpoint.get('sl_update_to_data_ratio'),
+            q_update_to_data_ratio=checkpoint['rl_agent'].get('update_to_data_ratio'),
+            publish_every=checkpoint.get('publish_every', 1),
         )
         
         agent.policy_network = AveragePolicyNetwork.from_checkpoint(checkpoint['policy_network'])
@@ -359,6 +519,7 @@ class NFSPAgent(object):
         agent.train_t = checkpoint['train_t']
         agent.policy_network.to(agent.device)
         agent.policy_network.eval()
+        agent.acting_policy_network = deepcopy(agent.policy_network) if agent.async_training else agent.policy_network
         agent.policy_network_optimizer = torch.optim.Adam(agent.policy_network.parameters(), lr=agent._sl_learning_rate)
         agent.policy_network_optimizer.load_state_dict(checkpoint['policy_network_optimizer'])
         agent._rl_agent.from_checkpoint(checkpoint['rl_agent'])
@@ -454,8 +615,9 @@ class AveragePolicyNetwork(nn.Module):
 class ReservoirBuffer(object):
     ''' Allows uniform sampling over a stream of data.
 
-    This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
+    The info states and the action probabilities are stored in preallocated
+    (capacity, ...) arrays, allocated with the first element, and batches are
+    gathered by indexing.
 
     See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
     '''
@@ -464,23 +626,75 @@ class ReservoirBuffer(object):
         ''' Initialize the buffer.
         '''
         self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
+        self._info_states = None
+        self._action_probs = None
+        self._size = 0
         self._add_calls = 0
 
+    def _allocate(self, info_state, action_probs):
+        ''' Allocate the arrays for elements like the given one
+        '''
+        info_state = np.asarray(info_state)
+        dtype = np.float32 if np.issubdtype(info_state.dtype, np.floating) else info_state.dtype
+        self._info_states = np.zeros((self._reservoir_buffer_capacity,) + info_state.shape, dtype=dtype)
+        self._action_probs = np.zeros((self._reservoir_buffer_capacity,) + np.shape(action_probs), dtype=np.float32)
+
     def add(self, element):
         ''' Potentially adds `element` to the reservoir buffer.
 
         Args:
-            element (object): data to be added to the reservoir buffer.
+            element (Transition): data to be added to the reservoir buffer.
         '''
-        if len(self._data) < self._reservoir_buffer_capacity:
-            self._data.append(element)
+        if self._reservoir_buffer_capacity == 0:
+            self._add_calls += 1
+            return
+        if self._info_states is None:
+            self._allocate(element.info_state, element.action_probs)
+        if self._size < self._reservoir_buffer_capacity:
+            idx = self._size
+            self._size += 1
         else:
             idx = np.random.randint(0, self._add_calls + 1)
-            if idx < self._reservoir_buffer_capacity:
-                self._data[idx] = element
+        if idx < self._reservoir_buffer_capacity:
+            self._info_states[idx] = element.info_state
+            self._action_probs[idx] = element.action_probs
         self._add_calls += 1
 
+    def add_many(self, info_states, action_probs):
+        ''' Potentially adds many elements at once, as calling `add` on each in turn.
+
+        Args:
+            info_states (numpy.array): (num_elements, ...) info states
+            action_probs (numpy.array): (num_elements, num_actions) action probabilities
+        '''
+        info_states = np.asarray(info_states)
+        action_probs = np.asarray(action_probs)
+        num_elements = len(info_states)
+        if num_elements == 0:
+            return
+        if self._reservoir_buffer_capacity == 0:
+            self._add_calls += num_elements
+            return
+        if self._info_states is None:
+            self._allocate(info_states[0], action_probs[0])
+
+        # Fill the free slots first
+        num_fill = min(num_elements, self._reservoir_buffer_capacity - self._size)
+        self._info_states[self._size:self._size + num_fill] = info_states[:num_fill]
+        self._action_probs[self._size:self._size + num_fill] = action_probs[:num_fill]
+        self._size += num_fill
+
+        # Then the k-th element replaces a random slot with probability capacity / (k + 1)
+        calls = self._add_calls + np.arange(num_fill, num_elements)
+        indices = np.random.randint(0, calls + 1)
+        kept = np.flatnonzero(indices < self._reservoir_buffer_capacity)
+        # Of the elements drawing the same slot, the last one stays
+        slots, last = np.unique(indices[kept][::-1], return_index=True)
+        kept = num_fill + kept[::-1][last]
+        self._info_states[slots] = info_states[kept]
+        self._action_probs[slots] = action_probs[kept]
+        self._add_calls += num_elements
+
     def sample(self, num_samples):
         ''' Returns `num_samples` uniformly sampled from the buffer.
 
@@ -488,39 +702,58 @@ class ReservoirBuffer(object):
             num_samples (int): The number of samples to draw.
 
         Returns:
-            An iterable over `num_samples` random elements of the buffer.
+            info_states (numpy.array): (num_samples, ...) info states
+            action_probs (numpy.array): (num_samples, num_actions) action probabilities
 
         Raises:
             ValueError: If there are less than `num_samples` elements in the buffer
         '''
-        if len(self._data) < num_samples:
+        if self._size < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
-                    num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
+                    num_samples, self._size))
+        indices = np.array(random.sample(range(self._size), num_samples), dtype=np.int64)
+        return self._info_states[indices], self._action_probs[indices]
 
     def clear(self):
         ''' Clear the buffer
         '''
-        self._data = []
+        self._size = 0
         self._add_calls = 0
-        
+
     def checkpoint_attributes(self):
+        ''' Returns the attributes that need to be checkpointed. The arrays
+            are saved as tensors, up to the size of the buffer
+        '''
         return {
-            'data': self._data,
+            'info_states': None if self._info_states is None else torch.from_numpy(self._info_states[:self._size].copy()),
+            'action_probs': None if self._action_probs is None else torch.from_numpy(self._action_probs[:self._size].copy()),
             'add_calls': self._add_calls,
             'reservoir_buffer_capacity': self._reservoir_buffer_capacity,
         }
-        
+
     @classmethod
     def from_checkpoint(cls, checkpoint):
         reservoir_buffer = cls(checkpoint['reservoir_buffer_capacity'])
-        reservoir_buffer._data = checkpoint['data']
+        if 'data' in checkpoint:
+            # a buffer saved as a list of transitions
+            info_states = [t.info_state for t in checkpoint['data']]
+            action_probs = [t.action_probs for t in checkpoint['data']]
+        else:
+            info_states = checkpoint['info_states']
+            action_probs = checkpoint['action_probs']
+        if info_states is not None and len(info_states) > 0:
+            info_states = np.asarray(info_states)
+            action_probs = np.asarray(action_probs)
+            reservoir_buffer._allocate(info_states[0], action_probs[0])
+            reservoir_buffer._size = len(info_states)
+            reservoir_buffer._info_states[:reservoir_buffer._size] = info_states
+            reservoir_buffer._action_probs[:reservoir_buffer._size] = action_probs
         reservoir_buffer._add_calls = checkpoint['add_calls']
         return reservoir_buffer
 
     def __len__(self):
-        return len(self._data)
+        return self._size
 
     def __iter__(self):
-        return iter(self._data)
-
+        for info_state, action_probs in zip(self._info_states[:self._size], self._action_probs[:self._size]):
+            yield Transition(info_state=info_state, action_probs=action_probs)
@@ -41,15 +41,21 @@ from rlcard.games.bridge.utils.move import CallMove, PlayCardMove
 #
 
 
+DEFAULT_GAME_CONFIG = {
+        'game_deal_library': None,
+        }
+
+
 class BridgeEnv(Env):
     ''' Bridge Environment
     '''
     def __init__(self, config):
         self.name = 'bridge'
+        self.default_game_config = DEFAULT_GAME_CONFIG
         self.game = Game()
         super().__init__(config=config)
         self.bridgePayoffDelegate = DefaultBridgePayoffDelegate()
-        self.bridgeStateExtractor = DefaultBridgeStateExtractor()
+        self.bridgeStateExtractor = FastBridgeStateExtractor()
         state_shape_size = self.bridgeStateExtractor.get_state_shape_size()
         self.state_shape = [[1, state_shape_size] for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
@@ -308,3 +314,99 @@ class DefaultBridgeStateExtractor(BridgeStateExtractor):
         extracted_state['raw_legal_actions'] = raw_legal_actions
         extracted_state['raw_obs'] = obs
         return extracted_state
+
+
+class FastBridgeStateExtractor(DefaultBridgeStateExtractor):
+    ''' The state of DefaultBridgeStateExtractor, written into one int8 buffer
+
+    The card planes come from the 52-bit hand masks kept by the players and
+    the bidding from the call action_ids kept by the round. The buffer is
+    reused, and each state gets a copy of it since agents keep the states.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.trick_offset = 4 * 52
+        self.hidden_cards_offset = self.trick_offset + 4 * 52
+        self.vul_offset = self.hidden_cards_offset + 52
+        self.dealer_offset = self.vul_offset + 4
+        self.current_player_offset = self.dealer_offset + 4
+        self.is_bidding_offset = self.current_player_offset + 4
+        self.bidding_offset = self.is_bidding_offset + 1
+        self.last_bid_offset = self.bidding_offset + self.max_bidding_rep_index
+        self.bid_amount_offset = self.last_bid_offset + self.last_bid_rep_size
+        self.trump_suit_offset = self.bid_amount_offset + 8
+        self.buffer = np.zeros(self.get_state_shape_size(), dtype=np.int8)
+
+    def extract_state(self, game: BridgeGame):
+        ''' Extract useful information from state for RL.
+
+        Args:
+            game (BridgeGame): The game
+
+        Returns:
+            (numpy.array): The extracted state
+        '''
+        legal_actions: OrderedDict = self.get_legal_actions(game=game)
+        raw_legal_actions = list(legal_actions.keys())
+        round = game.round
+        players = round.players
+        current_player_id = round.current_player_id
+        is_over = game.is_over()
+        is_bidding_over = round.is_bidding_over()
+        buffer = self.buffer
+        buffer[:] = 0
+
+        # hands, trick cards and hidden cards: 9 planes of 52 cards
+        masks = [0] * 9
+        if not is_over:
+            masks[current_player_id] = players[current_player_id].hand_mask
+            if is_bidding_over:
+                dummy = round.get_dummy()
+                declarer = round.get_declarer()
+                other_known_player = dummy if dummy.player_id != current_player_id else declarer
+                masks[other_known_player.player_id] = other_known_player.hand_mask
+                for move in round.get_trick_moves():
+                    masks[4 + move.player.player_id] |= 1 << move.card.card_id
+                if current_player_id % 2 == declarer.player_id % 2:
+                    hidden_player_ids = [(current_player_id + 1) % 4, (current_player_id + 3) % 4]
+                else:
+                    hidden_player_ids = [declarer.player_id, (current_player_id + 2) % 4]
+                masks[8] = players[hidden_player_ids[0]].hand_mask | players[hidden_player_ids[1]].hand_mask
+            else:
+                for player in players:
+                    if player.player_id != current_player_id:
+                        masks[8] |= player.hand_mask
+        mask_bytes = np.array(masks, dtype='<u8').view(np.uint8)
+        planes = np.unpackbits(mask_bytes, bitorder='little').reshape(9, 64)
+        buffer[:self.vul_offset] = planes[:, :52].reshape(-1)
+
+        buffer[self.vul_offset:self.dealer_offset] = round.tray.vul
+        buffer[self.dealer_offset + round.tray.dealer_id] = 1
+        buffer[self.current_player_offset + current_player_id] = 1
+        buffer[self.is_bidding_offset] = 1 if is_bidding_over else 0
+
+        # no_bid_action_ids at the start so that north always 'starts' the bidding
+        call_action_ids = round.call_action_ids[:self.max_bidding_rep_index - round.dealer_id]
+        start = self.bidding_offset + round.dealer_id
+        buffer[start:start + len(call_action_ids)] = call_action_ids
+
+        last_move = round.move_sheet[-1]
+        if isinstance(last_move, CallMove):
+            buffer[self.last_bid_offset + last_move.action.action_id - ActionEvent.no_bid_action_id] = 1
+
+        if is_bidding_over and not is_over and round.play_card_count == 0:
+            contract_bid_move = round.contract_bid_move
+            if contract_bid_move:
+                buffer[self.bid_amount_offset + contract_bid_move.action.bid_amount] = 1
+                bid_suit = contract_bid_move.action.bid_suit
+                bid_suit_index = 4 if not bid_suit else BridgeCard.suits.index(bid_suit)
+                buffer[self.trump_suit_offset + bid_suit_index] = 1
+
+        obs = buffer.copy()
+        extracted_state = {}
+        extracted_state['obs'] = obs
+        extracted_state['legal_actions'] = legal_actions
+        extracted_state['raw_legal_actions'] = raw_legal_actions
+        extracted_state['raw_obs'] = obs
+        return extracted_state
@@ -28,9 +28,9 @@ class Env(object):
         self.action_recorder = []
 
         # Game specific configurations
-        # Currently only support blackjack、limit-holdem、no-limit-holdem
+        # Currently only support blackjack、limit-holdem、no-limit-holdem、bridge
         # TODO support game configurations for all the games
-        supported_envs = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem']
+        supported_envs = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem', 'bridge']
         if self.name in supported_envs:
             _game_config = self.default_game_config.copy()
             for key in config:
@@ -39,27 +39,24 @@ class GinRummyEnv(Env):
                              unknown cards (likewise)  # is this needed ??? 200213
         '''
         if self.game.is_over():
-            obs = np.array([self._utils.encode_cards([]) for _ in range(5)])
-            extracted_state = {'obs': obs, 'legal_actions': self._get_legal_actions()}
-            extracted_state['raw_legal_actions'] = list(self._get_legal_actions().keys())
+            obs = np.zeros((5, 52), dtype=int)
+            legal_actions = self._get_legal_actions()
+            extracted_state = {'obs': obs, 'legal_actions': legal_actions}
+            extracted_state['raw_legal_actions'] = list(legal_actions.keys())
             extracted_state['raw_obs'] = obs
         else:
-            discard_pile = self.game.round.dealer.discard_pile
-            stock_pile = self.game.round.dealer.stock_pile
-            top_discard = [] if not discard_pile else [discard_pile[-1]]
-            dead_cards = discard_pile[:-1]
+            dealer = self.game.round.dealer
+            discard_pile = dealer.discard_pile
+            top_discard_mask = 0 if not discard_pile else 1 << self._utils.get_card_id(discard_pile[-1])
+            dead_cards_mask = dealer.discard_pile_mask & ~top_discard_mask
             current_player = self.game.get_current_player()
             opponent = self.game.round.players[(current_player.player_id + 1) % 2]
-            known_cards = opponent.known_cards
-            unknown_cards = stock_pile + [card for card in opponent.hand if card not in known_cards]
-            hand_rep = self._utils.encode_cards(current_player.hand)
-            top_discard_rep = self._utils.encode_cards(top_discard)
-            dead_cards_rep = self._utils.encode_cards(dead_cards)
-            known_cards_rep = self._utils.encode_cards(known_cards)
-            unknown_cards_rep = self._utils.encode_cards(unknown_cards)
-            rep = [hand_rep, top_discard_rep, dead_cards_rep, known_cards_rep, unknown_cards_rep]
-            obs = np.array(rep)
-            extracted_state = {'obs': obs, 'legal_actions': self._get_legal_actions(), 'raw_legal_actions': list(self._get_legal_actions().keys())}
+            known_cards_mask = opponent.known_cards_mask
+            unknown_cards_mask = dealer.stock_pile_mask | (opponent.hand_mask & ~known_cards_mask)
+            masks = [current_player.hand_mask, top_discard_mask, dead_cards_mask, known_cards_mask, unknown_cards_mask]
+            obs = self._utils.encode_masks(masks)
+            legal_actions = self._get_legal_actions()
+            extracted_state = {'obs': obs, 'legal_actions': legal_actions, 'raw_legal_actions': list(legal_actions.keys())}
             extracted_state['raw_obs'] = obs
         return extracted_state
 
@@ -4,10 +4,14 @@ from collections import OrderedDict
 from rlcard.envs import Env
 from rlcard.games.mahjong import Game
 from rlcard.games.mahjong import Card
-from rlcard.games.mahjong.utils import card_encoding_dict, encode_cards, pile2list
+from rlcard.games.mahjong.utils import card_encoding_dict, encode_cards, pile2list, cards2counts
+from rlcard.games.mahjong.shanten import get_best_discards, get_effective_tiles, get_visible_counts
 
 class MahjongEnv(Env):
     ''' Mahjong Environment
+
+    Setting 'shanten_features' to True in the config appends two tile
+    efficiency planes to the observation, see _encode_shanten.
     '''
 
     def __init__(self, config):
@@ -16,7 +20,9 @@ class MahjongEnv(Env):
         super().__init__(config)
         self.action_id = card_encoding_dict
         self.de_action_id = {self.action_id[key]: key for key in self.action_id.keys()}
-        self.state_shape = [[6, 34, 4] for _ in range(self.num_players)]
+        self.shanten_features = config.get('shanten_features', False)
+        num_planes = 8 if self.shanten_features else 6
+        self.state_shape = [[num_planes, 34, 4] for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
 
     def _extract_state(self, state):
@@ -41,15 +47,51 @@ class MahjongEnv(Env):
         table_rep = encode_cards(state['table'])
         rep = [hand_rep, table_rep]
         rep.extend(piles_rep)
+        if self.shanten_features:
+            rep.extend(self._encode_shanten(state))
         obs = np.array(rep)
 
         extracted_state = {'obs': obs, 'legal_actions': self._get_legal_actions()}
         extracted_state['raw_obs'] = state
-        extracted_state['raw_legal_actions'] = [a for a in state['action_cards']]
+        if state['valid_act'] == ['play']:
+            extracted_state['raw_legal_actions'] = [a for a in state['action_cards']]
+        else:
+            extracted_state['raw_legal_actions'] = [a for a in state['valid_act']]
         extracted_state['action_record'] = self.action_recorder
 
         return extracted_state
 
+    @staticmethod
+    def _encode_shanten(state):
+        ''' Encode the tile efficiency of the current hand
+
+        Args:
+            state (dict): dict of original state
+
+        Returns:
+            numpy array: 2*34*4 array
+                         plane 0: unseen copies of each effective tile, i.e.,
+                                  a tile that lowers the shanten number when drawn.
+                                  When the player has to discard, this is for the
+                                  best discard with the most effective tiles
+                         plane 1: the discards that keep the lowest shanten number
+        '''
+        planes = np.zeros((2, 34, 4), dtype=int)
+        hand = state['current_hand']
+        counts = cards2counts(hand)
+        num_melds = max(4 - len(state['players_pile'][state['player']]), 0)
+        visible = get_visible_counts(state['table'], state['players_pile'])
+        if len(hand) % 3 == 2:
+            _, best = get_best_discards(counts, num_melds, visible)
+            effective = max(best.values(), key=sum)
+            for tile in best:
+                planes[1][tile] = 1
+        else:
+            _, effective = get_effective_tiles(counts, num_melds, visible)
+        for tile, num in enumerate(effective):
+            planes[0][tile][:num] = 1
+        return planes
+
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
 
@@ -3,7 +3,7 @@ from collections import OrderedDict
 
 from rlcard.envs import Env
 from rlcard.games.uno import Game
-from rlcard.games.uno.utils import encode_hand, encode_target
+from rlcard.games.uno.utils import encode_target
 from rlcard.games.uno.utils import ACTION_SPACE, ACTION_LIST
 from rlcard.games.uno.utils import cards2list
 
@@ -23,7 +23,8 @@ class UnoEnv(Env):
 
     def _extract_state(self, state):
         obs = np.zeros((4, 4, 15), dtype=int)
-        encode_hand(obs[:3], state['hand'])
+        # The hand planes are maintained by the player as cards are drawn and played
+        obs[:3] = self.game.players[state['player_id']].hand_plane
         encode_target(obs[3], state['target'])
         legal_action_id = self._get_legal_actions()
         extracted_state = {'obs': obs, 'legal_actions': legal_action_id}
@@ -0,0 +1,281 @@
+'''
+    File name: blackjack/solver.py
+
+    An exact solver for the hit/stand game played by BlackjackGame: the dealer
+    stands on all 17s, there are no naturals, and a tie pushes.
+
+    Cards are counted by value, 1 (ace) to 10 (ten or face card). A shoe is a
+    tuple of the 10 counts of the cards left, or None for the infinite deck
+    (num_decks=0), where every draw has the same distribution. Hands are kept
+    as (hard, soft), where hard counts aces as 1 and soft tells that an ace
+    can still count as 11.
+
+    The dealer's hole card is unseen, so it is drawn from the shoe like any
+    other card that has not been seen yet. The values are memoized over
+    (hand, shoe) states, so that the hands sharing a shoe share their work.
+'''
+
+from itertools import product
+
+import numpy as np
+
+RANK_VALUES = {'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 10, 'Q': 10, 'K': 10}
+
+# The dealer ends on 17, 18, 19, 20, 21 or busts
+DEALER_OUTCOMES = (17, 18, 19, 20, 21, 22)
+
+# The final dealer hands need no memo
+_FINAL_PROBS = [tuple(float(i == j) for i in range(len(DEALER_OUTCOMES))) for j in range(len(DEALER_OUTCOMES))]
+
+HARD_TOTALS = list(range(4, 22))
+SOFT_TOTALS = list(range(12, 22))
+
+HIT, STAND = 0, 1
+
+
+def get_card_value(card):
+    ''' Get the value of a card, 1 for aces and 10 for tens and face cards
+
+    Args:
+        card (str or Card): A card as in the states of BlackjackGame, such as 'SA', or a Card
+
+    Returns:
+        (int): The value of the card
+    '''
+    if isinstance(card, str):
+        return RANK_VALUES[card[1:]]
+    return RANK_VALUES[card.rank]
+
+
+def get_hand(values):
+    ''' Get the (hard, soft) hand of a list of card values
+    '''
+    hard = sum(values)
+    return hard, 1 in values and hard <= 11
+
+
+def get_score(hard, soft):
+    ''' Get the score of a hand, as BlackjackJudger.judge_score
+    '''
+    return hard + 10 if soft else hard
+
+
+class BlackjackSolver:
+    ''' Exact expected values of hitting and standing in Blackjack
+    '''
+
+    def __init__(self, num_decks=1):
+        ''' Initialize the solver
+
+        Args:
+            num_decks (int): The number of decks in the shoe, 0 for the infinite deck
+        '''
+        self.num_decks = num_decks
+        self._dealer_cache = {}
+        self._stand_cache = {}
+        self._value_cache = {}
+        self._infinite_draws = [(value, (16 if value == 10 else 4) / 52, None) for value in range(1, 11)]
+
+    def get_shoe(self, seen=()):
+        ''' Get the shoe left after some cards are seen
+
+        Args:
+            seen (list): The values of the cards seen
+
+        Returns:
+            (tuple): The counts of the cards of value 1 to 10, None for the infinite deck
+        '''
+        if self.num_decks == 0:
+            return None
+        counts = [4 * self.num_decks] * 9 + [16 * self.num_decks]
+        for value in seen:
+            counts[value - 1] -= 1
+            if counts[value - 1] < 0:
+                raise ValueError('BlackjackSolver: more cards of value {} seen than in the shoe'.format(value))
+        return tuple(counts)
+
+    def _get_draws(self, shoe):
+        ''' Get the cards that can be drawn from a shoe
+
+        Returns:
+            (list): (value, probability, shoe left) of each card value
+        '''
+        if shoe is None:
+            return self._infinite_draws
+        num_cards = sum(shoe)
+        draws = []
+        for index, count in enumerate(shoe):
+            if count > 0:
+                next_shoe = shoe[:index] + (count - 1,) + shoe[index + 1:]
+                draws.append((index + 1, count / num_cards, next_shoe))
+        return draws
+
+    def _get_dealer_probs(self, hard, soft, shoe):
+        ''' Get the probabilities of the dealer outcomes from a dealer hand
+        '''
+        score = get_score(hard, soft)
+        if score >= 17:
+            return _FINAL_PROBS[min(score, 22) - 17]
+        key = (hard, soft, shoe)
+        probs = self._dealer_cache.get(key)
+        if probs is None:
+            p17 = p18 = p19 = p20 = p21 = p_bust = 0.0
+            for value, prob, next_shoe in self._get_draws(shoe):
+                next_hard = hard + value
+                q17, q18, q19, q20, q21, q_bust = self._get_dealer_probs(next_hard, (soft or value == 1) and next_hard <= 11, next_shoe)
+                p17 += prob * q17
+                p18 += prob * q18
+                p19 += prob * q19
+                p20 += prob * q20
+                p21 += prob * q21
+                p_bust += prob * q_bust
+            probs = (p17, p18, p19, p20, p21, p_bust)
+            self._dealer_cache[key] = probs
+        return probs
+
+    def get_dealer_probs(self, up_value, shoe=None):
+        ''' Get the probabilities of the dealer outcomes
+
+        Args:
+            up_value (int): The value of the dealer's up card
+            shoe (tuple): The shoe left, which still holds the hole card
+
+        Returns:
+            (tuple): The probabilities to end on 17, 18, 19, 20, 21 and to bust
+        '''
+        return self._get_dealer_probs(up_value, up_value == 1, shoe)
+
+    def _get_stand_value(self, score, up_value, shoe):
+        ''' Get the expected payoff of standing on a score
+        '''
+        key = (score, up_value, shoe)
+        value = self._stand_cache.get(key)
+        if value is None:
+            probs = self.get_dealer_probs(up_value, shoe)
+            # the dealer busts, or the player wins, ties or loses against a score
+            value = probs[-1]
+            for outcome, prob in zip(DEALER_OUTCOMES[:-1], probs[:-1]):
+                if score > outcome:
+                    value += prob
+                elif score < outcome:
+                    value -= prob
+            self._stand_cache[key] = value
+        return value
+
+    def _get_values(self, hard, soft, up_value, shoe):
+        ''' Get the expected payoffs of hitting and standing, then playing optimally
+        '''
+        key = (hard, soft, up_value, shoe)
+        values = self._value_cache.get(key)
+        if values is None:
+            hit_value = 0.0
+            for value, prob, next_shoe in self._get_draws(shoe):
+                next_hard = hard + value
+                if next_hard > 21:
+                    hit_value -= prob
+                else:
+                    hit_value += prob * max(self._get_values(next_hard, (soft or value == 1) and next_hard <= 11, up_value, next_shoe))
+            values = (hit_value, self._get_stand_value(get_score(hard, soft), up_value, shoe))
+            self._value_cache[key] = values
+        return values
+
+    def get_action_values(self, hand, up_card, seen=()):
+        ''' Get the expected payoffs of hitting and standing on a hand,
+            given the cards seen, and playing optimally afterwards
+
+        Args:
+            hand (list): The player's cards, as values or as in get_card_value
+            up_card (int, str or Card): The dealer's up card
+            seen (list): Other cards seen, such as the other players' hands
+
+        Returns:
+            (tuple): The expected payoffs of hit and stand
+        '''
+        hand = [card if isinstance(card, int) else get_card_value(card) for card in hand]
+        up_value = up_card if isinstance(up_card, int) else get_card_value(up_card)
+        seen = [card if isinstance(card, int) else get_card_value(card) for card in seen]
+        hard, soft = get_hand(hand)
+        if hard > 21:
+            raise ValueError('BlackjackSolver: the hand is bust')
+        shoe = self.get_shoe(hand + [up_value] + seen)
+        return self._get_values(hard, soft, up_value, shoe)
+
+    def get_best_action(self, hand, up_card, seen=()):
+        ''' Get the action with the highest expected payoff, 0 for hit and 1 for stand
+        '''
+        hit_value, stand_value = self.get_action_values(hand, up_card, seen)
+        return HIT if hit_value > stand_value else STAND
+
+    def _get_total_values(self, total, is_soft, up_value):
+        ''' Get the expected payoffs of a total against an up card, averaged over the
+            starting hands of that total with the fewest cards
+        '''
+        up_shoe = self.get_shoe([up_value])
+        for num_cards in range(2, 4):
+            weight_sum, values_sum = 0.0, np.zeros(2)
+            for values in product(range(1, 11), repeat=num_cards):
+                hard, soft = get_hand(values)
+                if get_score(hard, soft) != total or soft != is_soft:
+                    continue
+                # the chance to be dealt these cards in this order
+                weight, shoe = 1.0, up_shoe
+                for value in values:
+                    draw = [draw for draw in self._get_draws(shoe) if draw[0] == value]
+                    if not draw:
+                        weight = 0.0
+                        break
+                    weight *= draw[0][1]
+                    shoe = draw[0][2]
+                if weight > 0:
+                    weight_sum += weight
+                    values_sum += weight * np.array(self._get_values(hard, soft, up_value, shoe))
+            if weight_sum > 0:
+                return values_sum / weight_sum
+        return None
+
+    def get_strategy_table(self):
+        ''' Get the basic strategy, which plays by the player's total and the dealer's up card
+
+        With the infinite deck, the strategy is exact. With a finite shoe, the values
+        of a total are averaged over the starting hands of that total, weighted by the
+        chance to be dealt them; the composition-dependent decisions come from
+        get_best_action.
+
+        Returns:
+            (dict): For 'hard' and 'soft' hands, a dict of
+                'totals': the player's totals, one per row
+                'actions': (num_totals, 10) actions against the up cards A, 2, ..., 10
+                'hit_values': (num_totals, 10) expected payoffs of hitting
+                'stand_values': (num_totals, 10) expected payoffs of standing
+        '''
+        table = {}
+        for name, totals in [('hard', HARD_TOTALS), ('soft', SOFT_TOTALS)]:
+            hit_values = np.zeros((len(totals), 10))
+            stand_values = np.zeros((len(totals), 10))
+            for row, total in enumerate(totals):
+                for up_value in range(1, 11):
+                    hit_values[row, up_value - 1], stand_values[row, up_value - 1] = self._get_total_values(total, name == 'soft', up_value)
+            table[name] = {
+                'totals': totals,
+                'actions': np.where(hit_values > stand_values, HIT, STAND),
+                'hit_values': hit_values,
+                'stand_values': stand_values,
+            }
+        return table
+
+
+def format_strategy_table(table):
+    ''' Format a strategy table as text, with H for hit and S for stand
+
+    Args:
+        table (dict): A table from BlackjackSolver.get_strategy_table
+
+    Returns:
+        (str): The table, one row per total
+    '''
+    lines = []
+    for name in ['hard', 'soft']:
+        lines.append('{:<8}'.format(name) + ' '.join('{:>2}'.format(up) for up in ['A', 2, 3, 4, 5, 6, 7, 8, 9, 10]))
+        for total, actions in zip(table[name]['totals'], table[name]['actions']):
+            lines.append('{:<8}'.format(total) + ' '.join(' H' if action == HIT else ' S' for action in actions))
+    return '\n'.join(lines)
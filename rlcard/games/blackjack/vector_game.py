@@ -0,0 +1,237 @@
+'''
+    File name: blackjack/vector_game.py
+
+    Plays many Blackjack games in lockstep on integer arrays, with the rules
+    and the payoffs of BlackjackGame and BlackjackEnv.
+
+    Cards are kept by value, 1 (ace) to 10 (ten or face card), and hands as
+    their hard total with aces counted as 1 and whether they hold an ace.
+    A finite shoe is kept as the counts of each value left, so drawing a card
+    costs the same for any number of decks.
+'''
+
+import numpy as np
+
+# The number of cards of each value in a deck
+DECK_COUNTS = np.array([4] * 9 + [16], dtype=np.int16)
+
+
+class VectorBlackjackGame:
+    ''' A batch of Blackjack games played in lockstep
+    '''
+
+    def __init__(self, num_games, num_players=1, num_decks=1, np_random=None):
+        ''' Initialize the games
+
+        Args:
+            num_games (int): The number of games to play at once
+            num_players (int): The number of players of each game
+            num_decks (int): The number of decks of each game, 0 for the infinite deck
+            np_random (numpy.random.RandomState): Random state to deal the cards
+        '''
+        self.num_games = num_games
+        self.num_players = num_players
+        self.num_decks = num_decks
+        self.np_random = np_random if np_random is not None else np.random.RandomState()
+
+    def configure(self, game_config):
+        ''' Specifiy some game specific parameters, as BlackjackGame.configure
+        '''
+        self.num_players = game_config['game_num_players']
+        self.num_decks = game_config['game_num_decks']
+
+    def init_game(self):
+        ''' Deal new games, two cards to each player and to the dealer
+
+        Returns:
+            obs (numpy.array): (num_games, 2) observations of the current players, see get_obs
+            current_player (numpy.array): (num_games,) the current player of each game
+        '''
+        shape = (self.num_games, self.num_players)
+        self.hard = np.zeros(shape, dtype=np.int16)
+        self.has_ace = np.zeros(shape, dtype=bool)
+        self.dealer_hard = np.zeros(self.num_games, dtype=np.int16)
+        self.dealer_has_ace = np.zeros(self.num_games, dtype=bool)
+        self.dealer_up = np.zeros(self.num_games, dtype=np.int16)
+        self.counts = np.tile(DECK_COUNTS * self.num_decks, (self.num_games, 1))
+        self.current_player = np.zeros(self.num_games, dtype=np.int64)
+        self.over = np.zeros(self.num_games, dtype=bool)
+        self.payoffs = np.zeros(shape, dtype=np.int8)
+
+        games = np.arange(self.num_games)
+        for i in range(2):
+            for player_id in range(self.num_players):
+                self._deal_to_player(games, np.full(self.num_games, player_id))
+            values = self._draw(games)
+            # The first card of the dealer is the hole card, the second is seen
+            if i == 1:
+                self.dealer_up[:] = values
+            self.dealer_hard += values
+            self.dealer_has_ace |= values == 1
+
+        return self.get_obs(), self.current_player.copy()
+
+    def _draw(self, games):
+        ''' Draw one card in each of some games
+
+        Args:
+            games (numpy.array): The indices of the games
+
+        Returns:
+            (numpy.array): The values of the cards
+        '''
+        if self.num_decks == 0:
+            values = self.np_random.randint(1, 14, size=len(games))
+            return np.minimum(values, 10)
+        counts = self.counts[games]
+        cumulative = counts.cumsum(axis=1, dtype=np.int16)
+        picks = (self.np_random.random_sample(len(games)) * cumulative[:, -1]).astype(np.int16)
+        values = (picks[:, None] < cumulative).argmax(axis=1) + 1
+        self.counts[games, values - 1] -= 1
+        return values
+
+    def _deal_to_player(self, games, player_ids):
+        ''' Deal one card to a player in each of some games
+        '''
+        values = self._draw(games)
+        self.hard[games, player_ids] += values
+        self.has_ace[games, player_ids] |= values == 1
+
+    def get_scores(self):
+        ''' Get the scores of the players' hands, as BlackjackJudger.judge_score
+
+        Returns:
+            (numpy.array): (num_games, num_players) scores
+        '''
+        return np.where(self.has_ace & (self.hard <= 11), self.hard + 10, self.hard)
+
+    def get_dealer_scores(self):
+        ''' Get the scores of the dealers' hands
+
+        Returns:
+            (numpy.array): (num_games,) scores
+        '''
+        return np.where(self.dealer_has_ace & (self.dealer_hard <= 11), self.dealer_hard + 10, self.dealer_hard)
+
+    def get_obs(self):
+        ''' Get the observations of the current players, as BlackjackEnv: the score
+            of the player and the score of the dealer's seen cards. Once a game
+            is over, the dealer's score is of the whole hand.
+
+        Returns:
+            (numpy.array): (num_games, 2) observations
+        '''
+        games = np.arange(self.num_games)
+        player_ids = np.minimum(self.current_player, self.num_players - 1)
+        scores = self.get_scores()[games, player_ids]
+        up_scores = np.where(self.dealer_up == 1, 11, self.dealer_up)
+        dealer_scores = np.where(self.over, self.get_dealer_scores(), up_scores)
+        return np.stack([scores, dealer_scores], axis=1)
+
+    def is_soft(self):
+        ''' Check if the hands of the current players count an ace as 11
+
+        Returns:
+            (numpy.array): (num_games,) booleans
+        '''
+        games = np.arange(self.num_games)
+        player_ids = np.minimum(self.current_player, self.num_players - 1)
+        return self.has_ace[games, player_ids] & (self.hard[games, player_ids] <= 11)
+
+    def step(self, actions):
+        ''' Play one action in each game that is not over
+
+        Args:
+            actions (numpy.array): (num_games,) actions of the current players,
+                0 for hit and 1 for stand as in BlackjackEnv. The actions of
+                the games that are over are ignored.
+
+        Returns:
+            obs (numpy.array): (num_games, 2) observations of the next players
+            current_player (numpy.array): (num_games,) the next player of each game
+        '''
+        actions = np.asarray(actions)
+        hit_games = np.flatnonzero(~self.over & (actions == 0))
+        if len(hit_games) > 0:
+            self._deal_to_player(hit_games, self.current_player[hit_games])
+        hit_bust = np.zeros(self.num_games, dtype=bool)
+        hit_bust[hit_games] = self.hard[hit_games, self.current_player[hit_games]] > 21
+        # A player who stands or busts passes the turn
+        passing = ~self.over & ((actions != 0) | hit_bust)
+        self.current_player[passing] += 1
+
+        finished = np.flatnonzero(passing & (self.current_player >= self.num_players))
+        if len(finished) > 0:
+            self._finish(finished)
+        return self.get_obs(), np.minimum(self.current_player, self.num_players - 1)
+
+    def _finish(self, games):
+        ''' Let the dealer draw to 17, then judge the players of some games
+        '''
+        drawing = games
+        while len(drawing) > 0:
+            scores = self.get_dealer_scores()[drawing]
+            drawing = drawing[scores < 17]
+            if len(drawing) > 0:
+                values = self._draw(drawing)
+                self.dealer_hard[drawing] += values
+                self.dealer_has_ace[drawing] |= values == 1
+
+        scores = self.get_scores()[games]
+        dealer_scores = self.get_dealer_scores()[games, None]
+        payoffs = np.sign(scores - dealer_scores)
+        payoffs[dealer_scores[:, 0] > 21] = 1
+        payoffs[scores > 21] = -1
+        self.payoffs[games] = payoffs
+        self.over[games] = True
+        self.current_player[games] = 0
+
+    def play(self, policy):
+        ''' Deal new games and play them to the end with a tabular policy
+
+        Args:
+            policy (numpy.array): (2, 32, 32) actions indexed by whether the hand
+                is soft, the player's score and the dealer's score, see get_policy_array
+
+        Returns:
+            (numpy.array): (num_games, num_players) payoffs
+        '''
+        obs, _ = self.init_game()
+        while not self.is_over():
+            obs, _ = self.step(policy[self.is_soft().astype(np.int64), obs[:, 0], obs[:, 1]])
+        return self.get_payoffs()
+
+    def is_over(self):
+        ''' Check if all the games are over
+
+        Returns:
+            (bool): True/False
+        '''
+        return bool(self.over.all())
+
+    def get_payoffs(self):
+        ''' Get the payoffs of the games, as BlackjackEnv.get_payoffs
+
+        Returns:
+            (numpy.array): (num_games, num_players) payoffs, 0 for the games that are not over
+        '''
+        return self.payoffs.copy()
+
+
+def get_policy_array(strategy_table):
+    ''' Get a tabular policy for VectorBlackjackGame.play from a strategy table
+
+    Args:
+        strategy_table (dict): A table from BlackjackSolver.get_strategy_table
+
+    Returns:
+        (numpy.array): (2, 32, 32) actions indexed by whether the hand is soft,
+            the player's score and the dealer's score, where an ace counts 11
+    '''
+    policy = np.ones((2, 32, 32), dtype=np.int64)
+    for soft, name in enumerate(['hard', 'soft']):
+        table = strategy_table[name]
+        for total, actions in zip(table['totals'], table['actions']):
+            policy[soft, total, 2:11] = actions[1:]
+            policy[soft, total, 11] = actions[0]
+    return policy
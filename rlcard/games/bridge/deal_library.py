@@ -0,0 +1,166 @@
+'''
+    File name: bridge/deal_library.py
+
+    A deal library is a .npy file of deal records, opened memory-mapped so
+    that many processes replay the same deals while sharing one copy of the
+    file in the page cache.
+
+    Each record holds:
+        1) deck: the shuffled deck as 52 card_ids of 6 bits each, packed into 39 bytes;
+           BridgeDealer deals it from the end, 13 cards to each of N, E, S and W in turn
+        2) board_id: the board number, which fixes the dealer and the vulnerability (see Tray)
+        3) dd_table: the double dummy table (see double_dummy.calc_dd_table),
+           with tricks by strain (C, D, H, S, NT) and declarer (N, E, S, W); -1 if not computed
+'''
+
+import multiprocessing
+from typing import List
+
+import numpy as np
+
+from .double_dummy import calc_dd_table
+from .utils.bridge_card import BridgeCard
+
+DEAL_DTYPE = np.dtype([('deck', np.uint8, (39,)), ('board_id', np.uint8), ('dd_table', np.int8, (5, 4))])
+
+
+def pack_decks(decks: np.ndarray) -> np.ndarray:
+    ''' Pack decks of card_ids into 6 bits per card
+
+    Args:
+        decks (numpy.array): (num_deals, 52) card_ids
+
+    Returns:
+        (numpy.array): (num_deals, 39) packed bytes
+    '''
+    decks = np.asarray(decks, dtype=np.uint8)
+    bits = np.unpackbits(decks[:, :, None], axis=2)[:, :, 2:]
+    return np.packbits(bits.reshape(len(decks), 52 * 6), axis=1)
+
+
+def unpack_decks(packed: np.ndarray) -> np.ndarray:
+    ''' Unpack decks packed by pack_decks
+
+    Args:
+        packed (numpy.array): (num_deals, 39) packed bytes
+
+    Returns:
+        (numpy.array): (num_deals, 52) card_ids
+    '''
+    packed = np.asarray(packed, dtype=np.uint8)
+    bits = np.unpackbits(packed, axis=1).reshape(len(packed), 52, 6)
+    return np.packbits(bits, axis=2)[:, :, 0] >> 2
+
+
+def get_deck_hands(deck) -> List[int]:
+    ''' Get the hands dealt from a deck as 52-bit masks
+
+    Args:
+        deck (list): 52 card_ids in the order of the shuffled deck
+
+    Returns:
+        (list): The hand masks of N, E, S and W, see double_dummy
+    '''
+    hands = []
+    for player_id in range(4):
+        hand = 0
+        for card_id in deck[52 - 13 * (player_id + 1):52 - 13 * player_id]:
+            hand |= 1 << int(card_id)
+        hands.append(hand)
+    return hands
+
+
+class BridgeDealLibrary:
+    ''' A read-only library of Bridge deals, memory-mapped from a file
+    '''
+
+    def __init__(self, path: str):
+        ''' Open the library
+
+        Args:
+            path (str): The .npy file written by create_deal_library
+        '''
+        self.path = path
+        self.deals = np.load(path, mmap_mode='r')
+        if self.deals.dtype != DEAL_DTYPE:
+            raise Exception(f'BridgeDealLibrary: {path} is not a deal library')
+
+    def __len__(self):
+        return len(self.deals)
+
+    def __getstate__(self):
+        # send the path to other processes, not the mapped pages
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def get_deck(self, deal_index: int) -> List[BridgeCard]:
+        ''' Get the shuffled deck of a deal
+
+        Args:
+            deal_index (int): The index of the deal
+
+        Returns:
+            (list): 52 BridgeCards
+        '''
+        deck = unpack_decks(self.deals['deck'][deal_index:deal_index + 1])[0]
+        return [BridgeCard.card(card_id) for card_id in deck.tolist()]
+
+    def get_board_id(self, deal_index: int) -> int:
+        ''' Get the board_id of a deal, which fixes the dealer and the vulnerability
+        '''
+        return int(self.deals['board_id'][deal_index])
+
+    def get_hands(self, deal_index: int) -> List[int]:
+        ''' Get the hands of a deal as 52-bit masks of N, E, S and W
+        '''
+        return get_deck_hands(unpack_decks(self.deals['deck'][deal_index:deal_index + 1])[0])
+
+    def get_dd_table(self, deal_index: int) -> np.ndarray or None:
+        ''' Get the double dummy table of a deal
+
+        Returns:
+            (numpy.array): (5, 4) tricks by strain and declarer, None if
+                the library was created without double dummy tables
+        '''
+        dd_table = np.array(self.deals['dd_table'][deal_index])
+        if dd_table[0, 0] < 0:
+            return None
+        return dd_table
+
+
+def create_deal_library(path: str, num_deals: int, np_random, with_dd_tables: bool = False,
+                        num_processes: int = 1) -> BridgeDealLibrary:
+    ''' Create a library of random deals
+
+    Args:
+        path (str): The .npy file to write
+        num_deals (int): The number of deals
+        np_random (numpy.random.RandomState): Random state to shuffle the decks
+        with_dd_tables (bool): Whether to compute the double dummy tables.
+            This takes a fraction of a second per deal with DDS installed
+            (see double_dummy), and minutes per deal without it, so spread
+            it over processes then.
+        num_processes (int): The number of processes for the double dummy tables
+
+    Returns:
+        (BridgeDealLibrary): The library
+    '''
+    decks = np.array([np_random.permutation(52) for _ in range(num_deals)], dtype=np.uint8).reshape(num_deals, 52)
+    deals = np.lib.format.open_memmap(path, mode='w+', dtype=DEAL_DTYPE, shape=(num_deals,))
+    deals['deck'] = pack_decks(decks)
+    # boards 1-16 in turn cover every dealer and vulnerability
+    deals['board_id'] = np.arange(num_deals) % 16 + 1
+    deals['dd_table'] = -1
+    if with_dd_tables:
+        hands = [get_deck_hands(deck) for deck in decks]
+        if num_processes > 1:
+            with multiprocessing.Pool(num_processes) as pool:
+                dd_tables = pool.map(calc_dd_table, hands, chunksize=1)
+        else:
+            dd_tables = [calc_dd_table(deal_hands) for deal_hands in hands]
+        deals['dd_table'] = np.array(dd_tables, dtype=np.int8).reshape(num_deals, 5, 4)
+    deals.flush()
+    del deals
+    return BridgeDealLibrary(path)
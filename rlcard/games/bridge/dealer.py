@@ -13,12 +13,21 @@ from .utils.bridge_card import BridgeCard
 class BridgeDealer:
     ''' Initialize a BridgeDealer dealer class
     '''
-    def __init__(self, np_random):
+    def __init__(self, np_random, deal_library=None, deal_index: int = None):
         ''' set shuffled_deck, set stock_pile
+
+        Args:
+            np_random: Random state to shuffle the deck
+            deal_library (BridgeDealLibrary): If given, the deck is the one of
+                the deal at deal_index in the library instead of a shuffled one
+            deal_index (int): The index of the deal in deal_library
         '''
         self.np_random = np_random
-        self.shuffled_deck: List[BridgeCard] = BridgeCard.get_deck()  # keep a copy of the shuffled cards at start of new hand
-        self.np_random.shuffle(self.shuffled_deck)
+        if deal_library is not None:
+            self.shuffled_deck: List[BridgeCard] = deal_library.get_deck(deal_index)
+        else:
+            self.shuffled_deck: List[BridgeCard] = BridgeCard.get_deck()  # keep a copy of the shuffled cards at start of new hand
+            self.np_random.shuffle(self.shuffled_deck)
         self.stock_pile: List[BridgeCard] = self.shuffled_deck.copy()
 
     def deal_cards(self, player: BridgePlayer, num: int):
@@ -29,4 +38,4 @@ class BridgeDealer:
             num (int): The number of cards to be dealt
         '''
         for _ in range(num):
-            player.hand.append(self.stock_pile.pop())
+            player.add_card_to_hand(self.stock_pile.pop())
@@ -0,0 +1,586 @@
+''' Double dummy solver for Bridge
+
+A double dummy solver finds the number of tricks each side takes when
+all four hands are known and every player plays perfectly.
+
+Hands are 52-bit masks where bit card_id is set for each card held, with
+card_id = 13 * suit_id + rank_id as in BridgeCard. Strains follow the
+bid suit ids: 0-3 for clubs, diamonds, hearts and spades and 4 for no
+trump. Players are 0-3 for N, E, S and W; N-S is side 0.
+
+The search is a boolean alpha-beta search ("can N-S take at least n of
+the remaining tricks?") run a few times with different n. These things
+keep it small:
+
+1) Cards in sequence within a hand, taking into account the cards still
+   out, are equivalent, so only one of them is tried.
+2) Positions at the start of a trick are stored in a transposition table
+   as lower and upper bounds on the tricks N-S take from there. This is
+   a partition search: every result comes with the top ranks of each
+   suit it depends on, and the entry is shared by all the positions with
+   the same suit lengths and the same owners of these ranks.
+3) Quick tricks: the side on lead can cash its top winners, from the
+   leader or from the partner after a low lead to it, and the top trumps
+   of one hand take a trick each.
+4) Moves are tried in a good order: leads of winners first, then low
+   cards; cheap winners first when following, low cards when partner
+   already wins the trick.
+
+Positions seen before are likely again when the same deal is solved for
+another leader, so calc_dd_table keeps one solver per strain and starts
+from the result of the previous leader, or of the previous strain.
+
+Even so, a full 13-card deal takes this solver minutes per table. When the
+endplay package is installed (pip install rlcard[bridge]), calc_dd_table
+gets the tables of full deals from DDS, the double dummy solver in C of
+Bo Haglund, in a fraction of a second instead, and this solver is the
+fallback.
+'''
+
+from functools import lru_cache
+from typing import List, Optional
+
+from .round import BridgeRound
+from .utils.bridge_card import BridgeCard
+
+NO_TRUMP = 4
+SUIT_MASK = (1 << 13) - 1
+
+# the card and the cards above it in its suit
+_RANKS_FROM = [(SUIT_MASK >> (card_id % 13) << card_id) for card_id in range(52)]
+
+
+def get_hand_mask(cards: List[BridgeCard]) -> int:
+    ''' Get the 52-bit mask of a list of cards
+    '''
+    hand_mask = 0
+    for card in cards:
+        hand_mask |= 1 << card.card_id
+    return hand_mask
+
+
+@lru_cache(maxsize=1 << 18)
+def _get_suit_info(suit_masks):
+    # owners of the cards of one suit from the highest down (2 bits each, after a leading 1),
+    # the lengths of the four hands (4 bits each) and the number of cards
+    key = 1
+    remaining = suit_masks[0] | suit_masks[1] | suit_masks[2] | suit_masks[3]
+    bit = 1 << 12
+    while bit:
+        if remaining & bit:
+            key <<= 2
+            if suit_masks[1] & bit:
+                key |= 1
+            elif suit_masks[2] & bit:
+                key |= 2
+            elif suit_masks[3] & bit:
+                key |= 3
+        bit >>= 1
+    lengths = 0
+    for suit_mask in suit_masks:
+        lengths = (lengths << 4) | bin(suit_mask).count('1')
+    return key, lengths, bin(remaining).count('1')
+
+
+@lru_cache(maxsize=None)
+def _get_top_ranks(remaining, count):
+    # the top count cards of a suit and the ranks above them as a 13-bit mask
+    if count == 0:
+        return 0
+    for _ in range(count - 1):
+        remaining ^= 1 << (remaining.bit_length() - 1)
+    lowest = remaining.bit_length() - 1
+    return SUIT_MASK >> lowest << lowest
+
+
+@lru_cache(maxsize=1 << 18)
+def _get_suit_moves(shift, hand, present):
+    # lowest card of each sequence of the hand within the present cards of the suit
+    # at shift, as card_ids from the highest sequence down
+    moves = []
+    bit = 1 << 12
+    in_sequence = False
+    while bit:
+        if hand & bit:
+            in_sequence = True
+            lowest = bit
+        elif present & bit and in_sequence:
+            moves.append(shift + lowest.bit_length() - 1)
+            in_sequence = False
+        bit >>= 1
+    if in_sequence:
+        moves.append(shift + lowest.bit_length() - 1)
+    return tuple(moves)
+
+
+class DoubleDummySolver:
+    ''' Double dummy solver for one deal and one strain
+
+    The transposition table is kept between calls, so solving the same
+    deal with different leaders reuses the work done before.
+    '''
+
+    def __init__(self, hands: List[int], strain: int):
+        ''' Initialize the solver
+
+        Args:
+            hands (list): 52-bit hand masks of the players N, E, S and W,
+                all with the same number of cards
+            strain (int): 0-3 for a trump suit, 4 for no trump
+        '''
+        self.hands = list(hands)
+        self.strain = strain
+        self.trump = strain if strain < NO_TRUMP else None
+        # (leader, suit lengths) -> {relevant shifts -> {owners of the relevant ranks -> [lower, upper]}}
+        self.table = {}
+        self.node_count = 0
+
+    def solve(self, leader: int, trick_cards: List[int] = (), guess: Optional[int] = None) -> int:
+        ''' Get the number of the remaining tricks taken by N-S
+
+        Args:
+            leader (int): The player leading the current trick
+            trick_cards (list): card_ids already played to the current
+                trick, starting with the leader. They are not in the hands.
+            guess (int): An estimate of the result, e.g. the result with
+                another leader. A good guess saves most of the search.
+
+        Returns:
+            (int): The number of tricks N-S take from the current trick on
+        '''
+        hands = self.hands
+        remaining_tricks = bin(hands[leader]).count('1')
+        if trick_cards:
+            remaining_tricks += 1
+        lower, upper = 0, remaining_tricks
+        need = guess
+        while lower < upper:
+            # null window search: can N-S take at least need tricks?
+            # Step from the guess one trick at a time, bisect without it.
+            if need is None or not lower < need <= upper:
+                need = (lower + upper + 1) // 2
+            if trick_cards:
+                present = hands[0] | hands[1] | hands[2] | hands[3]
+                for card in trick_cards:
+                    present |= 1 << card
+                winner_index, winning_card = self._get_trick_winner(trick_cards)
+                result, _ = self._play(hands, leader, present, list(trick_cards), winner_index, winning_card, need)
+            else:
+                result, _ = self._search(hands, leader, need)
+            if result:
+                lower = need
+            else:
+                upper = need - 1
+            if guess is not None:
+                need = need + 1 if result else need - 1
+            else:
+                need = None
+        return lower
+
+    def _search(self, hands, leader, need):
+        # can N-S take need of the remaining tricks, leader to lead?
+        # Returns the result and the ranks it depends on as a 52-bit mask.
+        if need <= 0:
+            return True, 0
+        remaining_tricks = bin(hands[0]).count('1')
+        if need > remaining_tricks:
+            return False, 0
+        if remaining_tricks == 1:
+            winner, winning_card = self._get_last_trick_winner(hands, leader)
+            return winner % 2 == 0, _RANKS_FROM[winning_card]
+
+        suit_infos = []
+        for shift in (0, 13, 26, 39):
+            suit_infos.append(_get_suit_info(((hands[0] >> shift) & SUIT_MASK, (hands[1] >> shift) & SUIT_MASK,
+                                              (hands[2] >> shift) & SUIT_MASK, (hands[3] >> shift) & SUIT_MASK)))
+        key_0, key_1, key_2, key_3 = [suit_info[0] for suit_info in suit_infos]
+        bucket_key = (leader, suit_infos[0][1], suit_infos[1][1], suit_infos[2][1], suit_infos[3][1])
+        bucket = self.table.get(bucket_key)
+        if bucket is None:
+            bucket = {}
+            self.table[bucket_key] = bucket
+        for shifts, entries in bucket.items():
+            bounds = entries.get((key_0 >> shifts[0], key_1 >> shifts[1], key_2 >> shifts[2], key_3 >> shifts[3]))
+            if bounds is not None:
+                if bounds[0] >= need:
+                    return True, self._get_relevant(hands, suit_infos, shifts)
+                if bounds[1] < need:
+                    return False, self._get_relevant(hands, suit_infos, shifts)
+
+        if self.trump is not None:
+            # the top trumps of one hand take a trick each, whatever the others do
+            side, sure_tricks, relevant = self._get_sure_trump_tricks(hands)
+            if side == 0 and sure_tricks >= need:
+                self._store(bucket, hands, suit_infos, relevant, sure_tricks, remaining_tricks)
+                return True, relevant
+            if side == 1 and remaining_tricks - sure_tricks < need:
+                self._store(bucket, hands, suit_infos, relevant, 0, remaining_tricks - sure_tricks)
+                return False, relevant
+
+        quick_tricks, relevant = self._get_quick_tricks(hands, leader)
+        if leader % 2 == 0:
+            if quick_tricks >= need:
+                self._store(bucket, hands, suit_infos, relevant, quick_tricks, remaining_tricks)
+                return True, relevant
+        elif remaining_tricks - quick_tricks < need:
+            self._store(bucket, hands, suit_infos, relevant, 0, remaining_tricks - quick_tricks)
+            return False, relevant
+
+        present = hands[0] | hands[1] | hands[2] | hands[3]
+        result, relevant = self._play(hands, leader, present, [], 0, 0, need)
+        if result:
+            self._store(bucket, hands, suit_infos, relevant, need, remaining_tricks)
+        else:
+            self._store(bucket, hands, suit_infos, relevant, 0, need - 1)
+        return result, relevant
+
+    @staticmethod
+    def _get_relevant(hands, suit_infos, shifts):
+        # ranks a table entry depends on, as a 52-bit mask
+        remaining = hands[0] | hands[1] | hands[2] | hands[3]
+        relevant = 0
+        for suit in (0, 1, 2, 3):
+            count = suit_infos[suit][2] - (shifts[suit] >> 1)
+            if count:
+                shift = 13 * suit
+                relevant |= _get_top_ranks((remaining >> shift) & SUIT_MASK, count) << shift
+        return relevant
+
+    @staticmethod
+    def _store(bucket, hands, suit_infos, relevant, lower, upper):
+        remaining = hands[0] | hands[1] | hands[2] | hands[3]
+        shifts = []
+        owners = []
+        for suit in (0, 1, 2, 3):
+            count = bin((remaining & relevant) >> (13 * suit) & SUIT_MASK).count('1')
+            shift = 2 * (suit_infos[suit][2] - count)
+            shifts.append(shift)
+            owners.append(suit_infos[suit][0] >> shift)
+        entries = bucket.setdefault(tuple(shifts), {})
+        bounds = entries.get(tuple(owners))
+        if bounds is None:
+            entries[tuple(owners)] = [lower, upper]
+        else:
+            bounds[0] = max(bounds[0], lower)
+            bounds[1] = min(bounds[1], upper)
+
+    def _get_sure_trump_tricks(self, hands):
+        # the side holding the top trump and the number of top trumps in that hand
+        shift = 13 * self.trump
+        trumps = [(hand >> shift) & SUIT_MASK for hand in hands]
+        remaining = trumps[0] | trumps[1] | trumps[2] | trumps[3]
+        if not remaining:
+            return 0, 0, 0
+        bit = 1 << (remaining.bit_length() - 1)
+        for player in (0, 1, 2, 3):
+            if trumps[player] & bit:
+                break
+        sure_tricks = 0
+        while remaining & bit and trumps[player] & bit:
+            sure_tricks += 1
+            lowest = bit
+            bit >>= 1
+            while bit and not remaining & bit:
+                bit >>= 1
+        return player % 2, sure_tricks, _RANKS_FROM[shift + lowest.bit_length() - 1]
+
+    def _get_quick_tricks(self, hands, leader):
+        # tricks the side of the leader can cash from the top without giving up the lead,
+        # either from the hand of the leader or, after leading low to it, from the partner
+        quick_tricks, relevant = self._get_cashing_tricks(hands, leader)
+        partner = (leader + 2) % 4
+        hand = hands[leader]
+        partner_hand = hands[partner]
+        opponent_hands = (hands[(leader + 1) % 4], hands[(leader + 3) % 4])
+        opponents = opponent_hands[0] | opponent_hands[1]
+        for suit in (0, 1, 2, 3):
+            shift = 13 * suit
+            top = ((opponents >> shift) & SUIT_MASK).bit_length()
+            # the leader has a loser to lead and the partner a winner to take it,
+            # which the opponents can not ruff
+            if top and (hand >> shift) & ((1 << top) - 1) and ((partner_hand >> shift) & SUIT_MASK) >> top:
+                if self.trump is not None and suit != self.trump and any(
+                        (opponent_hand >> (13 * self.trump)) & SUIT_MASK and not (opponent_hand >> shift) & SUIT_MASK
+                        for opponent_hand in opponent_hands):
+                    continue
+                partner_tricks, partner_relevant = self._get_cashing_tricks(hands, partner)
+                relevant |= partner_relevant | _RANKS_FROM[shift + top - 1]
+                if partner_tricks > quick_tricks:
+                    quick_tricks = partner_tricks
+                break
+        return quick_tricks, relevant
+
+    def _get_cashing_tricks(self, hands, leader):
+        # tricks the leader can cash from the top of its own hand
+        trump = self.trump
+        hand = hands[leader]
+        partner_hand = hands[(leader + 2) % 4]
+        opponent_hands = (hands[(leader + 1) % 4], hands[(leader + 3) % 4])
+        opponents = opponent_hands[0] | opponent_hands[1]
+        ruffers = []
+        if trump is not None:
+            shift = 13 * trump
+            ruffers = [opponent_hand for opponent_hand in opponent_hands if (opponent_hand >> shift) & SUIT_MASK]
+        quick_tricks = 0
+        relevant = 0
+        is_blocked = False
+        for suit in (0, 1, 2, 3):
+            shift = 13 * suit
+            suit_hand = (hand >> shift) & SUIT_MASK
+            if not suit_hand:
+                continue
+            # cards above the highest card of the opponents win
+            top = ((opponents >> shift) & SUIT_MASK).bit_length()
+            count = bin(suit_hand >> top).count('1')
+            if count and suit != trump:
+                for ruffer in ruffers:
+                    count = min(count, bin((ruffer >> shift) & SUIT_MASK).count('1'))
+            if not count:
+                continue
+            if top:
+                relevant |= _RANKS_FROM[shift + top - 1]
+            if ((partner_hand >> shift) & SUIT_MASK) >> top:
+                # partner may have to overtake: the suit is good for one trick, taken last
+                is_blocked = True
+            else:
+                quick_tricks += count
+        if is_blocked:
+            quick_tricks += 1
+        return quick_tricks, relevant
+
+    def _get_last_trick_winner(self, hands, leader):
+        trump = self.trump
+        winner = leader
+        winning_card = hands[leader].bit_length() - 1
+        for i in (1, 2, 3):
+            player = (leader + i) % 4
+            card = hands[player].bit_length() - 1
+            if card // 13 == winning_card // 13:
+                if card > winning_card:
+                    winner, winning_card = player, card
+            elif card // 13 == trump:
+                winner, winning_card = player, card
+        return winner, winning_card
+
+    def _get_moves(self, hands, player, present, trick_cards, winner_index, winning_card):
+        # representative cards of the player in a good order to try
+        hand = hands[player]
+        if not trick_cards:
+            # lead the winners of the side first, then low cards
+            opponents = hands[(player + 1) % 4] | hands[(player + 3) % 4]
+            partner_hand = hands[(player + 2) % 4]
+            moves = []
+            rest = []
+            for shift in (0, 13, 26, 39):
+                suit_hand = (hand >> shift) & SUIT_MASK
+                if not suit_hand:
+                    continue
+                top = ((opponents >> shift) & SUIT_MASK).bit_length()
+                suit_moves = _get_suit_moves(shift, suit_hand, (present >> shift) & SUIT_MASK)
+                if suit_hand >> top:
+                    moves.extend(suit_moves)
+                elif ((partner_hand >> shift) & SUIT_MASK) >> top:
+                    moves.extend(reversed(suit_moves))
+                else:
+                    rest.extend(reversed(suit_moves))
+            return moves + rest
+
+        # put the cards that win the trick so far first, the cheapest ones first,
+        # unless partner is already winning
+        partner_is_winning = len(trick_cards) - winner_index == 2
+        shift = 13 * (trick_cards[0] // 13)
+        suit_hand = (hand >> shift) & SUIT_MASK
+        if suit_hand:
+            moves = _get_suit_moves(shift, suit_hand, (present >> shift) & SUIT_MASK)
+            if winning_card // 13 != shift // 13 or moves[0] < winning_card:
+                return moves[::-1]
+            count = 1
+            while count < len(moves) and moves[count] > winning_card:
+                count += 1
+            if partner_is_winning:
+                return moves[:count - 1 - len(moves):-1] + moves[count - 1::-1]
+            return moves[count - 1::-1] + moves[:count - 1 - len(moves):-1]
+
+        trump = self.trump
+        trump_shift = 13 * trump if trump is not None else None
+        winning_suit = winning_card // 13
+        winners = []
+        losers = []
+        for shift in (39, 26, 13, 0):
+            suit_hand = (hand >> shift) & SUIT_MASK
+            if not suit_hand:
+                continue
+            suit_moves = _get_suit_moves(shift, suit_hand, (present >> shift) & SUIT_MASK)
+            if shift == trump_shift:
+                if winning_suit != trump:
+                    winners.extend(reversed(suit_moves))
+                    continue
+                for card in reversed(suit_moves):
+                    if card > winning_card:
+                        winners.append(card)
+                    else:
+                        losers.append(card)
+            else:
+                losers.extend(reversed(suit_moves))
+        if partner_is_winning:
+            return losers + winners
+        return winners + losers
+
+    def _get_trick_winner(self, trick_cards):
+        trump = self.trump
+        winner_index = 0
+        winning_card = trick_cards[0]
+        for i in range(1, len(trick_cards)):
+            card = trick_cards[i]
+            if card // 13 == winning_card // 13:
+                if card > winning_card:
+                    winner_index, winning_card = i, card
+            elif card // 13 == trump:
+                winner_index, winning_card = i, card
+        return winner_index, winning_card
+
+    def _play(self, hands, leader, present, trick_cards, winner_index, winning_card, need):
+        # next player to play to the current trick, present are the cards in the hands
+        # and in the trick, the winner so far is trick_cards[winner_index]
+        self.node_count += 1
+        position = len(trick_cards)
+        player = (leader + position) % 4
+        is_north_south = player % 2 == 0
+        trump = self.trump
+        all_relevant = 0
+        for card in self._get_moves(hands, player, present, trick_cards, winner_index, winning_card):
+            if not position:
+                next_winner_index, next_winning_card = 0, card
+            elif card // 13 == winning_card // 13:
+                if card > winning_card:
+                    next_winner_index, next_winning_card = position, card
+                else:
+                    next_winner_index, next_winning_card = winner_index, winning_card
+            elif card // 13 == trump:
+                next_winner_index, next_winning_card = position, card
+            else:
+                next_winner_index, next_winning_card = winner_index, winning_card
+            card_mask = 1 << card
+            hands[player] ^= card_mask
+            trick_cards.append(card)
+            if position == 3:
+                winner = (leader + next_winner_index) % 4
+                result, relevant = self._search(hands, winner, need - 1 if winner % 2 == 0 else need)
+                winning_suit = next_winning_card // 13
+                for trick_card in trick_cards:
+                    if trick_card != next_winning_card and trick_card // 13 == winning_suit:
+                        # the winning card beat another card of its suit
+                        relevant |= _RANKS_FROM[next_winning_card]
+                        break
+            else:
+                result, relevant = self._play(hands, leader, present, trick_cards,
+                                              next_winner_index, next_winning_card, need)
+            trick_cards.pop()
+            hands[player] ^= card_mask
+            if result == is_north_south:
+                return result, relevant
+            all_relevant |= relevant
+        return not is_north_south, all_relevant
+
+def solve_deal(hands: List[int], strain: int, leader: int) -> int:
+    ''' Get the number of tricks taken by N-S
+
+    Args:
+        hands (list): 52-bit hand masks of the players N, E, S and W
+        strain (int): 0-3 for a trump suit, 4 for no trump
+        leader (int): The player on lead
+
+    Returns:
+        (int): The number of tricks N-S take
+    '''
+    return DoubleDummySolver(hands, strain).solve(leader)
+
+
+@lru_cache(maxsize=None)
+def _import_dds():
+    # the dds and types modules of endplay, None if it is not installed
+    try:
+        from endplay import dds, types
+    except ImportError:
+        return None
+    return dds, types
+
+
+def has_dds() -> bool:
+    ''' Check whether DDS is installed, through the endplay package
+    '''
+    return _import_dds() is not None
+
+
+def _calc_dds_table(hands):
+    dds, types = _import_dds()
+    # PBN hands list the suits from spades down and the ranks from the ace down
+    pbn = 'N:' + ' '.join('.'.join(''.join(BridgeCard.ranks[rank_id] for rank_id in range(12, -1, -1)
+                                           if hand >> (13 * suit + rank_id) & 1)
+                                   for suit in (3, 2, 1, 0))
+                          for hand in hands)
+    dd_table = dds.calc_dd_table(types.Deal.from_pbn(pbn))
+    denoms = (types.Denom.clubs, types.Denom.diamonds, types.Denom.hearts, types.Denom.spades, types.Denom.nt)
+    return [[dd_table[denom, player] for player in types.Player] for denom in denoms]
+
+
+def calc_dd_table(hands: List[int], use_dds: bool = True) -> List[List[int]]:
+    ''' Get the double dummy table of a deal
+
+    Args:
+        hands (list): 52-bit hand masks of the players N, E, S and W
+        use_dds (bool): Whether to use DDS for a full deal when it is
+            installed. Otherwise, or for fewer cards, DoubleDummySolver
+            solves the deal
+
+    Returns:
+        (list): table[strain][declarer] is the number of tricks the
+            declarer takes, with strains C, D, H, S and NT and declarers
+            N, E, S and W
+    '''
+    num_tricks = bin(hands[0]).count('1')
+    if use_dds and num_tricks == 13 and has_dds():
+        return _calc_dds_table(hands)
+    table = [[0] * 4 for _ in range(5)]
+    north_south_tricks = None
+    for strain in range(5):
+        solver = DoubleDummySolver(hands, strain)
+        for leader in range(4):
+            # the leader rarely changes the result by more than a trick,
+            # and the strain is a better guess than none
+            north_south_tricks = solver.solve(leader, guess=north_south_tricks)
+            declarer = (leader + 3) % 4
+            tricks = north_south_tricks if declarer % 2 == 0 else num_tricks - north_south_tricks
+            table[strain][declarer] = tricks
+    return table
+
+
+def solve_round(round: BridgeRound) -> int:
+    ''' Get the number of tricks taken by the declarer with perfect play
+        from the current position of the play on
+
+    Args:
+        round (BridgeRound): A round in the play phase
+
+    Returns:
+        (int): The tricks already won by the side of the declarer plus
+            the ones it takes from here
+    '''
+    trump_suit = round.get_trump_suit()
+    strain = BridgeCard.suits.index(trump_suit) if trump_suit else NO_TRUMP
+    hands = [get_hand_mask(player.hand) for player in round.players]
+    trick_moves = round.get_trick_moves()
+    if len(trick_moves) == 4:
+        trick_moves = []
+    if trick_moves:
+        leader = trick_moves[0].player.player_id
+    else:
+        leader = round.current_player_id
+    trick_cards = [move.card.card_id for move in trick_moves]
+    north_south_tricks = 0
+    if any(hands) or trick_cards:
+        north_south_tricks = DoubleDummySolver(hands, strain).solve(leader, trick_cards)
+    side = round.get_declarer().player_id % 2
+    remaining_tricks = bin(hands[leader]).count('1') + (1 if trick_cards else 0)
+    tricks = north_south_tricks if side == 0 else remaining_tricks - north_south_tricks
+    return round.won_trick_counts[side] + tricks
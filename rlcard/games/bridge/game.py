@@ -8,6 +8,7 @@ from typing import List
 
 import numpy as np
 
+from .deal_library import BridgeDealLibrary
 from .judger import BridgeJudger
 from .round import BridgeRound
 from .utils.action_event import ActionEvent, CallActionEvent, PlayCardAction
@@ -26,13 +27,38 @@ class BridgeGame:
         self.actions: [ActionEvent] = []  # must reset in init_game
         self.round: BridgeRound or None = None  # must reset in init_game
         self.num_players: int = 4
+        self.deal_library: BridgeDealLibrary or None = None
+        self.deal_index: int or None = None  # index of the current deal in deal_library
 
-    def init_game(self):
+    def configure(self, game_config):
+        ''' Specifiy some game specific parameters
+
+        'game_deal_library' is a BridgeDealLibrary or the path of one. If
+        given, the deals are drawn from it instead of shuffled.
+        '''
+        deal_library = game_config['game_deal_library']
+        if isinstance(deal_library, str):
+            deal_library = BridgeDealLibrary(deal_library)
+        self.deal_library = deal_library
+
+    def init_game(self, deal_index: int = None):
         ''' Initialize all characters in the game and start round 1
+
+        Args:
+            deal_index (int): The deal to play from the deal library, a
+                random one if None. Ignored without a deal library.
         '''
-        board_id = self.np_random.choice([1, 2, 3, 4])
         self.actions: List[ActionEvent] = []
-        self.round = BridgeRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random)
+        if self.deal_library is not None:
+            if deal_index is None:
+                deal_index = self.np_random.randint(len(self.deal_library))
+            self.deal_index = deal_index
+            board_id = self.deal_library.get_board_id(deal_index)
+            self.round = BridgeRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random,
+                                     deal_library=self.deal_library, deal_index=deal_index)
+        else:
+            board_id = self.np_random.choice([1, 2, 3, 4])
+            self.round = BridgeRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random)
         for player_id in range(4):
             player = self.round.players[player_id]
             self.round.dealer.deal_cards(player=player, num=13)
@@ -10,8 +10,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .game import BridgeGame
 
-from .utils.action_event import PlayCardAction
-from .utils.action_event import ActionEvent, BidAction, PassAction, DblAction, RdblAction
+from .utils.action_event import ActionEvent
 from .utils.move import MakeBidMove, MakeDblMove, MakeRdblMove
 from .utils.bridge_card import BridgeCard
 
@@ -36,7 +35,7 @@ class BridgeJudger:
         if not self.game.is_over():
             current_player = self.game.round.get_current_player()
             if not self.game.round.is_bidding_over():
-                legal_actions.append(PassAction())
+                legal_actions.append(ActionEvent.from_action_id(ActionEvent.pass_action_id))
                 last_make_bid_move: MakeBidMove or None = None
                 last_dbl_move: MakeDblMove or None = None
                 last_rdbl_move: MakeRdblMove or None = None
@@ -51,12 +50,11 @@ class BridgeJudger:
                 first_bid_action_id = ActionEvent.first_bid_action_id
                 next_bid_action_id = last_make_bid_move.action.action_id + 1 if last_make_bid_move else first_bid_action_id
                 for bid_action_id in range(next_bid_action_id, first_bid_action_id + 35):
-                    action = BidAction.from_action_id(action_id=bid_action_id)
-                    legal_actions.append(action)
+                    legal_actions.append(ActionEvent.from_action_id(action_id=bid_action_id))
                 if last_make_bid_move and last_make_bid_move.player.player_id % 2 != current_player.player_id % 2 and not last_dbl_move and not last_rdbl_move:
-                    legal_actions.append(DblAction())
+                    legal_actions.append(ActionEvent.from_action_id(ActionEvent.dbl_action_id))
                 if last_dbl_move and last_dbl_move.player.player_id % 2 != current_player.player_id % 2:
-                    legal_actions.append(RdblAction())
+                    legal_actions.append(ActionEvent.from_action_id(ActionEvent.rdbl_action_id))
             else:
                 trick_moves = self.game.round.get_trick_moves()
                 hand = self.game.round.players[current_player.player_id].hand
@@ -66,7 +64,7 @@ class BridgeJudger:
                     cards_of_led_suit = [card for card in hand if card.suit == led_card.suit]
                     if cards_of_led_suit:
                         legal_cards = cards_of_led_suit
+                first_play_card_action_id = ActionEvent.first_play_card_action_id
                 for card in legal_cards:
-                    action = PlayCardAction(card=card)
-                    legal_actions.append(action)
+                    legal_actions.append(ActionEvent.from_action_id(first_play_card_action_id + card.card_id))
         return legal_actions
@@ -22,9 +22,15 @@ class BridgePlayer:
         self.np_random = np_random
         self.player_id: int = player_id
         self.hand: List[BridgeCard] = []
+        self.hand_mask: int = 0  # bit card_id is set for each card in hand
+
+    def add_card_to_hand(self, card: BridgeCard):
+        self.hand.append(card)
+        self.hand_mask |= 1 << card.card_id
 
     def remove_card_from_hand(self, card: BridgeCard):
         self.hand.remove(card)
+        self.hand_mask &= ~(1 << card.card_id)
 
     def __str__(self):
         return ['N', 'E', 'S', 'W'][self.player_id]
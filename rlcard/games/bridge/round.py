@@ -9,7 +9,7 @@ from typing import List
 from .dealer import BridgeDealer
 from .player import BridgePlayer
 
-from .utils.action_event import CallActionEvent, PassAction, DblAction, RdblAction, BidAction, PlayCardAction
+from .utils.action_event import ActionEvent, CallActionEvent, PassAction, DblAction, RdblAction, BidAction, PlayCardAction
 from .utils.move import BridgeMove, DealHandMove, PlayCardMove, MakeBidMove, MakePassMove, MakeDblMove, MakeRdblMove, CallMove
 from .utils.tray import Tray
 
@@ -38,7 +38,7 @@ class BridgeRound:
             result = 'make bid'
         return result
 
-    def __init__(self, num_players: int, board_id: int, np_random):
+    def __init__(self, num_players: int, board_id: int, np_random, deal_library=None, deal_index: int = None):
         ''' Initialize the round class
 
             The round class maintains the following instances:
@@ -59,12 +59,14 @@ class BridgeRound:
             num_players: int
             board_id: int
             np_random
+            deal_library: BridgeDealLibrary to take the deal from instead of shuffling
+            deal_index: int, index of the deal in deal_library
         '''
         tray = Tray(board_id=board_id)
         dealer_id = tray.dealer_id
         self.tray = tray
         self.np_random = np_random
-        self.dealer: BridgeDealer = BridgeDealer(self.np_random)
+        self.dealer: BridgeDealer = BridgeDealer(self.np_random, deal_library=deal_library, deal_index=deal_index)
         self.players: List[BridgePlayer] = []
         for player_id in range(num_players):
             self.players.append(BridgePlayer(player_id=player_id, np_random=self.np_random))
@@ -73,28 +75,19 @@ class BridgeRound:
         self.play_card_count: int = 0
         self.contract_bid_move: MakeBidMove or None = None
         self.won_trick_counts = [0, 0]  # count of won tricks by side
+        self.call_action_ids: List[int] = []  # action_ids of the calls in order
         self.move_sheet: List[BridgeMove] = []
         self.move_sheet.append(DealHandMove(dealer=self.players[dealer_id], shuffled_deck=self.dealer.shuffled_deck))
 
     def is_bidding_over(self) -> bool:
         ''' Return whether the current bidding is over
         '''
-        is_bidding_over = True
-        if len(self.move_sheet) < 5:
-            is_bidding_over = False
-        else:
-            last_make_pass_moves: List[MakePassMove] = []
-            for move in reversed(self.move_sheet):
-                if isinstance(move, MakePassMove):
-                    last_make_pass_moves.append(move)
-                    if len(last_make_pass_moves) == 3:
-                        break
-                elif isinstance(move, CallMove):
-                    is_bidding_over = False
-                    break
-                else:
-                    break
-        return is_bidding_over
+        if self.play_card_count > 0:
+            return True
+        # at least four calls, the last three of them passes
+        call_action_ids = self.call_action_ids
+        pass_action_id = ActionEvent.pass_action_id
+        return len(call_action_ids) >= 4 and call_action_ids[-1] == call_action_ids[-2] == call_action_ids[-3] == pass_action_id
 
     def is_over(self) -> bool:
         ''' Return whether the current game is over
@@ -136,6 +129,7 @@ class BridgeRound:
     def make_call(self, action: CallActionEvent):
         # when current_player takes CallActionEvent step, the move is recorded and executed
         current_player = self.players[self.current_player_id]
+        self.call_action_ids.append(action.action_id)
         if isinstance(action, PassAction):
             self.move_sheet.append(MakePassMove(current_player))
         elif isinstance(action, BidAction):
@@ -37,6 +37,17 @@ class ActionEvent(object):  # Interface
 
     @staticmethod
     def from_action_id(action_id: int):
+        ''' Get the action event of an action_id
+
+        Action events are immutable, so the same instance is returned for
+        each action_id.
+        '''
+        if not ActionEvent.first_bid_action_id <= action_id < ActionEvent.get_num_actions():
+            raise Exception(f'ActionEvent from_action_id: invalid action_id={action_id}')
+        return _action_events[action_id]
+
+    @staticmethod
+    def _make_action_event(action_id: int):
         if action_id == ActionEvent.pass_action_id:
             return PassAction()
         elif ActionEvent.first_bid_action_id <= action_id <= 35:
@@ -139,3 +150,8 @@ class PlayCardAction(ActionEvent):
 
     def __repr__(self):
         return f"{self.card}"
+
+
+# action_id -> shared action event; there is no action event for no_bid_action_id
+_action_events = [None] + [ActionEvent._make_action_event(action_id=action_id)
+                           for action_id in range(ActionEvent.first_bid_action_id, ActionEvent.get_num_actions())]
@@ -19,6 +19,9 @@ class GinRummyDealer:
         self.shuffled_deck = utils.get_deck()  # keep a copy of the shuffled cards at start of new hand
         self.np_random.shuffle(self.shuffled_deck)
         self.stock_pile = self.shuffled_deck.copy()  # type: List[Card]
+        # bit card_id is set for each card in the pile; see melding.get_hand_mask
+        self.stock_pile_mask = (1 << 52) - 1
+        self.discard_pile_mask = 0
 
     def deal_cards(self, player: GinRummyPlayer, num: int):
         ''' Deal some cards from stock_pile to one player
@@ -28,5 +31,7 @@ class GinRummyDealer:
             num (int): The number of cards to be dealt
         '''
         for _ in range(num):
-            player.hand.append(self.stock_pile.pop())
+            card = self.stock_pile.pop()
+            self.stock_pile_mask &= ~(1 << utils.get_card_id(card))
+            player.hand.append(card)
         player.did_populate_hand()
@@ -26,6 +26,7 @@ class GinRummyGame:
         self.judge = GinRummyJudge(game=self)
         self.settings = Settings()
         self.actions = None  # type: List[ActionEvent] or None # must reset in init_game
+        self.drawn_card_count = 0  # number of DrawCardAction in actions, must reset in init_game
         self.round = None  # round: GinRummyRound or None, must reset in init_game
         self.num_players = 2
 
@@ -38,6 +39,7 @@ class GinRummyGame:
         elif self.settings.dealer_for_round == DealerForRound.South:
             dealer_id = 1
         self.actions = []
+        self.drawn_card_count = 0
         self.round = GinRummyRound(dealer_id=dealer_id, np_random=self.np_random)
         for i in range(2):
             num = 11 if i == 0 else 10
@@ -56,6 +58,7 @@ class GinRummyGame:
             self.round.score_player_1(action)
         elif isinstance(action, DrawCardAction):
             self.round.draw_card(action)
+            self.drawn_card_count += 1
         elif isinstance(action, PickUpDiscardAction):
             self.round.pick_up_discard(action)
         elif isinstance(action, DeclareDeadHandAction):
@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 
 from typing import List, Tuple
 
+from functools import lru_cache
+
 from .utils.action_event import *
 from .utils.scorers import GinRummyScorer
 from .utils import melding
@@ -43,53 +45,52 @@ class GinRummyJudge:
             current_player = self.game.get_current_player()
             going_out_deadwood_count = self.game.settings.going_out_deadwood_count
             hand = current_player.hand
-            meld_clusters = current_player.get_meld_clusters()  # improve speed 2020-Apr
-            knock_cards, gin_cards = _get_going_out_cards(meld_clusters=meld_clusters,
-                                                          hand=hand,
-                                                          going_out_deadwood_count=going_out_deadwood_count)
-            if self.game.settings.is_allowed_gin and gin_cards:
-                legal_actions = [GinAction()]
+            knock_card_ids, gin_card_ids = _get_going_out_card_ids(hand_mask=current_player.hand_mask,
+                                                                   going_out_deadwood_count=going_out_deadwood_count)
+            if self.game.settings.is_allowed_gin and gin_card_ids:
+                legal_actions = [ActionEvent.decode_action(gin_action_id)]
             else:
                 cards_to_discard = [card for card in hand]
                 if isinstance(last_action, PickUpDiscardAction):
                     if not self.game.settings.is_allowed_to_discard_picked_up_card:
                         picked_up_card = self.game.round.move_sheet[-1].card
                         cards_to_discard.remove(picked_up_card)
-                discard_actions = [DiscardAction(card=card) for card in cards_to_discard]
+                discard_actions = [ActionEvent.decode_action(discard_action_id + utils.get_card_id(card))
+                                   for card in cards_to_discard]
                 legal_actions = discard_actions
                 if self.game.settings.is_allowed_knock:
                     if current_player.player_id == 0 or not self.game.settings.is_south_never_knocks:
-                        if knock_cards:
-                            knock_actions = [KnockAction(card=card) for card in knock_cards]
+                        if knock_card_ids:
+                            knock_actions = [ActionEvent.decode_action(knock_action_id + card_id)
+                                             for card_id in knock_card_ids]
                             if not self.game.settings.is_always_knock:
                                 legal_actions.extend(knock_actions)
                             else:
                                 legal_actions = knock_actions
         elif isinstance(last_action, DeclareDeadHandAction):
-            legal_actions = [ScoreNorthPlayerAction()]
+            legal_actions = [ActionEvent.decode_action(score_player_0_action_id)]
         elif isinstance(last_action, GinAction):
-            legal_actions = [ScoreNorthPlayerAction()]
+            legal_actions = [ActionEvent.decode_action(score_player_0_action_id)]
         elif isinstance(last_action, DiscardAction):
             can_draw_card = len(self.game.round.dealer.stock_pile) > self.game.settings.stockpile_dead_card_count
             if self.game.settings.max_drawn_card_count < 52:  # NOTE: this
-                drawn_card_actions = [action for action in self.game.actions if isinstance(action, DrawCardAction)]
-                if len(drawn_card_actions) >= self.game.settings.max_drawn_card_count:
+                if self.game.drawn_card_count >= self.game.settings.max_drawn_card_count:
                     can_draw_card = False
             move_count = len(self.game.round.move_sheet)
             if move_count >= self.game.settings.max_move_count:
-                legal_actions = [DeclareDeadHandAction()]  # prevent unlimited number of moves in a game
+                legal_actions = [ActionEvent.decode_action(declare_dead_hand_action_id)]  # prevent unlimited number of moves in a game
             elif can_draw_card:
-                legal_actions = [DrawCardAction()]
+                legal_actions = [ActionEvent.decode_action(draw_card_action_id)]
                 if self.game.settings.is_allowed_pick_up_discard:
-                    legal_actions.append(PickUpDiscardAction())
+                    legal_actions.append(ActionEvent.decode_action(pick_up_discard_action_id))
             else:
-                legal_actions = [DeclareDeadHandAction()]
+                legal_actions = [ActionEvent.decode_action(declare_dead_hand_action_id)]
                 if self.game.settings.is_allowed_pick_up_discard:
-                    legal_actions.append(PickUpDiscardAction())
+                    legal_actions.append(ActionEvent.decode_action(pick_up_discard_action_id))
         elif isinstance(last_action, KnockAction):
-            legal_actions = [ScoreNorthPlayerAction()]
+            legal_actions = [ActionEvent.decode_action(score_player_0_action_id)]
         elif isinstance(last_action, ScoreNorthPlayerAction):
-            legal_actions = [ScoreSouthPlayerAction()]
+            legal_actions = [ActionEvent.decode_action(score_player_1_action_id)]
         elif isinstance(last_action, ScoreSouthPlayerAction):
             pass
         else:
@@ -105,51 +106,57 @@ def get_going_out_cards(hand: List[Card], going_out_deadwood_count: int) -> Tupl
     '''
     if not len(hand) == 11:
         raise GinRummyProgramError("len(hand) is {}: should be 11.".format(len(hand)))
-    meld_clusters = melding.get_meld_clusters(hand=hand)
-    knock_cards, gin_cards = _get_going_out_cards(meld_clusters=meld_clusters,
-                                                  hand=hand,
-                                                  going_out_deadwood_count=going_out_deadwood_count)
-    return list(knock_cards), list(gin_cards)
+    knock_card_ids, gin_card_ids = _get_going_out_card_ids(hand_mask=melding.get_hand_mask(hand),
+                                                           going_out_deadwood_count=going_out_deadwood_count)
+    knock_cards = [utils.get_card(card_id) for card_id in knock_card_ids]
+    gin_cards = [utils.get_card(card_id) for card_id in gin_card_ids]
+    return knock_cards, gin_cards
 
 
 #
 # private methods
 #
 
-def _get_going_out_cards(meld_clusters: List[List[List[Card]]],
-                         hand: List[Card],
-                         going_out_deadwood_count: int) -> Tuple[List[Card], List[Card]]:
+@lru_cache(maxsize=1 << 16)
+def _get_going_out_card_ids(hand_mask: int, going_out_deadwood_count: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
     '''
-    :param meld_clusters
-    :param hand: List[Card] -- must have 11 cards
+    Find the cards of a hand that can be discarded to go out, over all the meld_clusters
+    of the hand: to knock if the deadwood count left is at most going_out_deadwood_count,
+    or to gin if no deadwood is left.
+    :param hand_mask: int
     :param going_out_deadwood_count: int
-    :return List[Card], List[Card: cards in hand that be knocked, cards in hand that can be ginned
+    :return Tuple[int], Tuple[int]: card_ids in hand that be knocked, card_ids in hand that can be ginned
     '''
-    if not len(hand) == 11:
-        raise GinRummyProgramError("len(hand) is {}: should be 11.".format(len(hand)))
-    knock_cards = set()
-    gin_cards = set()
-    for meld_cluster in meld_clusters:
-        meld_cards = [card for meld_pile in meld_cluster for card in meld_pile]
-        hand_deadwood = [card for card in hand if card not in meld_cards]  # hand has 11 cards
-        if len(hand_deadwood) == 0:
+    knock_cards = 0
+    gin_cards = 0
+    for meld_cluster in melding.get_meld_cluster_masks(hand_mask):
+        meld_cards = 0
+        for meld_mask in meld_cluster:
+            meld_cards |= meld_mask
+        hand_deadwood = hand_mask ^ meld_cards
+        if hand_deadwood == 0:
             # all 11 cards are melded;
-            # take gin_card as first card of first 4+ meld;
-            # could also take gin_card as last card of 4+ meld, but won't do this.
-            for meld_pile in meld_cluster:
-                if len(meld_pile) >= 4:
-                    gin_cards.add(meld_pile[0])
+            # take gin_card as lowest card of first 4+ meld.
+            for meld_mask in meld_cluster:
+                if bin(meld_mask).count('1') >= 4:
+                    gin_cards |= meld_mask & -meld_mask
                     break
-        elif len(hand_deadwood) == 1:
-            card = hand_deadwood[0]
-            gin_cards.add(card)
+        elif hand_deadwood & (hand_deadwood - 1) == 0:
+            gin_cards |= hand_deadwood
         else:
-            hand_deadwood_values = [utils.get_deadwood_value(card) for card in hand_deadwood]
-            hand_deadwood_count = sum(hand_deadwood_values)
-            max_hand_deadwood_value = max(hand_deadwood_values, default=0)
-            if hand_deadwood_count <= 10 + max_hand_deadwood_value:
-                for card in hand_deadwood:
-                    next_deadwood_count = hand_deadwood_count - utils.get_deadwood_value(card)
-                    if next_deadwood_count <= going_out_deadwood_count:
-                        knock_cards.add(card)
-    return list(knock_cards), list(gin_cards)
+            hand_deadwood_count = melding.get_mask_deadwood_count(hand_deadwood)
+            card_masks = []
+            while hand_deadwood:
+                card_mask = hand_deadwood & -hand_deadwood
+                card_masks.append(card_mask)
+                hand_deadwood ^= card_mask
+            deadwood_values = [melding.get_mask_deadwood_count(card_mask) for card_mask in card_masks]
+            if hand_deadwood_count <= 10 + max(deadwood_values):
+                for card_mask, deadwood_value in zip(card_masks, deadwood_values):
+                    if hand_deadwood_count - deadwood_value <= going_out_deadwood_count:
+                        knock_cards |= card_mask
+    return _get_card_ids(knock_cards), _get_card_ids(gin_cards)
+
+
+def _get_card_ids(mask: int) -> Tuple[int, ...]:
+    return tuple(card_id for card_id in range(52) if mask >> card_id & 1)
@@ -76,6 +76,7 @@ class GinRummyRound:
         if not len(current_player.hand) == 10:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 10.".format(len(current_player.hand)))
         card = self.dealer.stock_pile.pop()
+        self.dealer.stock_pile_mask &= ~(1 << utils.get_card_id(card))
         self.move_sheet.append(DrawCardMove(current_player, action=action, card=card))
         current_player.add_card_to_hand(card=card)
 
@@ -87,9 +88,12 @@ class GinRummyRound:
         if not len(current_player.hand) == 10:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 10.".format(len(current_player.hand)))
         card = self.dealer.discard_pile.pop()
+        card_mask = 1 << utils.get_card_id(card)
+        self.dealer.discard_pile_mask &= ~card_mask
         self.move_sheet.append(PickupDiscardMove(current_player, action, card=card))
         current_player.add_card_to_hand(card=card)
         current_player.known_cards.append(card)
+        current_player.known_cards_mask |= card_mask
 
     def declare_dead_hand(self, action: DeclareDeadHandAction):
         # when current_player takes DeclareDeadHandAction step, the move is recorded and executed
@@ -114,7 +118,9 @@ class GinRummyRound:
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
+            current_player.known_cards_mask &= ~(1 << utils.get_card_id(card))
         self.dealer.discard_pile.append(card)
+        self.dealer.discard_pile_mask |= 1 << utils.get_card_id(card)
         self.current_player_id = (self.current_player_id + 1) % 2
 
     def knock(self, action: KnockAction):
@@ -131,6 +137,7 @@ class GinRummyRound:
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
+            current_player.known_cards_mask &= ~(1 << utils.get_card_id(card))
         self.current_player_id = 0
 
     def gin(self, action: GinAction, going_out_deadwood_count: int):
@@ -148,6 +155,7 @@ class GinRummyRound:
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
+            current_player.known_cards_mask &= ~(1 << utils.get_card_id(card))
         self.current_player_id = 0
 
     def score_player_0(self, action: ScoreNorthPlayerAction):
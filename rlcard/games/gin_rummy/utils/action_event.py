@@ -56,7 +56,15 @@ class ActionEvent(object):
 
         Returns:
             action (ActionEvent): the action that will be passed to the game engine.
+
+        Note: the action_events are shared: the same instance is returned for each action_id.
         '''
+        if not 0 <= action_id < len(_action_events):
+            raise Exception("decode_action: unknown action_id={}".format(action_id))
+        return _action_events[action_id]
+
+    @staticmethod
+    def _make_action_event(action_id: int) -> 'ActionEvent':
         if action_id == score_player_0_action_id:
             action_event = ScoreNorthPlayerAction()
         elif action_id == score_player_1_action_id:
@@ -156,3 +164,7 @@ class KnockAction(ActionEvent):
 
     def __str__(self):
         return "knock {}".format(str(self.card))
+
+
+# flyweight action_events indexed by action_id; want this to be read-only
+_action_events = [ActionEvent._make_action_event(action_id) for action_id in range(ActionEvent.get_num_actions())]
@@ -4,7 +4,9 @@
     Date created: 2/12/2020
 '''
 
-from typing import List
+from typing import List, Tuple
+
+from functools import lru_cache
 
 from rlcard.games.base import Card
 
@@ -19,51 +21,193 @@ from rlcard.games.gin_rummy.utils.gin_rummy_error import GinRummyProgramError
 #        meld_piles - a list of meld_pile
 #        meld_cluster - same as meld_piles, but usually with the piles being mutually disjoint
 #        meld_clusters - a list of meld_cluster
+#        hand_mask - a 52-bit int with bit card_id set for each card of a hand
+#        meld_mask - a hand_mask of the cards of a meld_pile
 # ===============================================================
 
+SUIT_MASK = (1 << 13) - 1
 
-def get_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
-    result = []  # type: List[List[List[Card]]]
-    all_run_melds = [frozenset(x) for x in get_all_run_melds(hand)]
-    all_set_melds = [frozenset(x) for x in get_all_set_melds(hand)]
-    all_melds = all_run_melds + all_set_melds
+
+def _make_suit_deadwood_table() -> List[int]:
+    # deadwood count of each 13-bit pattern of cards of one suit
+    table = [0] * (1 << 13)
+    for pattern in range(1, 1 << 13):
+        low_bit = pattern & -pattern
+        table[pattern] = table[pattern ^ low_bit] + min(low_bit.bit_length(), 10)
+    return table
+
+
+_SUIT_DEADWOOD = _make_suit_deadwood_table()
+
+
+_CARD_BITS = {card.get_index(): 1 << card_id for card_id, card in enumerate(utils.get_deck())}
+
+
+def get_hand_mask(hand: List[Card]) -> int:
+    hand_mask = 0
+    for card in hand:
+        hand_mask |= _CARD_BITS[card.get_index()]
+    return hand_mask
+
+
+def get_cards(mask: int) -> List[Card]:
+    ''' Return the cards of a hand_mask in card_id order
+    '''
+    cards = []  # type: List[Card]
+    while mask:
+        low_bit = mask & -mask
+        cards.append(utils.get_card(low_bit.bit_length() - 1))
+        mask ^= low_bit
+    return cards
+
+
+def get_mask_deadwood_count(mask: int) -> int:
+    return _SUIT_DEADWOOD[mask & SUIT_MASK] + _SUIT_DEADWOOD[(mask >> 13) & SUIT_MASK] + \
+        _SUIT_DEADWOOD[(mask >> 26) & SUIT_MASK] + _SUIT_DEADWOOD[mask >> 39]
+
+
+@lru_cache(maxsize=None)
+def _get_suit_run_masks(pattern: int) -> Tuple[int, ...]:
+    # run melds of a 13-bit pattern of one suit, in the order of get_all_run_melds
+    result = []
+    rank_id = 0
+    while rank_id < 13:
+        end = rank_id
+        while end < 13 and pattern >> end & 1:
+            end += 1
+        for i in range(rank_id, end - 2):
+            for j in range(i + 3, end + 1):
+                result.append(((1 << (j - i)) - 1) << i)
+        rank_id = end + 1
+    return tuple(result)
+
+
+def get_run_meld_masks(hand_mask: int) -> List[int]:
+    result = []  # type: List[int]
+    for suit_id in range(4):
+        shift = 13 * suit_id
+        result.extend(run_mask << shift for run_mask in _get_suit_run_masks((hand_mask >> shift) & SUIT_MASK))
+    return result
+
+
+# the 4 cards of each rank, and the four 3-card set melds that leave out one of them
+_RANK_MASKS = [sum(1 << (rank_id + 13 * suit_id) for suit_id in range(4)) for rank_id in range(13)]
+_SUBSET_MASKS = [[rank_mask ^ (1 << (rank_id + 13 * suit_id)) for suit_id in range(4)]
+                 for rank_id, rank_mask in enumerate(_RANK_MASKS)]
+
+# the rank_ids in the order of get_all_set_melds, which sorts the cards by their rank character
+_SET_RANK_IDS = sorted(range(13), key=lambda rank_id: utils.valid_rank[rank_id])
+
+
+def get_set_meld_masks(hand_mask: int, hand: List[Card] = None) -> List[int]:
+    ''' Return the set melds of a hand_mask in the order of get_all_set_melds
+
+    A four of a kind is followed by its 3-card set melds, which leave out its cards
+    in their order in hand, or in suit order if hand is not given.
+    '''
+    result = []  # type: List[int]
+    for rank_id in _SET_RANK_IDS:
+        rank_mask = _RANK_MASKS[rank_id]
+        held = hand_mask & rank_mask
+        if held == rank_mask:
+            result.append(rank_mask)
+            if hand is None:
+                result.extend(_SUBSET_MASKS[rank_id])
+            else:
+                card_bits = [_CARD_BITS[card.get_index()] for card in hand]
+                result.extend(rank_mask ^ card_bit for card_bit in card_bits if card_bit & rank_mask)
+        elif held and bin(held).count('1') == 3:
+            result.append(held)
+    return result
+
+
+def _has_four_of_a_kind(hand_mask: int) -> bool:
+    return any(hand_mask & rank_mask == rank_mask for rank_mask in _RANK_MASKS)
+
+
+def _get_meld_cluster_masks(all_melds: List[int]) -> Tuple[Tuple[int, ...], ...]:
+    result = []
     all_melds_count = len(all_melds)
-    for i in range(0, all_melds_count):
+    for i in range(all_melds_count):
         first_meld = all_melds[i]
-        first_meld_list = list(first_meld)
-        meld_cluster_1 = [first_meld_list]
-        result.append(meld_cluster_1)
+        result.append((first_meld,))
         for j in range(i + 1, all_melds_count):
             second_meld = all_melds[j]
-            second_meld_list = list(second_meld)
-            if not second_meld.isdisjoint(first_meld):
+            if second_meld & first_meld:
                 continue
-            meld_cluster_2 = [first_meld_list, second_meld_list]
-            result.append(meld_cluster_2)
+            result.append((first_meld, second_meld))
+            first_two_melds = first_meld | second_meld
             for k in range(j + 1, all_melds_count):
                 third_meld = all_melds[k]
-                third_meld_list = list(third_meld)
-                if not third_meld.isdisjoint(first_meld) or not third_meld.isdisjoint(second_meld):
+                if third_meld & first_two_melds:
                     continue
-                meld_cluster_3 = [first_meld_list, second_meld_list, third_meld_list]
-                result.append(meld_cluster_3)
-    return result
+                result.append((first_meld, second_meld, third_meld))
+    return tuple(result)
+
+
+@lru_cache(maxsize=1 << 16)
+def get_meld_cluster_masks(hand_mask: int) -> Tuple[Tuple[int, ...], ...]:
+    ''' Return the meld_clusters of a hand_mask as tuples of meld_masks
+
+    The clusters are enumerated in the order of get_meld_clusters for a hand whose
+    cards of a four of a kind are in suit order.
+    '''
+    return _get_meld_cluster_masks(get_run_meld_masks(hand_mask) + get_set_meld_masks(hand_mask))
+
+
+def _get_best_meld_cluster_masks(hand_mask: int, meld_clusters) -> Tuple[int, Tuple[Tuple[int, ...], ...]]:
+    best_deadwood_count = get_mask_deadwood_count(hand_mask)
+    best_meld_clusters = []
+    for meld_cluster in meld_clusters:
+        meld_cards = 0
+        for meld_mask in meld_cluster:
+            meld_cards |= meld_mask
+        deadwood_count = get_mask_deadwood_count(hand_mask ^ meld_cards)
+        if deadwood_count < best_deadwood_count:
+            best_deadwood_count = deadwood_count
+            best_meld_clusters = [meld_cluster]
+        elif deadwood_count == best_deadwood_count:
+            best_meld_clusters.append(meld_cluster)
+    return best_deadwood_count, tuple(best_meld_clusters)
+
+
+@lru_cache(maxsize=1 << 16)
+def get_best_meld_cluster_masks(hand_mask: int) -> Tuple[int, Tuple[Tuple[int, ...], ...]]:
+    ''' Return the minimum deadwood count of a hand_mask and the meld_clusters that reach it
+
+    The deadwood count of a hand without meld_clusters is the count of the whole hand.
+    '''
+    return _get_best_meld_cluster_masks(hand_mask, get_meld_cluster_masks(hand_mask))
+
+
+def get_best_deadwood_count(hand: List[Card]) -> int:
+    return get_best_meld_cluster_masks(get_hand_mask(hand))[0]
+
+
+def _get_meld_clusters_from_masks(meld_clusters) -> List[List[List[Card]]]:
+    return [[get_cards(meld_mask) for meld_mask in meld_cluster] for meld_cluster in meld_clusters]
+
+
+def _get_hand_meld_cluster_masks(hand: List[Card], hand_mask: int) -> Tuple[Tuple[int, ...], ...]:
+    # the order of the sets of a four of a kind depends on the order of the hand
+    if _has_four_of_a_kind(hand_mask):
+        return _get_meld_cluster_masks(get_run_meld_masks(hand_mask) + get_set_meld_masks(hand_mask, hand))
+    return get_meld_cluster_masks(hand_mask)
+
+
+def get_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
+    return _get_meld_clusters_from_masks(_get_hand_meld_cluster_masks(hand, get_hand_mask(hand)))
 
 
 def get_best_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
     if len(hand) != 10:
         raise GinRummyProgramError("Hand contain {} cards: should be 10 cards.".format(len(hand)))
-    result = []  # type: List[List[List[Card]]]
-    meld_clusters = get_meld_clusters(hand=hand)  # type: List[List[List[Card]]]
-    meld_clusters_count = len(meld_clusters)
-    if meld_clusters_count > 0:
-        deadwood_counts = [utils.get_deadwood_count(hand=hand, meld_cluster=meld_cluster)
-                           for meld_cluster in meld_clusters]
-        best_deadwood_count = min(deadwood_counts)
-        for i in range(meld_clusters_count):
-            if deadwood_counts[i] == best_deadwood_count:
-                result.append(meld_clusters[i])
-    return result
+    hand_mask = get_hand_mask(hand)
+    if _has_four_of_a_kind(hand_mask):
+        _, best_meld_clusters = _get_best_meld_cluster_masks(hand_mask, _get_hand_meld_cluster_masks(hand, hand_mask))
+    else:
+        _, best_meld_clusters = get_best_meld_cluster_masks(hand_mask)
+    return _get_meld_clusters_from_masks(best_meld_clusters)
 
 
 def get_all_run_melds(hand: List[Card]) -> List[List[Card]]:
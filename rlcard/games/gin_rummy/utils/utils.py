@@ -52,10 +52,11 @@ def get_card(card_id: int):
     return _deck[card_id]
 
 
+_card_ids = {card.get_index(): card_id for card_id, card in enumerate(_deck)}
+
+
 def get_card_id(card: Card) -> int:
-    rank_id = get_rank_id(card)
-    suit_id = get_suit_id(card)
-    return rank_id + 13 * suit_id
+    return _card_ids[card.get_index()]
 
 
 def get_rank_id(card: Card) -> int:
@@ -105,3 +106,17 @@ def encode_cards(cards: List[Card]) -> np.ndarray:
         card_id = get_card_id(card)
         plane[card_id] = 1
     return plane
+
+
+def encode_masks(masks: List[int]) -> np.ndarray:
+    ''' Encode 52-bit card masks (bit card_id set for each card) as planes
+
+    Args:
+        masks: list of int, one mask per plane
+
+    Returns:
+        numpy array: len(masks) * 52 array, same as encode_cards for each mask
+    '''
+    mask_bytes = np.array(masks, dtype='<u8').view(np.uint8)
+    planes = np.unpackbits(mask_bytes, bitorder='little').reshape(len(masks), 64)
+    return planes[:, :52].astype(int)
@@ -0,0 +1,321 @@
+'''
+    File name: leducholdem/tree.py
+
+    Compiles the full game tree of Leduc Hold'em, chance nodes included, into
+    flat numpy arrays, so that solvers, best responses and policy evaluation
+    run as vectorized passes over the nodes instead of walking the game with
+    step and step_back.
+
+    The nodes are sorted by depth, so that every parent comes before its
+    children, and the nodes of a depth are contiguous (see level_offsets).
+    There are three kinds of nodes:
+        1) chance nodes: the deal of the hands and of the small blind, and the public card
+        2) decision nodes: one player acts, with the actions of the env
+           (call, raise, fold, check) as edges
+        3) terminal nodes, with the payoffs of the env
+
+    Info sets are keyed with perfect recall by the player, the small blind, the
+    ranks of the hand and of the public card and the actions so far.
+'''
+
+import json
+from collections import OrderedDict
+from itertools import permutations
+
+import numpy as np
+
+from rlcard.games.base import Card
+
+CHANCE = -1
+TERMINAL = -2
+
+ACTIONS = ['call', 'raise', 'fold', 'check']
+
+
+class LeducholdemTree:
+    ''' The flat arrays of a compiled Leduc Hold'em game tree
+
+    Node arrays, of length num_nodes:
+        node_player: the acting player, CHANCE or TERMINAL
+        parent: the parent node, -1 for the root
+        parent_action: the action from the parent, or the index of the chance outcome
+        depth: the depth of the node
+        chance_probs: the probability of the edge from a chance parent, 1 otherwise
+        chance_reach: the product of the chance probabilities from the root
+        info_set: the info set of a decision node, -1 otherwise
+        legal_mask: (num_nodes, num_actions) the legal actions of a decision node
+        children: (num_nodes, num_actions) the child by action of a decision node, -1 otherwise
+        child_offsets: (num_nodes + 1) the children of node i, chance nodes
+            included, are child_ids[child_offsets[i]:child_offsets[i + 1]]
+        payoffs: (num_nodes, num_players) the payoffs of a terminal node, 0 otherwise
+
+    Info set arrays, of length num_info_sets:
+        info_set_keys: the perfect recall keys
+        info_set_player: the acting player
+        info_set_legal_mask: (num_info_sets, num_actions) the legal actions
+        info_set_obs: (num_info_sets, state_size) the observations of the env
+        info_set_raw_obs: the raw observations of the env, as JSON
+    '''
+
+    ARRAYS = ['node_player', 'parent', 'parent_action', 'depth', 'chance_probs', 'chance_reach', 'info_set',
+              'legal_mask', 'children', 'child_offsets', 'child_ids', 'payoffs', 'level_offsets',
+              'info_set_keys', 'info_set_player', 'info_set_legal_mask', 'info_set_obs', 'info_set_raw_obs']
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.num_nodes = len(self.node_player)
+        self.num_players = self.payoffs.shape[1]
+        self.num_actions = self.legal_mask.shape[1]
+        self.num_info_sets = len(self.info_set_keys)
+
+    def get_level(self, depth):
+        ''' Get the nodes at a depth
+
+        Returns:
+            (slice): The nodes, which are contiguous
+        '''
+        return slice(self.level_offsets[depth], self.level_offsets[depth + 1])
+
+    def get_state(self, info_set):
+        ''' Get the state of an info set, as extracted by the env
+
+        Args:
+            info_set (int): The info set id
+
+        Returns:
+            (dict): The state, to pass to the step and eval_step of the agents
+        '''
+        raw_obs = json.loads(str(self.info_set_raw_obs[info_set]))
+        state = {}
+        state['legal_actions'] = OrderedDict({ACTIONS.index(a): None for a in raw_obs['legal_actions']})
+        state['obs'] = self.info_set_obs[info_set].astype(np.float64)
+        state['raw_obs'] = raw_obs
+        state['raw_legal_actions'] = list(raw_obs['legal_actions'])
+        state['action_record'] = []
+        return state
+
+    def get_policy(self, agents):
+        ''' Query the action probabilities of agents, once per info set
+
+        The probabilities are info['probs'] of eval_step. For the agents that
+        do not give them, such as DQNAgent, the action of eval_step is played
+        with probability 1, and illegal actions are replaced as the env does.
+        The agents with an eval_step_batch method are queried for all their
+        info sets at once.
+
+        Args:
+            agents (list): The agents of the players
+
+        Returns:
+            (numpy.array): (num_info_sets, num_actions) action probabilities
+        '''
+        policy = np.zeros((self.num_info_sets, self.num_actions))
+        for player_id, agent in enumerate(agents):
+            if not hasattr(agent, 'eval_step_batch'):
+                continue
+            rows = np.flatnonzero(self.info_set_player == player_id)
+            actions, info = agent.eval_step_batch(self.info_set_obs[rows].astype(np.float64), self.info_set_legal_mask[rows])
+            if 'probs' in info:
+                policy[rows] = info['probs']
+            else:
+                policy[rows, actions] = 1
+
+        for info_set in range(self.num_info_sets):
+            agent = agents[self.info_set_player[info_set]]
+            if hasattr(agent, 'eval_step_batch'):
+                continue
+            state = self.get_state(info_set)
+            action, info = agent.eval_step(state)
+            if isinstance(info, dict) and 'probs' in info:
+                for raw_action, prob in info['probs'].items():
+                    policy[info_set, ACTIONS.index(raw_action)] = prob
+                continue
+            raw_action = action if agent.use_raw else ACTIONS[action]
+            if raw_action not in state['raw_legal_actions']:
+                raw_action = 'check' if 'check' in state['raw_legal_actions'] else 'fold'
+            policy[info_set, ACTIONS.index(raw_action)] = 1
+        return policy
+
+    def get_reach_probs(self, policy):
+        ''' Get the probabilities to reach the nodes, one level at a time
+
+        Args:
+            policy (numpy.array): (num_info_sets, num_actions) action probabilities
+
+        Returns:
+            (numpy.array): (num_nodes,) reach probabilities, chance included
+        '''
+        edge_probs = self.chance_probs.copy()
+        decision = np.flatnonzero(self.node_player[self.parent] >= 0)
+        decision = decision[decision > 0]
+        edge_probs[decision] = policy[self.info_set[self.parent[decision]], self.parent_action[decision]]
+        reach_probs = np.ones(self.num_nodes)
+        for depth in range(1, len(self.level_offsets) - 1):
+            level = self.get_level(depth)
+            reach_probs[level] = reach_probs[self.parent[level]] * edge_probs[level]
+        return reach_probs
+
+    def get_expected_payoffs(self, policy):
+        ''' Get the expected payoffs of the players under a policy
+
+        Args:
+            policy (numpy.array): (num_info_sets, num_actions) action probabilities
+
+        Returns:
+            (numpy.array): (num_players,) expected payoffs
+        '''
+        return self.get_reach_probs(policy) @ self.payoffs
+
+    def save(self, path):
+        ''' Save the arrays to a .npz file
+        '''
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        ''' Load a tree saved by save
+        '''
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in cls.ARRAYS})
+
+
+def compile_leducholdem_tree(env):
+    ''' Expand the full game tree of Leduc Hold'em
+
+    Args:
+        env (LeducholdemEnv): An env with allow_step_back, whose game is played
+            through step and step_back, as with CFRAgent
+
+    Returns:
+        (LeducholdemTree): The tree
+    '''
+    if not env.allow_step_back:
+        raise ValueError('Leduc tree compiler needs allow_step_back')
+    game = env.game
+    num_players = env.num_players
+    deck = [Card('S', 'J'), Card('H', 'J'), Card('S', 'Q'), Card('H', 'Q'), Card('S', 'K'), Card('H', 'K')]
+
+    nodes = []
+    info_sets = {}
+    info_set_rows = []
+
+    def add_node(player, parent, parent_action, chance_prob):
+        nodes.append({'player': player, 'parent': parent, 'parent_action': parent_action,
+                      'depth': nodes[parent]['depth'] + 1 if parent >= 0 else 0,
+                      'chance_prob': chance_prob, 'children': [], 'info_set': -1, 'payoffs': None})
+        if parent >= 0:
+            nodes[parent]['children'].append(len(nodes) - 1)
+        return len(nodes) - 1
+
+    def expand(parent, parent_action, chance_prob, deal_public, small_blind, history):
+        ''' Add the node of the current state of the game and its subtree
+        '''
+        if game.is_over():
+            node = add_node(TERMINAL, parent, parent_action, chance_prob)
+            nodes[node]['payoffs'] = game.get_payoffs()
+            return
+        if deal_public:
+            # the first round just ended, deal each public card
+            node = add_node(CHANCE, parent, parent_action, chance_prob)
+            hands = [player.hand for player in game.players]
+            public_cards = [card for card in deck if card not in hands]
+            for outcome, card in enumerate(public_cards):
+                game.public_card = card
+                expand(node, outcome, 1 / len(public_cards), False, small_blind, history + '/')
+            return
+
+        player_id = game.game_pointer
+        node = add_node(player_id, parent, parent_action, chance_prob)
+        state = game.get_state(player_id)
+        public_rank = game.public_card.rank if game.public_card else ''
+        key = '{}:{}:{}:{}:{}'.format(player_id, small_blind, game.players[player_id].hand.rank, public_rank, history)
+        if key not in info_sets:
+            info_sets[key] = len(info_sets)
+            info_set_rows.append((player_id, state, env._extract_state(state)['obs']))
+        nodes[node]['info_set'] = info_sets[key]
+        for action in state['legal_actions']:
+            round_counter = game.round_counter
+            game.step(action)
+            expand(node, ACTIONS.index(action), 1.0, game.round_counter > round_counter == 0, small_blind, history + action[0])
+            game.step_back()
+
+    root = add_node(CHANCE, -1, -1, 1.0)
+    deals = [(small_blind, hands) for small_blind in range(num_players) for hands in permutations(deck, num_players)]
+    for outcome, (small_blind, hands) in enumerate(deals):
+        env.reset()
+        _deal(game, small_blind, hands)
+        expand(root, outcome, 1 / len(deals), False, small_blind, '')
+
+    return _build_tree(nodes, info_sets, info_set_rows, num_players)
+
+
+def _deal(game, small_blind, hands):
+    ''' Set the chance outcomes of LeducholdemGame.init_game
+    '''
+    for player, hand in zip(game.players, hands):
+        player.hand = hand
+        player.in_chips = 0
+    game.players[(small_blind + 1) % game.num_players].in_chips = game.big_blind
+    game.players[small_blind].in_chips = game.small_blind
+    game.game_pointer = small_blind
+    game.round.start_new_round(game_pointer=small_blind, raised=[player.in_chips for player in game.players])
+    game.history = []
+
+
+def _build_tree(nodes, info_sets, info_set_rows, num_players):
+    ''' Sort the nodes by depth and pack them into arrays
+    '''
+    num_actions = len(ACTIONS)
+    order = sorted(range(len(nodes)), key=lambda i: nodes[i]['depth'])
+    index = np.empty(len(nodes), dtype=np.int64)
+    index[order] = np.arange(len(nodes))
+
+    num_nodes = len(nodes)
+    node_player = np.empty(num_nodes, dtype=np.int8)
+    parent = np.empty(num_nodes, dtype=np.int32)
+    parent_action = np.empty(num_nodes, dtype=np.int16)
+    depth = np.empty(num_nodes, dtype=np.int16)
+    chance_probs = np.empty(num_nodes)
+    info_set = np.empty(num_nodes, dtype=np.int32)
+    legal_mask = np.zeros((num_nodes, num_actions), dtype=bool)
+    children = np.full((num_nodes, num_actions), -1, dtype=np.int32)
+    child_offsets = np.zeros(num_nodes + 1, dtype=np.int32)
+    child_ids = []
+    payoffs = np.zeros((num_nodes, num_players))
+    for new, old in enumerate(order):
+        node = nodes[old]
+        node_player[new] = node['player']
+        parent[new] = index[node['parent']] if node['parent'] >= 0 else -1
+        parent_action[new] = node['parent_action']
+        depth[new] = node['depth']
+        chance_probs[new] = node['chance_prob']
+        info_set[new] = node['info_set']
+        node_children = [int(index[child]) for child in node['children']]
+        child_ids.extend(node_children)
+        child_offsets[new + 1] = len(child_ids)
+        if node['player'] >= 0:
+            for child, old_child in zip(node_children, node['children']):
+                children[new, nodes[old_child]['parent_action']] = child
+            legal_mask[new] = children[new] >= 0
+        if node['payoffs'] is not None:
+            payoffs[new] = node['payoffs']
+
+    chance_reach = np.ones(num_nodes)
+    for new in range(1, num_nodes):
+        chance_reach[new] = chance_reach[parent[new]] * chance_probs[new]
+    level_offsets = np.searchsorted(depth, np.arange(depth[-1] + 2)).astype(np.int32)
+
+    info_set_player = np.array([row[0] for row in info_set_rows], dtype=np.int8)
+    info_set_legal_mask = np.array([[action in row[1]['legal_actions'] for action in ACTIONS] for row in info_set_rows], dtype=bool)
+    info_set_obs = np.array([row[2] for row in info_set_rows], dtype=np.int8)
+    info_set_keys = np.array(sorted(info_sets, key=info_sets.get))
+    info_set_raw_obs = np.array([json.dumps(row[1]) for row in info_set_rows])
+
+    return LeducholdemTree(node_player=node_player, parent=parent, parent_action=parent_action, depth=depth,
+                           chance_probs=chance_probs, chance_reach=chance_reach, info_set=info_set,
+                           legal_mask=legal_mask, children=children, child_offsets=child_offsets,
+                           child_ids=np.array(child_ids, dtype=np.int32), payoffs=payoffs, level_offsets=level_offsets,
+                           info_set_keys=info_set_keys, info_set_player=info_set_player,
+                           info_set_legal_mask=info_set_legal_mask, info_set_obs=info_set_obs,
+                           info_set_raw_obs=info_set_raw_obs)
@@ -2,7 +2,8 @@
 ''' Implement Mahjong Judger class
 '''
 from collections import defaultdict
-import numpy as np
+
+from rlcard.games.mahjong.utils import card_encoding_dict, count_melds
 
 class MahjongJudger:
     ''' Determine what cards a player can play
@@ -23,20 +24,15 @@ class MahjongJudger:
 
         '''
         last_card = dealer.table[-1]
-        last_card_str = last_card.get_str()
-        #last_card_value = last_card_str.split("-")[-1]
-        #last_card_type = last_card_str.split("-")[0]
+        tile = card_encoding_dict[last_card.get_str()]
         for player in players:
-            hand = [card.get_str() for card in player.hand]
-            hand_dict = defaultdict(list)
-            for card in hand:
-                hand_dict[card.split("-")[0]].append(card.split("-")[1])
-            #pile = player.pile
+            if last_player == player.player_id:
+                continue
             # check gong
-            if hand.count(last_card_str) == 3 and last_player != player.player_id:
+            if player.counts[tile] == 3:
                 return 'gong', player, [last_card]*4
             # check pong
-            if hand.count(last_card_str) == 2 and last_player != player.player_id:
+            if player.counts[tile] == 2:
                 return 'pong', player, [last_card]*3
         return False, None, None
 
@@ -47,48 +43,33 @@ class MahjongJudger:
             players (list): List of all players
             last_player (int): The player id of last player
         '''
-
         last_card = dealer.table[-1]
-        last_card_str = last_card.get_str()
-        last_card_type = last_card_str.split("-")[0]
+        if last_card.type == 'dragons' or last_card.type == 'winds':
+            return False, None, None
+        tile = card_encoding_dict[last_card.get_str()]
         last_card_index = last_card.index_num
+        # The chow is formed with the two cards above the lowest card, and with
+        # the two cards below the other cards. The second card can not chow.
+        if last_card_index == 0:
+            test_case = [last_card_index+1, last_card_index+2]
+        elif last_card_index >= 2:
+            test_case = [last_card_index-2, last_card_index-1]
+        else:
+            return False, None, None
         for player in players:
-            if last_card_type != "dragons" and last_card_type != "winds" and last_player == player.get_player_id() - 1:
-                # Create 9 dimensional vector where each dimension represent a specific card with the type same as last_card_type
-                # Numbers in each dimension represent how many of that card the player has it in hand
-                # If the last_card_type is 'characters' for example, and the player has cards: characters_3, characters_6, characters_3,
-                # The hand_list vector looks like: [0,0,2,0,0,1,0,0,0]
-                hand_list = np.zeros(9)
-
+            if last_player != player.get_player_id() - 1:
+                continue
+            # player.counts holds how many copies of each card the player has in hand
+            if not all(player.counts[tile - last_card_index + i] > 0 for i in test_case):
+                continue
+            cards = []
+            for i in test_case:
                 for card in player.hand:
-                    if card.get_str().split("-")[0] == last_card_type:
-                        hand_list[card.index_num] = hand_list[card.index_num]+1
-
-                #pile = player.pile
-                #check chow
-                test_cases = []
-                if last_card_index == 0:
-                    if hand_list[last_card_index+1] > 0 and hand_list[last_card_index+2] > 0:
-                        test_cases.append([last_card_index+1, last_card_index+2])
-                elif last_card_index < 9:
-                    if hand_list[last_card_index-2] > 0 and hand_list[last_card_index-1] > 0:
-                        test_cases.append([last_card_index-2, last_card_index-1])
-                else:
-                    if hand_list[last_card_index-1] > 0 and hand_list[last_card_index+1] > 0:
-                        test_cases.append([last_card_index-1, last_card_index+1])
-
-                if not test_cases:
-                    continue        
-
-                for l in test_cases:
-                    cards = []
-                    for i in l:
-                        for card in player.hand:
-                            if card.index_num == i and card.get_str().split("-")[0] == last_card_type:
-                                cards.append(card)
-                                break
-                    cards.append(last_card)
-                    return 'chow', player, cards
+                    if card.index_num == i and card.type == last_card.type:
+                        cards.append(card)
+                        break
+            cards.append(last_card)
+            return 'chow', player, cards
         return False, None, None
 
     def judge_game(self, game):
@@ -113,6 +94,11 @@ class MahjongJudger:
 
     def judge_hu(self, player):
         ''' Judge whether the player has win the game
+
+        The 34-slot count array of the hand is decomposed suit by suit, so
+        every split of the hand into a pair and melds is considered rather
+        than the greedy one found by cal_set.
+
         Args:
             player (object): Target player
 
@@ -120,33 +106,14 @@ class MahjongJudger:
             Result (bool): Win or not
             Maximum_score (int): Set count score of the player
         '''
-        set_count = 0
-        hand = [card.get_str() for card in player.hand]
-        count_dict = {card: hand.count(card) for card in hand}
         set_count = len(player.pile)
         if set_count >= 4:
             return True, set_count
-        used = []
-        maximum = 0
-        for each in count_dict:
-            if each in used:
-                continue
-            tmp_set_count = 0
-            tmp_hand = hand.copy()
-            if count_dict[each] == 2:
-                for _ in range(count_dict[each]):
-                    tmp_hand.pop(tmp_hand.index(each))
-                tmp_set_count, _set = self.cal_set(tmp_hand)
-                used.extend(_set)
-                if tmp_set_count + set_count > maximum:
-                    maximum = tmp_set_count + set_count
-                if tmp_set_count + set_count >= 4:
-                    #print(player.get_player_id(), sorted([card.get_str() for card in player.hand]))
-                    #print([[c.get_str() for c in s] for s in player.pile])
-                    #print(len(player.hand), sum([len(s) for s in player.pile]))
-                    #exit()
-                    return True, maximum
-        return False, maximum
+        _, pair_melds = count_melds(player.counts)
+        if pair_melds < 0:
+            return False, 0
+        maximum = pair_melds + set_count
+        return maximum >= 4, maximum
 
     @staticmethod
     def check_consecutive(_list):
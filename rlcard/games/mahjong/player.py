@@ -1,3 +1,5 @@
+from rlcard.games.mahjong.utils import card_encoding_dict
+
 
 class MahjongPlayer:
 
@@ -11,6 +13,8 @@ class MahjongPlayer:
         self.player_id = player_id
         self.hand = []
         self.pile = []
+        # 34-slot count array of the hand, kept in sync with self.hand
+        self.counts = [0] * 34
 
     def get_player_id(self):
         ''' Return the id of the player
@@ -28,13 +32,33 @@ class MahjongPlayer:
         '''
         print([[c.get_str() for c in s]for s in self.pile])
 
+    def add_card(self, card):
+        ''' Add one card to the hand
+        Args:
+            Card (object): The card to be added.
+        '''
+        self.hand.append(card)
+        self.counts[card_encoding_dict[card.get_str()]] += 1
+
+    def remove_card(self, card):
+        ''' Remove one card from the hand
+        Args:
+            Card (object): The card to be removed.
+
+        Return:
+            Card (object): The removed card
+        '''
+        card = self.hand.pop(self.hand.index(card))
+        self.counts[card_encoding_dict[card.get_str()]] -= 1
+        return card
+
     def play_card(self, dealer, card):
         ''' Play one card
         Args:
             dealer (object): Dealer
             Card (object): The card to be play.
         '''
-        card = self.hand.pop(self.hand.index(card))
+        card = self.remove_card(card)
         dealer.table.append(card)
 
     def chow(self, dealer, cards):
@@ -46,7 +70,7 @@ class MahjongPlayer:
         last_card = dealer.table.pop(-1)
         for card in cards:
             if card in self.hand and card != last_card:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(card)
         self.pile.append(cards)
 
     def gong(self, dealer, cards):
@@ -57,7 +81,7 @@ class MahjongPlayer:
         '''
         for card in cards:
             if card in self.hand:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(card)
         self.pile.append(cards)
 
     def pong(self, dealer, cards):
@@ -68,5 +92,5 @@ class MahjongPlayer:
         '''
         for card in cards:
             if card in self.hand:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(card)
         self.pile.append(cards)
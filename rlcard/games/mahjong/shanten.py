@@ -0,0 +1,292 @@
+''' Shanten number and tile efficiency for Mahjong
+
+The shanten number is the number of tiles a hand is away from being ready
+(tenpai). A complete hand has shanten -1 and a ready hand has shanten 0.
+For a hand that still needs M melds and a pair it is computed as
+2 * (M - melds) - partials - pair, where melds + partials <= M.
+
+A hand is split into four groups (bamboo, characters, dots and honors).
+For each group a lookup table gives, for every (pair, melds) combination,
+the maximum number of partials. The tables are keyed by the count
+signature of the group and filled the first time a signature is seen.
+Merging the tables of two groups is memoized as well, so evaluating a
+hand costs a handful of dictionary lookups.
+'''
+from functools import lru_cache
+
+from rlcard.games.mahjong.utils import cards2counts
+
+GROUPS = ((0, 9, False), (9, 18, False), (18, 27, False), (27, 34, True))
+
+# Tables are tuples of two rows (without / with pair) of five columns (0-4 melds).
+# Each entry is the maximum number of partials, -1 if infeasible.
+EMPTY_TABLE = ((0, -1, -1, -1, -1), (-1, -1, -1, -1, -1))
+
+
+def _update(result, child, melds, partials, pair):
+    for p in range(2 - pair):
+        row = child[p]
+        target = result[p + pair]
+        for m in range(5):
+            if row[m] < 0:
+                continue
+            new_m = min(m + melds, 4)
+            new_t = min(row[m] + partials, 4)
+            if new_t > target[new_m]:
+                target[new_m] = new_t
+
+
+@lru_cache(maxsize=None)
+def get_group_table(counts, honors):
+    ''' Get the lookup table of one group
+
+    Args:
+        counts (tuple): Count signature of the group, 9 slots for a
+            numbered suit and 7 slots for the honors
+        honors (boolean): True if the group is the honors (no chows)
+
+    Returns:
+        table (tuple): table[p][m] is the maximum number of partials with
+            m melds (capped at 4) and p pairs, -1 if infeasible
+    '''
+    size = len(counts)
+    i = 0
+    while i < size and counts[i] == 0:
+        i += 1
+    if i == size:
+        return EMPTY_TABLE
+    result = [[-1] * 5, [-1] * 5]
+    rest = list(counts)
+
+    def branch(used, melds, partials, pair):
+        for j in used:
+            rest[j] -= 1
+        _update(result, get_group_table(tuple(rest), honors), melds, partials, pair)
+        for j in used:
+            rest[j] += 1
+
+    # The lowest tile is isolated, in a pong or a pair
+    branch((i,), 0, 0, 0)
+    if counts[i] >= 3:
+        branch((i, i, i), 1, 0, 0)
+    if counts[i] >= 2:
+        branch((i, i), 0, 0, 1)
+        branch((i, i), 0, 1, 0)
+    # Or it starts a chow or a partial chow
+    if not honors:
+        if i + 1 < size and counts[i+1] > 0:
+            branch((i, i+1), 0, 1, 0)
+            if i + 2 < size and counts[i+2] > 0:
+                branch((i, i+1, i+2), 1, 0, 0)
+        if i + 2 < size and counts[i+2] > 0:
+            branch((i, i+2), 0, 1, 0)
+    return (tuple(result[0]), tuple(result[1]))
+
+
+@lru_cache(maxsize=1 << 16)
+def merge_tables(a, b):
+    ''' Merge the tables of two disjoint groups
+
+    Args:
+        a (tuple): Table of the first group
+        b (tuple): Table of the second group
+
+    Returns:
+        table (tuple): Table of the union of both groups
+    '''
+    result = [[-1] * 5, [-1] * 5]
+    for pa in range(2):
+        for pb in range(2 - pa):
+            target = result[pa + pb]
+            row_b = b[pb]
+            for ma, ta in enumerate(a[pa]):
+                if ta < 0:
+                    continue
+                for mb, tb in enumerate(row_b):
+                    if tb < 0:
+                        continue
+                    m = min(ma + mb, 4)
+                    t = min(ta + tb, 4)
+                    if t > target[m]:
+                        target[m] = t
+    return (tuple(result[0]), tuple(result[1]))
+
+
+@lru_cache(maxsize=1 << 12)
+def table_shanten(table, num_melds=4):
+    ''' Get the shanten number from the table of a whole hand
+
+    Args:
+        table (tuple): Table of the whole hand
+        num_melds (int): The number of melds the hand still needs
+
+    Returns:
+        shanten (int): The shanten number
+    '''
+    best = 2 * num_melds
+    for p in range(2):
+        for m, t in enumerate(table[p]):
+            if t < 0:
+                continue
+            m = min(m, num_melds)
+            t = min(t, num_melds - m)
+            shanten = 2 * (num_melds - m) - t - p
+            if shanten < best:
+                best = shanten
+    return best
+
+
+def get_group_tables(counts):
+    ''' Get the tables of the four groups of a 34-slot count array
+    '''
+    return [get_group_table(tuple(counts[start:end]), honors) for start, end, honors in GROUPS]
+
+
+def calculate_shanten(counts, num_melds=4):
+    ''' Calculate the shanten number of a hand
+
+    Args:
+        counts (list): 34-slot count array of the hand, see cards2counts
+        num_melds (int): The number of melds the hand still needs, i.e.,
+            4 minus the number of melds in the player's pile
+
+    Returns:
+        shanten (int): The shanten number, -1 for a complete hand
+    '''
+    tables = get_group_tables(counts)
+    table = merge_tables(merge_tables(tables[0], tables[1]), merge_tables(tables[2], tables[3]))
+    return table_shanten(table, num_melds)
+
+
+def _get_rest_tables(tables):
+    ''' For each group, the merged table of the other three groups
+    '''
+    rest = []
+    for g in range(4):
+        table = EMPTY_TABLE
+        for h in range(4):
+            if h != g:
+                table = merge_tables(table, tables[h])
+        rest.append(table)
+    return rest
+
+
+def _is_connected(group, offset, honors):
+    ''' Whether a drawn tile can be used with the tiles held in its group
+    '''
+    if group[offset] > 0:
+        return True
+    if honors:
+        return False
+    for j in range(max(0, offset - 2), min(9, offset + 3)):
+        if group[j] > 0:
+            return True
+    return False
+
+
+def get_effective_tiles(counts, num_melds=4, visible=None):
+    ''' Get the tiles that lower the shanten number of a hand when drawn
+
+    Args:
+        counts (list): 34-slot count array of a hand waiting for a tile
+        num_melds (int): The number of melds the hand still needs
+        visible (list): 34-slot count array of the tiles seen outside the
+            hand (table and piles). These copies can not be drawn.
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): The shanten number of the hand
+            (list): 34-slot array with the number of unseen copies of each
+                effective tile, 0 for the other tiles
+    '''
+    tables = get_group_tables(counts)
+    rest_tables = _get_rest_tables(tables)
+    shanten = table_shanten(merge_tables(rest_tables[0], tables[0]), num_melds)
+    effective = [0] * 34
+    for g, (start, end, honors) in enumerate(GROUPS):
+        group = counts[start:end]
+        rest = rest_tables[g]
+        for offset in range(end - start):
+            tile = start + offset
+            remaining = 4 - group[offset]
+            if visible is not None:
+                remaining -= visible[tile]
+            if remaining <= 0 or not _is_connected(group, offset, honors):
+                continue
+            group[offset] += 1
+            table = get_group_table(tuple(group), honors)
+            group[offset] -= 1
+            if table_shanten(merge_tables(rest, table), num_melds) < shanten:
+                effective[tile] = remaining
+    return shanten, effective
+
+
+def get_discard_shanten(counts, num_melds=4):
+    ''' Get the shanten number after discarding each tile of a hand
+
+    Args:
+        counts (list): 34-slot count array of a hand that has to discard
+        num_melds (int): The number of melds the hand still needs
+
+    Returns:
+        discards (dict): Tile index -> shanten number after discarding it
+    '''
+    tables = get_group_tables(counts)
+    rest_tables = _get_rest_tables(tables)
+    discards = {}
+    for g, (start, end, honors) in enumerate(GROUPS):
+        group = counts[start:end]
+        rest = rest_tables[g]
+        for offset in range(end - start):
+            if group[offset] == 0:
+                continue
+            group[offset] -= 1
+            table = get_group_table(tuple(group), honors)
+            group[offset] += 1
+            discards[start + offset] = table_shanten(merge_tables(rest, table), num_melds)
+    return discards
+
+
+def get_best_discards(counts, num_melds=4, visible=None):
+    ''' Get the discards that keep the lowest shanten number
+
+    Args:
+        counts (list): 34-slot count array of a hand that has to discard
+        num_melds (int): The number of melds the hand still needs
+        visible (list): 34-slot count array of the tiles seen outside the hand
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): The lowest shanten number after a discard
+            (dict): Tile index of each best discard -> 34-slot array of the
+                unseen effective tiles after discarding it
+    '''
+    discards = get_discard_shanten(counts, num_melds)
+    shanten = min(discards.values())
+    best = {}
+    for tile, tile_shanten in discards.items():
+        if tile_shanten != shanten:
+            continue
+        counts[tile] -= 1
+        _, best[tile] = get_effective_tiles(counts, num_melds, visible)
+        counts[tile] += 1
+    return shanten, best
+
+
+def get_visible_counts(table, players_pile):
+    ''' Count the tiles seen on the table and in all the piles
+
+    Args:
+        table (list): The cards on the table
+        players_pile (dict): Player id -> list of melds
+
+    Returns:
+        visible (list): 34-slot count array
+    '''
+    cards = list(table)
+    for pile in players_pile.values():
+        for meld in pile:
+            cards.extend(meld)
+    return cards2counts(cards)
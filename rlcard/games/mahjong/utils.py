@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 from rlcard.games.mahjong.card import MahjongCard as Card
 
@@ -73,3 +75,111 @@ def encode_cards(cards):
         num = cards.count(card)
         plane[index][:num] = 1
     return plane
+
+
+def cards2counts(cards):
+    ''' Convert cards into a 34-slot count array
+
+    Args:
+        cards (list): List of MahjongCard objects
+
+    Returns:
+        counts (list): counts[i] is the number of copies of the tile
+            with encoding i (see card_encoding_dict) in cards
+    '''
+    counts = [0] * 34
+    for card in cards:
+        counts[card_encoding_dict[card.get_str()]] += 1
+    return counts
+
+
+@lru_cache(maxsize=1 << 16)
+def decompose_suit(counts):
+    ''' Decompose the tiles of one numbered suit into melds and a pair
+
+    The lowest remaining tile is either left unused, used in a pong, used
+    as the first tile of a chow, or used as the pair. Exploring all four
+    branches gives the exact optimum, unlike a greedy pong-first scan.
+    Results are memoized on the 9-slot count signature of the suit.
+
+    Args:
+        counts (tuple): 9 counts, one for each trait of the suit
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): Maximum number of melds without a pair
+            (int): Maximum number of melds with exactly one pair, -1 if no pair
+    '''
+    i = 0
+    while i < 9 and counts[i] == 0:
+        i += 1
+    if i == 9:
+        return 0, -1
+    rest = list(counts)
+
+    # Leave one copy of the lowest tile unused
+    rest[i] -= 1
+    best, best_pair = decompose_suit(tuple(rest))
+    rest[i] += 1
+
+    # Pong
+    if counts[i] >= 3:
+        rest[i] -= 3
+        melds, pair_melds = decompose_suit(tuple(rest))
+        rest[i] += 3
+        best = max(best, melds + 1)
+        if pair_melds >= 0:
+            best_pair = max(best_pair, pair_melds + 1)
+
+    # Chow
+    if i < 7 and counts[i+1] > 0 and counts[i+2] > 0:
+        rest[i] -= 1
+        rest[i+1] -= 1
+        rest[i+2] -= 1
+        melds, pair_melds = decompose_suit(tuple(rest))
+        rest[i] += 1
+        rest[i+1] += 1
+        rest[i+2] += 1
+        best = max(best, melds + 1)
+        if pair_melds >= 0:
+            best_pair = max(best_pair, pair_melds + 1)
+
+    # Pair
+    if counts[i] >= 2:
+        rest[i] -= 2
+        melds, _ = decompose_suit(tuple(rest))
+        best_pair = max(best_pair, melds)
+
+    return best, best_pair
+
+
+def count_melds(counts):
+    ''' Count the melds that can be formed from a 34-slot count array
+
+    Numbered suits are decomposed with the memoized decompose_suit,
+    honors can only form pongs and pairs.
+
+    Args:
+        counts (list): 34-slot count array, see cards2counts
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): Maximum number of disjoint melds
+            (int): Maximum number of disjoint melds together with one pair, -1 if no pair
+    '''
+    groups = [decompose_suit(tuple(counts[0:9])),
+              decompose_suit(tuple(counts[9:18])),
+              decompose_suit(tuple(counts[18:27]))]
+    for count in counts[27:34]:
+        if count:
+            groups.append((count // 3, (count - 2) // 3 if count >= 2 else -1))
+    total = 0
+    for melds, _ in groups:
+        total += melds
+    best_pair = -1
+    for melds, pair_melds in groups:
+        if pair_melds >= 0 and total - melds + pair_melds > best_pair:
+            best_pair = total - melds + pair_melds
+    return total, best_pair
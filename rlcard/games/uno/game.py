@@ -1,4 +1,3 @@
-from copy import deepcopy
 import numpy as np
 
 from rlcard.games.uno import Dealer
@@ -69,13 +68,12 @@ class UnoGame:
         '''
 
         if self.allow_step_back:
-            # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
-
-        self.round.proceed_round(self.players, action)
+            # Record the changes of this step instead of copying the whole game
+            self.round.start_log()
+            self.round.proceed_round(self.players, action)
+            self.history.append(self.round.stop_log())
+        else:
+            self.round.proceed_round(self.players, action)
         player_id = self.round.current_player
         state = self.get_state(player_id)
         return state, player_id
@@ -88,7 +86,7 @@ class UnoGame:
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        self.round.undo(self.players, self.history.pop())
         return True
 
     def get_state(self, player_id):
@@ -101,6 +99,7 @@ class UnoGame:
             (dict): The state of the player
         '''
         state = self.round.get_state(self.players, player_id)
+        state['player_id'] = player_id
         state['num_players'] = self.get_num_players()
         state['current_player'] = self.round.current_player
         return state
@@ -1,3 +1,7 @@
+import numpy as np
+
+from rlcard.games.uno.utils import card2index, WILD_INDEX
+
 
 class UnoPlayer:
 
@@ -11,9 +15,66 @@ class UnoPlayer:
         self.player_id = player_id
         self.hand = []
         self.stack = []
+        # Number of cards of each (color, trait) in hand, see utils.card2index
+        self.counts = [0] * 60
+        # The hand encoded as in utils.encode_hand, kept in sync with the counts
+        self.hand_plane = np.zeros((3, 4, 15), dtype=int)
+        self.hand_plane[0] = 1
 
     def get_player_id(self):
         ''' Return the id of the player
         '''
 
         return self.player_id
+
+    def add_card(self, card):
+        ''' Add a card to the hand
+
+        Args:
+            card (object): object of UnoCard
+        '''
+        self.hand.append(card)
+        index = card2index(card)
+        self.counts[index] += 1
+        self._update_plane(index)
+
+    def insert_card(self, index, card):
+        ''' Insert a card back into the hand
+
+        Args:
+            index (int): The position of the card in the hand
+            card (object): object of UnoCard
+        '''
+        self.hand.insert(index, card)
+        card_index = card2index(card)
+        self.counts[card_index] += 1
+        self._update_plane(card_index)
+
+    def remove_card(self, index):
+        ''' Remove a card from the hand
+
+        Args:
+            index (int): The position of the card in the hand
+
+        Returns:
+            (object): The removed UnoCard
+        '''
+        card = self.hand.pop(index)
+        card_index = card2index(card)
+        self.counts[card_index] -= 1
+        self._update_plane(card_index)
+        return card
+
+    def _update_plane(self, index):
+        ''' Re-encode the plane entries of one card index after its count changed
+        '''
+        count = self.counts[index]
+        plane = self.hand_plane
+        if index >= WILD_INDEX and index < 15:
+            plane[0, :, index] = 0 if count else 1
+            plane[1, :, index] = 1 if count else 0
+        else:
+            color, trait = divmod(index, 15)
+            plane[0, color, trait] = 1 if count == 0 else 0
+            plane[1, color, trait] = 1 if count == 1 else 0
+            plane[2, color, trait] = 1 if count == 2 else 0
@@ -1,5 +1,6 @@
 from rlcard.games.uno.card import UnoCard
-from rlcard.games.uno.utils import cards2list, WILD, WILD_DRAW_4
+from rlcard.games.uno.utils import cards2list, ACTION_LIST, COLOR_MAP, TRAIT_MAP
+from rlcard.games.uno.utils import MATCH_IDS, WILD_IDS, WILD_DRAW_4_IDS, WILD_INDEX, WILD_DRAW_4_INDEX
 
 
 class UnoRound:
@@ -20,6 +21,8 @@ class UnoRound:
         self.played_cards = []
         self.is_over = False
         self.winner = None
+        # Undo log of the current step, None when not recording
+        self.log = None
 
     def flip_top_card(self):
         ''' Flip the top card of the card pile
@@ -70,6 +73,7 @@ class UnoRound:
         if trait == 'wild' or trait == 'wild_draw_4':
             for index, card in enumerate(player.hand):
                 if trait == card.trait:
+                    self._record('color', card, card.color)
                     card.color = color # update the color of wild card to match the action
                     remove_index = index
                     break
@@ -78,11 +82,13 @@ class UnoRound:
                 if color == card.color and trait == card.trait:
                     remove_index = index
                     break
-        card = player.hand.pop(remove_index)
+        card = player.remove_card(remove_index)
+        self._record('remove', player, remove_index, card)
         if not player.hand:
             self.is_over = True
             self.winner = [self.current_player]
         self.played_cards.append(card)
+        self._record('play')
 
         # perform the number action
         if card.type == 'number':
@@ -94,45 +100,26 @@ class UnoRound:
             self._preform_non_number_action(players, card)
 
     def get_legal_actions(self, players, player_id):
-        wild_flag = 0
-        wild_draw_4_flag = 0
-        legal_actions = []
-        wild_4_actions = []
-        hand = players[player_id].hand
+        ''' Get the legal actions of a player from the card counts of the hand
+
+        Args:
+            players (list): The list of UnoPlayer
+            player_id (int): The id of the player
+
+        Returns:
+            (list): The legal actions, ordered as in the action space
+        '''
+        counts = players[player_id].counts
         target = self.target
-        if target.type == 'wild':
-            for card in hand:
-                if card.type == 'wild':
-                    if card.trait == 'wild_draw_4':
-                        if wild_draw_4_flag == 0:
-                            wild_draw_4_flag = 1
-                            wild_4_actions.extend(WILD_DRAW_4)
-                    else:
-                        if wild_flag == 0:
-                            wild_flag = 1
-                            legal_actions.extend(WILD)
-                elif card.color == target.color:
-                    legal_actions.append(card.str)
-
-        # target is aciton card or number card
-        else:
-            for card in hand:
-                if card.type == 'wild':
-                    if card.trait == 'wild_draw_4':
-                        if wild_draw_4_flag == 0:
-                            wild_draw_4_flag = 1
-                            wild_4_actions.extend(WILD_DRAW_4)
-                    else:
-                        if wild_flag == 0:
-                            wild_flag = 1
-                            legal_actions.extend(WILD)
-                elif card.color == target.color or card.trait == target.trait:
-                    legal_actions.append(card.str)
-        if not legal_actions:
-            legal_actions = wild_4_actions
-        if not legal_actions:
-            legal_actions = ['draw']
-        return legal_actions
+        legal_ids = [i for i in MATCH_IDS[COLOR_MAP[target.color] * 15 + TRAIT_MAP[target.trait]] if counts[i]]
+        if counts[WILD_INDEX]:
+            legal_ids.extend(WILD_IDS)
+            legal_ids.sort()
+        if not legal_ids and counts[WILD_DRAW_4_INDEX]:
+            legal_ids = WILD_DRAW_4_IDS
+        if not legal_ids:
+            return ['draw']
+        return [ACTION_LIST[i] for i in legal_ids]
 
     def get_state(self, players, player_id):
         ''' Get player's state
@@ -155,10 +142,69 @@ class UnoRound:
     def replace_deck(self):
         ''' Add cards have been played to deck
         '''
+        if self.log is not None:
+            self._record('replace', list(self.dealer.deck), self.played_cards, self.np_random.get_state())
         self.dealer.deck.extend(self.played_cards)
         self.dealer.shuffle()
         self.played_cards = []
 
+    def start_log(self):
+        ''' Start recording the changes made by one step
+        '''
+        self.log = [(self.current_player, self.direction, self.target, self.is_over, self.winner)]
+
+    def stop_log(self):
+        ''' Stop recording
+
+        Returns:
+            (list): The undo log of the step, see undo
+        '''
+        log = self.log
+        self.log = None
+        return log
+
+    def undo(self, players, log):
+        ''' Revert the changes recorded in an undo log, in reverse order
+
+        Args:
+            players (list): The list of UnoPlayer
+            log (list): The undo log returned by stop_log
+        '''
+        deck = self.dealer.deck
+        for entry in reversed(log[1:]):
+            op = entry[0]
+            if op == 'play':
+                self.played_cards.pop()
+            elif op == 'remove':
+                _, player, index, card = entry
+                player.insert_card(index, card)
+            elif op == 'add':
+                player = entry[1]
+                deck.append(player.remove_card(len(player.hand) - 1))
+            elif op == 'pop':
+                deck.append(entry[1])
+            elif op == 'color':
+                entry[1].color = entry[2]
+            elif op == 'rng':
+                self.np_random.set_state(entry[1])
+            elif op == 'replace':
+                _, old_deck, old_played_cards, rng_state = entry
+                deck[:] = old_deck
+                self.played_cards = old_played_cards
+                self.np_random.set_state(rng_state)
+        (self.current_player, self.direction, self.target, self.is_over, self.winner) = log[0]
+
+    def _record(self, *entry):
+        if self.log is not None:
+            self.log.append(entry)
+
+    def _deal_cards(self, player, num):
+        ''' Deal cards from the deck and record them for undo
+        '''
+        self.dealer.deal_cards(player, num)
+        for _ in range(num):
+            self._record('add', player)
+
     def _perform_draw_action(self, players):
         # replace deck if there is no card in draw pile
         if not self.dealer.deck:
@@ -171,24 +217,31 @@ class UnoRound:
 
         # draw a wild card
         if card.type == 'wild':
+            self._record('pop', card)
+            self._record('color', card, card.color)
+            if self.log is not None:
+                self._record('rng', self.np_random.get_state())
             card.color = self.np_random.choice(UnoCard.info['color'])
             self.target = card
             self.played_cards.append(card)
+            self._record('play')
             self.current_player = (self.current_player + self.direction) % self.num_players
 
         # draw a card with the same color of target
         elif card.color == self.target.color:
+            self._record('pop', card)
+            self.played_cards.append(card)
+            self._record('play')
             if card.type == 'number':
                 self.target = card
-                self.played_cards.append(card)
                 self.current_player = (self.current_player + self.direction) % self.num_players
             else:
-                self.played_cards.append(card)
                 self._preform_non_number_action(players, card)
 
         # draw a card with the diffrent color of target
         else:
-            players[self.current_player].hand.append(card)
+            players[self.current_player].add_card(card)
+            self._record('add', players[self.current_player])
             self.current_player = (self.current_player + self.direction) % self.num_players
 
     def _preform_non_number_action(self, players, card):
@@ -211,7 +264,7 @@ class UnoRound:
                 #self.is_over = True
                 #self.winner = UnoJudger.judge_winner(players)
                 #return None
-            self.dealer.deal_cards(players[(current + direction) % num_players], 2)
+            self._deal_cards(players[(current + direction) % num_players], 2)
             current = (current + direction) % num_players
 
         # perfrom wild_draw_4 card
@@ -221,7 +274,7 @@ class UnoRound:
                 #self.is_over = True
                 #self.winner = UnoJudger.judge_winner(players)
                 #return None
-            self.dealer.deal_cards(players[(current + direction) % num_players], 4)
+            self._deal_cards(players[(current + direction) % num_players], 4)
             current = (current + direction) % num_players
         self.current_player = (current + self.direction) % num_players
         self.target = card
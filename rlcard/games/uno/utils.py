@@ -27,6 +27,26 @@ WILD = ['r-wild', 'g-wild', 'b-wild', 'y-wild']
 
 WILD_DRAW_4 = ['r-wild_draw_4', 'g-wild_draw_4', 'b-wild_draw_4', 'y-wild_draw_4']
 
+WILD_IDS = [ACTION_SPACE[action] for action in WILD]
+
+WILD_DRAW_4_IDS = [ACTION_SPACE[action] for action in WILD_DRAW_4]
+
+# Hand count arrays have one slot per (color, trait), indexed like the action
+# space. Wild cards change color when played, so all the copies of a wild
+# trait are counted in the slot of the first color.
+WILD_INDEX = TRAIT_MAP['wild']
+WILD_DRAW_4_INDEX = TRAIT_MAP['wild_draw_4']
+
+# For each target card index, the indices of the non-wild cards matching it
+# in color or trait
+MATCH_IDS = []
+for _color in range(4):
+    for _trait in range(15):
+        _ids = [_color * 15 + trait for trait in range(13)]
+        if _trait < 13:
+            _ids.extend(color * 15 + _trait for color in range(4) if color != _color)
+        MATCH_IDS.append(sorted(_ids))
+
 
 def init_deck():
     ''' Generate uno deck of 108 cards
@@ -52,6 +72,20 @@ def init_deck():
     return deck
 
 
+def card2index(card):
+    ''' Get the index of a card in the hand count array
+
+    Args:
+        card (object): object of UnoCard
+
+    Returns:
+        (int): index of the card, see WILD_INDEX
+    '''
+    trait = TRAIT_MAP[card.trait]
+    if trait >= WILD_INDEX:
+        return trait
+    return COLOR_MAP[card.color] * 15 + trait
+
 def cards2list(cards):
     ''' Get the corresponding string representation of cards
 
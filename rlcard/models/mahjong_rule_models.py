@@ -0,0 +1,103 @@
+''' Mahjong rule models
+'''
+
+import rlcard
+from rlcard.models.model import Model
+from rlcard.games.mahjong.utils import card_encoding_dict, cards2counts
+from rlcard.games.mahjong.shanten import calculate_shanten, get_best_discards, get_discard_shanten, get_visible_counts
+
+class MahjongRuleAgentV1(object):
+    ''' Mahjong Rule agent version 1. A tile efficiency baseline.
+    '''
+
+    def __init__(self):
+        self.use_raw = True
+
+    def step(self, state):
+        ''' Predict the action given raw state. Discard the tile that keeps
+            the lowest shanten number and leaves the most unseen effective
+            tiles. Claim pong, chow or gong only if it lowers the shanten
+            number.
+
+        Args:
+            state (dict): Raw state from the game
+
+        Returns:
+            action (str or MahjongCard): Predicted action
+        '''
+        legal_actions = state['raw_legal_actions']
+        state = state['raw_obs']
+        counts = cards2counts(state['current_hand'])
+        num_melds = max(4 - len(state['players_pile'][state['player']]), 0)
+
+        if 'stand' in legal_actions:
+            claim = [action for action in legal_actions if action != 'stand'][0]
+            if self.claim_shanten(counts, state['action_cards'], num_melds) < calculate_shanten(counts, num_melds):
+                return claim
+            return 'stand'
+
+        visible = get_visible_counts(state['table'], state['players_pile'])
+        _, best = get_best_discards(counts, num_melds, visible)
+        tile = max(best, key=lambda tile: sum(best[tile]))
+        for card in legal_actions:
+            if card_encoding_dict[card.get_str()] == tile:
+                return card
+        return legal_actions[0]
+
+    def eval_step(self, state):
+        ''' Step for evaluation. The same to step
+        '''
+        return self.step(state), []
+
+    @staticmethod
+    def claim_shanten(counts, cards, num_melds):
+        ''' Get the shanten number after a claim and the following discard
+
+        Args:
+            counts (list): 34-slot count array of the hand
+            cards (list): The cards of the claimed meld, including the claimed tile
+            num_melds (int): The number of melds the hand still needs
+
+        Returns:
+            shanten (int): The lowest shanten number after the discard
+        '''
+        claimed = cards2counts(cards)
+        # One of the tiles comes from the table
+        claimed[card_encoding_dict[cards[-1].get_str()]] -= 1
+        rest = [count - used for count, used in zip(counts, claimed)]
+        if min(rest) < 0 or sum(rest) == 0:
+            return calculate_shanten(counts, num_melds)
+        return min(get_discard_shanten(rest, max(num_melds - 1, 0)).values())
+
+class MahjongRuleModelV1(Model):
+    ''' Mahjong Rule Model version 1
+    '''
+
+    def __init__(self):
+        ''' Load pretrained model
+        '''
+        env = rlcard.make('mahjong')
+
+        rule_agent = MahjongRuleAgentV1()
+        self.rule_agents = [rule_agent for _ in range(env.num_players)]
+
+    @property
+    def agents(self):
+        ''' Get a list of agents for each position in a the game
+
+        Returns:
+            agents (list): A list of agents
+
+        Note: Each agent should be just like RL agent with step and eval_step
+              functioning well.
+        '''
+        return self.rule_agents
+
+    @property
+    def use_raw(self):
+        ''' Indicate whether use raw state and action
+
+        Returns:
+            use_raw (boolean): True if using raw state and action
+        '''
+        return True
@@ -197,6 +197,39 @@ def remove_illegal(action_probs, legal_actions):
         probs /= sum(probs)
     return probs
 
+def remove_illegal_batch(action_probs, legal_mask):
+    ''' Remove illegal actions and normalize a batch of probability vectors,
+        as remove_illegal on each row
+
+    Args:
+        action_probs (numpy.array): (batch_size, num_actions) probabilities
+        legal_mask (numpy.array): (batch_size, num_actions) masks of the legal actions
+
+    Returns:
+        probs (numpy.array): (batch_size, num_actions) normalized probabilities,
+            uniform over the legal actions for the rows without probability left
+    '''
+    legal_mask = np.asarray(legal_mask, dtype=bool)
+    probs = np.where(legal_mask, action_probs, 0.0)
+    sums = probs.sum(axis=1, keepdims=True)
+    uniform = legal_mask / legal_mask.sum(axis=1, keepdims=True)
+    return np.where(sums > 0, probs / np.where(sums > 0, sums, 1.0), uniform)
+
+def sample_actions(probs, np_random=None):
+    ''' Sample one action from each row of a batch of probability vectors
+
+    Args:
+        probs (numpy.array): (batch_size, num_actions) probabilities
+        np_random (numpy.random.RandomState): Random state, numpy.random if not given
+
+    Returns:
+        actions (numpy.array): (batch_size,) sampled actions
+    '''
+    np_random = np.random if np_random is None else np_random
+    cumulative = np.cumsum(probs, axis=1)
+    values = np_random.random_sample((len(probs), 1)) * cumulative[:, -1:]
+    return (values < cumulative).argmax(axis=1)
+
 def tournament(env, num):
     ''' Evaluate he performance of the agents in the environment
 
@@ -224,6 +257,30 @@ def tournament(env, num):
         payoffs[i] /= counter
     return payoffs
 
+_leducholdem_trees = {}
+
+def exact_tournament(env):
+    ''' Compute the exact expected payoffs of the agents in the environment,
+        by propagating their action probabilities through the game tree.
+        Only Leduc Hold'em is supported.
+
+    Args:
+        env (Env class): The environment to be evaluated, with its agents set
+
+    Returns:
+        A list of expected payoffs for each player
+    '''
+    if env.name != 'leduc-holdem':
+        raise ValueError('exact_tournament only supports leduc-holdem, not {}'.format(env.name))
+    if env.num_players not in _leducholdem_trees:
+        import rlcard
+        from rlcard.games.leducholdem.tree import compile_leducholdem_tree
+        tree_env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'game_num_players': env.num_players})
+        _leducholdem_trees[env.num_players] = compile_leducholdem_tree(tree_env)
+    tree = _leducholdem_trees[env.num_players]
+    payoffs = tree.get_expected_payoffs(tree.get_policy(env.agents))
+    return [float(payoff) for payoff in payoffs]
+
 def plot_curve(csv_path, save_path, algorithm):
     ''' Read data from csv file and plot the results
     '''
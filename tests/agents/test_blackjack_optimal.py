@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents import BlackjackOptimalAgent, RandomAgent
+from rlcard.utils import tournament
+
+class TestBlackjackOptimalAgent(unittest.TestCase):
+
+    def test_eval_step(self):
+        env = rlcard.make('blackjack', config={'game_num_decks': 1})
+        agent = BlackjackOptimalAgent(num_decks=1)
+        state = {'raw_obs': {'player0 hand': ['ST', 'H2'], 'dealer hand': ['C4'], 'state': (['ST', 'H2'], ['C4'])}}
+        action, info = agent.eval_step(state)
+        self.assertEqual(env.actions[action], 'hit')
+        self.assertGreater(info['values']['hit'], info['values']['stand'])
+
+        agent = BlackjackOptimalAgent(num_decks=1, composition_dependent=False)
+        action, info = agent.eval_step(state)
+        self.assertEqual(env.actions[action], 'stand')
+        self.assertEqual(info['probs'], {'hit': 0.0, 'stand': 1.0})
+
+    def test_tournament(self):
+        env = rlcard.make('blackjack', config={'seed': 0, 'game_num_players': 2, 'game_num_decks': 0})
+        env.set_agents([BlackjackOptimalAgent(num_decks=0), RandomAgent(env.num_actions)])
+        np.random.seed(0)
+        payoffs = tournament(env, 2000)
+        self.assertGreater(payoffs[0], payoffs[1])
+
+if __name__ == '__main__':
+    unittest.main()
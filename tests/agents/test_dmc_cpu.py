@@ -0,0 +1,46 @@
+import unittest
+
+import torch
+from torch import multiprocessing as mp
+
+from rlcard.agents.dmc_agent.utils import get_available_cores, plan_cpu_cores, run_pinned
+
+def report(result_queue):
+    result_queue.put((get_available_cores(), torch.get_num_threads()))
+
+class TestDMCCPU(unittest.TestCase):
+
+    def test_plan_cpu_cores(self):
+        learner_cores, process_cores, num_actors = plan_cpu_cores(cores=list(range(8)))
+        self.assertEqual(learner_cores, [0, 1])
+        self.assertEqual(num_actors, 6)
+        self.assertEqual(process_cores, [[k] for k in range(2, 8)])
+
+        # the inference servers take cores from the actors
+        learner_cores, process_cores, num_actors = plan_cpu_cores(num_learner_cores=3, num_inference_servers=1, cores=list(range(8)))
+        self.assertEqual(learner_cores, [0, 1, 2])
+        self.assertEqual(num_actors, 4)
+        self.assertEqual(process_cores[-1], [7])
+
+        # more actors than cores share them in turn
+        learner_cores, process_cores, num_actors = plan_cpu_cores(num_actors=5, cores=[4, 5, 6])
+        self.assertEqual(learner_cores, [4])
+        self.assertEqual(process_cores, [[5], [6], [5], [6], [5]])
+
+        learner_cores, process_cores, num_actors = plan_cpu_cores(cores=[3])
+        self.assertEqual(learner_cores, [3])
+        self.assertEqual((process_cores, num_actors), ([[3]], 1))
+
+    def test_run_pinned(self):
+        core = get_available_cores()[-1]
+        ctx = mp.get_context('spawn')
+        result_queue = ctx.SimpleQueue()
+        process = ctx.Process(target=run_pinned, args=([core], 1, report, result_queue))
+        process.start()
+        cores, num_threads = result_queue.get()
+        process.join()
+        self.assertEqual(cores, [core])
+        self.assertEqual(num_threads, 1)
+
+if __name__ == '__main__':
+    unittest.main()
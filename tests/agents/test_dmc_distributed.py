@@ -0,0 +1,150 @@
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import torch
+from torch import multiprocessing as mp
+
+import rlcard
+from rlcard.agents.dmc_agent import DMCTrainer
+from rlcard.agents.dmc_agent.distributed import flatten_weights, load_weights, serve_actor_hosts, serve_learner
+from rlcard.agents.dmc_agent.model import DMCModel
+from rlcard.agents.dmc_agent.utils import create_buffers
+
+def train(rank, world_size, init_method, savedir, num_learner_host_actors=0):
+    env = rlcard.make('leduc-holdem', config={'seed': rank})
+    trainer = DMCTrainer(
+        env,
+        savedir=savedir,
+        save_interval=100,
+        num_actors=num_learner_host_actors if rank == 0 else 1,
+        total_frames=2000,
+        batch_size=4,
+        unroll_length=20,
+        num_buffers=4,
+        num_threads=1,
+        cpu_affinity=False,
+        world_size=world_size,
+        rank=rank,
+        init_method=init_method,
+        publish_every=2,
+    )
+    trainer.start()
+
+def get_init_method():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return 'tcp://127.0.0.1:{}'.format(port)
+
+def exchange(rank, init_method, result_queue):
+    torch.distributed.init_process_group('gloo', init_method=init_method, rank=rank, world_size=2)
+    model = DMCModel([[3]], [[2]], mlp_layers=[4], device='cpu')
+    # unrolls of 2 steps, 3 on the actor host and 2 on the learner host
+    buffers = create_buffers(2, 2 + rank, [[3]], [[2]], ['cpu'])['cpu']
+    free_queue, full_queue = [queue.Queue()], [queue.Queue()]
+    if rank == 0:
+        load_weights(model, 1, torch.ones(len(flatten_weights(model, 1))))
+        for m in range(2):
+            free_queue[0].put(m)
+        stopping = threading.Event()
+        host_frames = torch.zeros(1, dtype=torch.int64)
+        thread = threading.Thread(target=serve_actor_hosts, args=(1, model, 1, free_queue, full_queue, buffers, stopping, host_frames, 1))
+        thread.start()
+        received = [full_queue[0].get() for _ in range(2)]
+        # the learner does not free its buffers, so the actor host waits
+        time.sleep(0.5)
+        waiting = full_queue[0].empty()
+        stopping.set()
+        free_queue[0].put(None)
+        thread.join()
+        result_queue.put((received, waiting, buffers[0]['state'].clone(), int(host_frames[0])))
+    else:
+        for m in range(3):
+            buffers[0]['state'][m] = m + 1
+            buffers[0]['done'][m] = torch.tensor([False, True])
+            full_queue[0].put(m)
+        serve_learner({'cpu': model}, 1, {'cpu': free_queue}, {'cpu': full_queue}, {'cpu': buffers})
+        freed = [free_queue[0].get() for _ in range(3)]
+        result_queue.put((freed, flatten_weights(model, 1)))
+    torch.distributed.destroy_process_group()
+
+class TestDMCDistributed(unittest.TestCase):
+
+    def test_weights(self):
+        env = rlcard.make('leduc-holdem')
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+        model = DMCModel(env.state_shape, action_shape, mlp_layers=[8, 8], device='cpu')
+        other_model = DMCModel(env.state_shape, action_shape, mlp_layers=[8, 8], device='cpu')
+        other_model.share_memory()
+        param = next(iter(other_model.parameters(1)))
+        weights = flatten_weights(model, env.num_players)
+        load_weights(other_model, env.num_players, weights)
+        self.assertTrue(torch.equal(flatten_weights(other_model, env.num_players), weights))
+        # the shared memory is kept
+        self.assertTrue(param.is_shared())
+        self.assertTrue(torch.equal(param, next(iter(model.parameters(1)))))
+
+    def test_exchange(self):
+        ctx = mp.get_context('spawn')
+        init_method = get_init_method()
+        result_queues = [ctx.Queue() for _ in range(2)]
+        processes = [ctx.Process(target=exchange, args=(rank, init_method, result_queues[rank])) for rank in range(2)]
+        for process in processes:
+            process.start()
+        received, waiting, states, host_frames = result_queues[0].get(timeout=120)
+        freed, weights = result_queues[1].get(timeout=120)
+        for process in processes:
+            process.join(timeout=60)
+        self.assertEqual(received, [0, 1])
+        self.assertTrue(waiting)
+        self.assertTrue(torch.all(states[0] == 1))
+        self.assertTrue(torch.all(states[1] == 2))
+        self.assertEqual(host_frames, 4)
+        # the third unroll was sent once the learner stopped, then discarded
+        self.assertEqual(freed, [0, 1, 2])
+        self.assertTrue(torch.all(weights == 1))
+
+    def test_train_single_host(self):
+        # the local actors are stopped, so the trainer exits
+        savedir = tempfile.mkdtemp()
+        ctx = mp.get_context('spawn')
+        process = ctx.Process(target=train, args=(0, 1, None, savedir, 1))
+        process.start()
+        process.join(timeout=300)
+        self.assertEqual(process.exitcode, 0)
+
+    def test_train_distributed(self):
+        init_method = get_init_method()
+        savedir = tempfile.mkdtemp()
+        world_size = 3
+        ctx = mp.get_context('spawn')
+        # the learner host only learns
+        processes = [ctx.Process(target=train, args=(rank, world_size, init_method, savedir)) for rank in range(world_size)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=300)
+        self.assertEqual([process.exitcode for process in processes], [0] * world_size)
+        checkpoint = torch.load(os.path.join(savedir, 'dmc', 'model.tar'))
+        self.assertGreaterEqual(checkpoint['frames'], 2000)
+
+    def test_train_distributed_learner_host_actors(self):
+        # the local actors of the learner host wait on the same free queues
+        # as the thread of the actor hosts, and all of them stop
+        init_method = get_init_method()
+        savedir = tempfile.mkdtemp()
+        ctx = mp.get_context('spawn')
+        processes = [ctx.Process(target=train, args=(rank, 2, init_method, savedir, 2)) for rank in range(2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=300)
+        self.assertEqual([process.exitcode for process in processes], [0, 0])
+
+if __name__ == '__main__':
+    unittest.main()
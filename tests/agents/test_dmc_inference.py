@@ -0,0 +1,112 @@
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import torch
+from torch import multiprocessing as mp
+
+import rlcard
+from rlcard.agents.dmc_agent import DMCTrainer
+from rlcard.agents.dmc_agent.model import DMCModel
+from rlcard.agents.dmc_agent.inference import InferenceClient, serve
+
+def train(savedir):
+    env = rlcard.make('leduc-holdem', config={'seed': 0})
+    trainer = DMCTrainer(
+        env,
+        savedir=savedir,
+        save_interval=100,
+        num_actors=2,
+        total_frames=2000,
+        batch_size=4,
+        unroll_length=20,
+        num_buffers=4,
+        num_threads=1,
+        cpu_affinity=False,
+        num_inference_servers=1,
+        inference_envs_per_actor=4,
+    )
+    trainer.start()
+
+class TestDMCInference(unittest.TestCase):
+
+    def test_inference_server(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+        model = DMCModel(env.state_shape, action_shape, mlp_layers=[16, 16], exp_epsilon=0, device='cpu')
+        model.share_memory()
+        model.eval()
+
+        ctx = mp.get_context('spawn')
+        request_queue = ctx.Queue()
+        # the last client sends its features through the queue
+        clients = [InferenceClient(i, request_queue, ctx.SimpleQueue(), env.state_shape, action_shape, 1 if i == 2 else env.num_actions)
+                   for i in range(3)]
+        server = ctx.Process(target=serve, args=(0, 'cpu', model, request_queue, {c.actor_id: c for c in clients}, 3, 0.01))
+        server.start()
+
+        states = []
+        state, player_id = env.reset()
+        while not env.is_over():
+            states.append((state, player_id))
+            state, player_id = env.step(list(state['legal_actions'])[0])
+
+        results = {}
+        def run(client):
+            agents = client.get_agents()
+            results[client.actor_id] = [agents[player_id].predict(state)[1] for state, player_id in states]
+        threads = [threading.Thread(target=run, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        request_queue.put(None)
+        server.join(timeout=60)
+        self.assertEqual(server.exitcode, 0)
+
+        for state, player_id in states:
+            expected = model.get_agent(player_id).predict(state)[1]
+            for client in clients:
+                values = results[client.actor_id].pop(0)
+                self.assertTrue(np.allclose(values, expected, atol=1e-6))
+
+    def test_run_envs(self):
+        env = rlcard.make('leduc-holdem')
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+        model = DMCModel(env.state_shape, action_shape, mlp_layers=[16, 16], exp_epsilon=0, device='cpu')
+        model.share_memory()
+        model.eval()
+
+        ctx = mp.get_context('spawn')
+        request_queue = ctx.Queue()
+        client = InferenceClient(0, request_queue, ctx.SimpleQueue(), env.state_shape, action_shape, env.num_actions,
+                                 exp_epsilon=0, num_envs=4)
+        server = ctx.Process(target=serve, args=(0, 'cpu', model, request_queue, {0: client}, 4, 0.01))
+        server.start()
+
+        episodes = client.run_envs(env, 0)
+        games = [next(episodes) for _ in range(20)]
+        request_queue.put(None)
+        server.join(timeout=60)
+        self.assertEqual(server.exitcode, 0)
+
+        # Every action is the greedy action of the state that it follows, so
+        # the replies went to the envs that sent the requests
+        for trajectories, payoffs in games:
+            self.assertEqual(len(payoffs), env.num_players)
+            for player_id, trajectory in enumerate(trajectories):
+                self.assertEqual(len(trajectory) % 2, 1)
+                for i in range(0, len(trajectory) - 1, 2):
+                    self.assertEqual(trajectory[i+1], model.get_agent(player_id).step(trajectory[i]))
+
+    def test_train(self):
+        with tempfile.TemporaryDirectory() as savedir:
+            ctx = mp.get_context('spawn')
+            process = ctx.Process(target=train, args=(savedir,))
+            process.start()
+            process.join(timeout=300)
+            self.assertEqual(process.exitcode, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import queue
+import threading
+import unittest
+
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents.dmc_agent.model import DMCModel
+from rlcard.agents.dmc_agent.utils import RolloutRing, act, create_buffers, get_batch
+
+class IndexQueue:
+    ''' Gives some buffer indices, then stops the actor
+    '''
+    def __init__(self, indices):
+        self.indices = list(indices)
+
+    def get(self):
+        if not self.indices:
+            raise KeyboardInterrupt
+        return self.indices.pop(0)
+
+class TestDMCRollout(unittest.TestCase):
+
+    def test_create_buffers(self):
+        buffers = create_buffers(4, 3, [[2, 5]], [[6]], ['cpu'])
+        player_buffers = buffers['cpu'][0]
+        self.assertEqual(player_buffers['state'].shape, (3, 4, 2, 5))
+        self.assertEqual(player_buffers['action'].shape, (3, 4, 6))
+        self.assertEqual(player_buffers['done'].shape, (3, 4))
+        self.assertTrue(player_buffers['state'].is_shared())
+
+    def test_rollout_ring(self):
+        T = 3
+        buffers = create_buffers(T, 4, [[2]], [[1]], ['cpu'])['cpu'][0]
+        ring = RolloutRing(buffers, capacity=4)
+        steps = []
+        def append(num_steps):
+            start = len(steps)
+            steps.extend(range(start, start + num_steps))
+            values = np.arange(start, start + num_steps)
+            ring.append(
+                done=values % 2 == 0,
+                episode_return=values.astype(np.float32),
+                target=-values.astype(np.float32),
+                state=np.stack([values, values + 1], axis=1),
+                action=values[:, None],
+            )
+        # the second episode wraps around, the third grows the ring
+        append(2)
+        append(2)
+        ring.pop(buffers, 0)
+        append(5)
+        self.assertEqual(len(ring), 6)
+        self.assertEqual(ring.capacity, 8)
+        ring.pop(buffers, 2)
+        ring.pop(buffers, 1)
+        self.assertEqual(len(ring), 0)
+        for index, offset in [(0, 0), (2, 3), (1, 6)]:
+            values = torch.arange(offset, offset + T)
+            self.assertTrue(torch.equal(buffers['episode_return'][index], values.float()))
+            self.assertTrue(torch.equal(buffers['target'][index], -values.float()))
+            self.assertTrue(torch.equal(buffers['done'][index], values % 2 == 0))
+            self.assertTrue(torch.equal(buffers['state'][index][:, 1], (values + 1).to(torch.int8)))
+            self.assertTrue(torch.equal(buffers['action'][index][:, 0], values.to(torch.int8)))
+
+    def test_get_batch(self):
+        buffers = create_buffers(3, 4, [[2]], [[1]], ['cpu'])['cpu'][0]
+        for key in buffers:
+            buffers[key].copy_(torch.arange(4).view(-1, *([1] * (buffers[key].dim() - 1))).expand_as(buffers[key]))
+        free_queue, full_queue = queue.Queue(), queue.Queue()
+        for m in [2, 0, 3]:
+            full_queue.put(m)
+        batch = get_batch(free_queue, full_queue, buffers, 2, threading.Lock())
+        self.assertEqual(batch['state'].shape, (3, 2, 2))
+        self.assertTrue(torch.equal(batch['target'][0], torch.tensor([2., 0.])))
+        self.assertEqual([free_queue.get(), free_queue.get()], [2, 0])
+        self.assertEqual(full_queue.get(), 3)
+
+    def test_act(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+        model = DMCModel(env.state_shape, action_shape, mlp_layers=[16, 16], device='cpu')
+        T, num_buffers = 5, 3
+        buffers = create_buffers(T, num_buffers, env.state_shape, action_shape, ['cpu'])['cpu']
+        free_queue = [IndexQueue(range(num_buffers)) for _ in range(env.num_players)]
+        full_queue = [queue.Queue() for _ in range(env.num_players)]
+        act(0, 'cpu', T, free_queue, full_queue, model, buffers, env)
+        for p in range(env.num_players):
+            # the actor stops when a player runs out of buffers
+            num_full = full_queue[p].qsize()
+            self.assertGreater(num_full, 0)
+            indices = [full_queue[p].get() for _ in range(num_full)]
+            self.assertEqual(indices, list(range(num_full)))
+            player_buffers = {key: buffer[:num_full] for key, buffer in buffers[p].items()}
+            # every finished episode ends with its payoff, which is the target of its steps
+            done = player_buffers['done']
+            self.assertTrue(done.any())
+            self.assertTrue(torch.equal(player_buffers['episode_return'][done], player_buffers['target'][done]))
+            self.assertTrue(torch.all(player_buffers['episode_return'][~done] == 0))
+            self.assertTrue(torch.all(player_buffers['action'].sum(-1) == 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
+import io
+import os
+import tempfile
 import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.agents.dqn_agent import DQNAgent, Memory, MemmapMemory, PrioritizedMemory, SumTree
 
 class TestDQN(unittest.TestCase):
 
@@ -51,3 +54,182 @@ class TestDQN(unittest.TestCase):
         predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}})
         self.assertGreaterEqual(predicted_action, 0)
         self.assertLessEqual(predicted_action, 1)
+
+    def test_step_batch(self):
+        agent = DQNAgent(num_actions=4,
+                         state_shape=[3],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+        obs = np.random.random_sample((20, 3))
+        legal_mask = np.random.randint(2, size=(20, 4)).astype(bool)
+        legal_mask[:, 1] = True
+        actions = agent.step_batch(obs, legal_mask)
+        eval_actions, info = agent.eval_step_batch(obs, legal_mask)
+        self.assertTrue(legal_mask[np.arange(20), actions].all())
+        self.assertTrue(np.isneginf(info['values'][~legal_mask]).all())
+        for i in range(20):
+            legal_actions = {action: None for action in np.flatnonzero(legal_mask[i])}
+            state = {'obs': obs[i], 'legal_actions': legal_actions, 'raw_legal_actions': list(legal_actions)}
+            self.assertEqual(agent.step(state), actions[i])
+            self.assertEqual(agent.eval_step(state)[0], eval_actions[i])
+
+    def test_memory(self):
+        memory = Memory(memory_size=5, batch_size=3, num_actions=10)
+        for i in range(7):
+            memory.save(np.full(4, i, dtype=np.float64), i, float(i), np.full(4, i + 1, dtype=np.float64), [i, 9], i % 2 == 0)
+        self.assertEqual(len(memory), 5)
+        self.assertEqual(memory.states.dtype, np.float32)
+        self.assertEqual(sorted(memory.actions.tolist()), [2, 3, 4, 5, 6])
+
+        states, actions, rewards, next_states, dones, legal_actions = memory.sample()
+        self.assertEqual(states.shape, (3, 4))
+        self.assertEqual(legal_actions.shape, (3, 10))
+        for state, action, reward, next_state, done, legal in zip(states, actions, rewards, next_states, dones, legal_actions):
+            self.assertTrue((state == action).all())
+            self.assertTrue((next_state == action + 1).all())
+            self.assertEqual(reward, action)
+            self.assertEqual(done, action % 2 == 0)
+            self.assertEqual(np.flatnonzero(legal).tolist(), [action, 9])
+
+        buffer = io.BytesIO()
+        torch.save(memory.checkpoint_attributes(), buffer)
+        buffer.seek(0)
+        restored = Memory.from_checkpoint(torch.load(buffer, weights_only=True))
+        indices = np.arange(5)
+        for array, restored_array in zip(memory.get_batch(indices), restored.get_batch(indices)):
+            self.assertTrue((array == restored_array).all())
+        restored.save(np.zeros(4), 7, 7.0, np.zeros(4), [0], True)
+        self.assertEqual(sorted(restored.actions.tolist()), [3, 4, 5, 6, 7])
+
+    def test_memory_numpy_legal_actions(self):
+        memory = Memory(memory_size=2, batch_size=2, num_actions=100)
+        memory.save(np.zeros(4), 0, 0.0, np.zeros(4), {np.int64(1): None, np.int64(70): None}, False)
+        memory.save(np.zeros(4), 1, 0.0, np.zeros(4), np.array([99]), True)
+        legal_actions = memory.get_batch(np.arange(2))[-1]
+        self.assertEqual(np.flatnonzero(legal_actions[0]).tolist(), [1, 70])
+        self.assertEqual(np.flatnonzero(legal_actions[1]).tolist(), [99])
+
+    def test_memmap_memory(self):
+        with tempfile.TemporaryDirectory() as memory_dir:
+            memory = MemmapMemory(memory_size=5, batch_size=3, num_actions=10, memory_dir=memory_dir, pack_bits=True, flush_every=2)
+            np_random = np.random.RandomState(0)
+            states = np_random.randint(2, size=(8, 2, 10)).astype(np.int8)
+            for i in range(7):
+                memory.save(states[i], i, float(i), states[i + 1], [i, 9], i % 2 == 0)
+            self.assertTrue(memory.pack_bits)
+            self.assertEqual(memory.states.shape, (5, 3))
+            with self.assertRaises(ValueError):
+                memory.save(np.full((2, 10), 2), 0, 0.0, states[0], [0], False)
+
+            batch_states, actions, rewards, next_states, dones, legal_actions = memory.sample()
+            self.assertEqual(batch_states.dtype, np.int8)
+            self.assertEqual(batch_states.shape, (3, 2, 10))
+            for state, action, next_state, legal in zip(batch_states, actions, next_states, legal_actions):
+                self.assertTrue((state == states[action]).all())
+                self.assertTrue((next_state == states[action + 1]).all())
+                self.assertEqual(np.flatnonzero(legal).tolist(), [action, 9])
+
+            # the files are reopened, as after a restart
+            checkpoint = memory.checkpoint_attributes()
+            del memory
+            restored = MemmapMemory.from_checkpoint(checkpoint)
+            self.assertEqual(len(restored), 5)
+            self.assertEqual(sorted(restored.actions.tolist()), [2, 3, 4, 5, 6])
+            _, actions, _, next_states, _, _ = restored.get_batch(np.arange(5))
+            for action, next_state in zip(actions, next_states):
+                self.assertTrue((next_state == states[action + 1]).all())
+            restored.save(states[0], 7, 7.0, states[1], [0], True)
+            self.assertEqual(restored.next_index, 3)
+            with self.assertRaises(ValueError):
+                MemmapMemory(memory_size=6, batch_size=3, num_actions=10, memory_dir=memory_dir)
+
+        with tempfile.TemporaryDirectory() as memory_dir:
+            memory = MemmapMemory(memory_size=5, batch_size=3, num_actions=2, memory_dir=memory_dir)
+            # binary states are only packed if asked
+            memory.save(np.ones(4), 0, 0.0, np.zeros(4), [0], False)
+            memory.save(np.full(4, 3.0), 0, 0.0, np.zeros(4), [0], False)
+            self.assertFalse(memory.pack_bits)
+            self.assertEqual(memory.states.dtype, np.float32)
+
+    def test_train_memmap(self):
+        with tempfile.TemporaryDirectory() as memory_dir:
+            agent = DQNAgent(replay_memory_size=200,
+                             replay_memory_init_size=100,
+                             state_shape=[2],
+                             mlp_layers=[10,10],
+                             device=torch.device('cpu'),
+                             replay_memory_dir=os.path.join(memory_dir, 'replay'),
+                             replay_memory_pack_bits=True)
+            for _ in range(150):
+                ts = [{'obs': np.random.randint(2, size=2), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 1, {'obs': np.random.randint(2, size=2), 'legal_actions': {0: None, 1: None}}, True]
+                agent.feed(ts)
+            self.assertEqual(len(agent.memory), 150)
+            self.assertTrue(agent.memory.pack_bits)
+
+    def test_train_async(self):
+        agent = DQNAgent(replay_memory_size=200,
+                         replay_memory_init_size=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'),
+                         async_training=True,
+                         update_to_data_ratio=0.5,
+                         publish_every=4)
+        self.assertIsNot(agent.acting_estimator, agent.q_estimator)
+        for _ in range(150):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 1, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, True]
+            agent.feed(ts)
+            action = agent.step(ts[0])
+            self.assertIn(action, [0, 1])
+        agent.stop_learner()
+        self.assertEqual(agent.learner.num_updates, 25)
+        for name, tensor in agent.q_estimator.qnet.state_dict().items():
+            self.assertTrue(torch.equal(tensor, agent.acting_estimator.qnet.state_dict()[name]))
+
+    def test_sum_tree(self):
+        tree = SumTree(100)
+        self.assertEqual(tree.capacity, 128)
+        priorities = np.random.random_sample(100)
+        tree.set_batch(np.arange(100), priorities)
+        tree.set(7, 2.0)
+        priorities[7] = 2.0
+        tree.set_batch([3, 5, 3], [0.5, 0.0, 1.5])
+        priorities[3], priorities[5] = 1.5, 0.0
+        self.assertAlmostEqual(tree.total(), priorities.sum())
+        values = np.random.random_sample(1000) * priorities.sum()
+        expected = np.searchsorted(np.cumsum(priorities), values, side='right')
+        self.assertTrue((tree.find(values) == expected).all())
+        self.assertNotIn(5, tree.find(values))
+
+    def test_prioritized_memory(self):
+        memory = PrioritizedMemory(memory_size=8, batch_size=4, num_actions=2, alpha=1.0, epsilon=0.0)
+        for i in range(8):
+            memory.save(np.full(2, i), i, 0.0, np.full(2, i), [0, 1], False)
+        memory.update_priorities(np.arange(8), np.array([0, 0, 0, 0, 0, 0, 1, 3]))
+        _, actions, _, _, _, _, indices, weights = memory.sample(beta=1.0)
+        self.assertTrue((actions == indices).all())
+        self.assertEqual(indices.tolist(), [6, 7, 7, 7])
+        self.assertTrue(np.allclose(weights, [1, 1 / 3, 1 / 3, 1 / 3]))
+        self.assertEqual(memory.max_priority, 3)
+
+        memory.save(np.zeros(2), 8, 0.0, np.zeros(2), [0], False)
+        self.assertEqual(memory.sum_tree.get([0])[0], 3)
+
+        buffer = io.BytesIO()
+        torch.save(memory.checkpoint_attributes(), buffer)
+        buffer.seek(0)
+        restored = PrioritizedMemory.from_checkpoint(torch.load(buffer, weights_only=True))
+        self.assertTrue((restored.sum_tree.tree == memory.sum_tree.tree).all())
+
+    def test_train_prioritized(self):
+        agent = DQNAgent(replay_memory_size=200,
+                         replay_memory_init_size=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'),
+                         prioritized_replay=True)
+        for _ in range(150):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 1, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, True]
+            agent.feed(ts)
+        priorities = agent.memory.sum_tree.get(np.arange(150))
+        self.assertFalse(np.allclose(priorities, 1.0))
@@ -0,0 +1,40 @@
+import threading
+import unittest
+
+from rlcard.agents.learner_thread import LearnerThread
+
+class TestLearnerThread(unittest.TestCase):
+
+    def test_update_to_data_ratio(self):
+        lock = threading.RLock()
+        buffer, updates, published = [], [], []
+        learner = LearnerThread(lambda: list(buffer), updates.append, lock,
+                                update_to_data_ratio=0.5, publish=lambda: published.append(len(updates)), publish_every=3)
+        for i in range(11):
+            with lock:
+                buffer.append(i)
+                learner.add_data()
+        learner.stop()
+        self.assertEqual(learner.num_updates, 5)
+        self.assertEqual(len(updates), 5)
+        # every batch is sampled after the data it is owed for
+        for i, batch in enumerate(updates):
+            self.assertGreaterEqual(len(batch), 2 * (i + 1))
+        self.assertEqual(published, [3, 5])
+
+    def test_error(self):
+        lock = threading.RLock()
+        def update(batch):
+            raise ValueError('update')
+        learner = LearnerThread(lambda: None, update, lock)
+        with lock:
+            learner.add_data()
+        learner.join(timeout=10)
+        with self.assertRaises(RuntimeError):
+            with lock:
+                learner.add_data()
+        with self.assertRaises(RuntimeError):
+            learner.stop()
+
+if __name__ == '__main__':
+    unittest.main()
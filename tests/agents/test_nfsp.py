@@ -1,8 +1,11 @@
+import os
+import tempfile
 import unittest
+import io
 import torch
 import numpy as np
 
-from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.agents.nfsp_agent import NFSPAgent, ReservoirBuffer, Transition
 
 class TestNFSP(unittest.TestCase):
 
@@ -45,3 +48,112 @@ class TestNFSP(unittest.TestCase):
 
             ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['call', 'raise']}, True]
             agent.feed(ts)
+
+    def test_memmap_replay(self):
+        with tempfile.TemporaryDirectory() as memory_dir:
+            def make_agent():
+                return NFSPAgent(num_actions=2,
+                                 state_shape=[2],
+                                 hidden_layers_sizes=[10,10],
+                                 q_replay_memory_size=50,
+                                 q_replay_memory_init_size=100,
+                                 q_mlp_layers=[10,10],
+                                 q_replay_memory_dir=os.path.join(memory_dir, 'replay'),
+                                 q_replay_memory_pack_bits=True,
+                                 device=torch.device('cpu'))
+            agent = make_agent()
+            for _ in range(30):
+                ts = [{'obs': np.random.randint(2, size=2), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 0, {'obs': np.random.randint(2, size=2), 'legal_actions': {0: None, 1: None}}, True]
+                agent.feed(ts)
+            agent.checkpoint_attributes()
+            # a new agent reopens the files
+            restored = make_agent()
+            self.assertEqual(len(restored._rl_agent.memory), 30)
+            self.assertTrue(restored._rl_agent.memory.pack_bits)
+            self.assertTrue((restored._rl_agent.memory.actions[:30] == agent._rl_agent.memory.actions[:30]).all())
+
+    def test_reservoir_buffer(self):
+        buffer = ReservoirBuffer(10)
+        buffer.add(Transition(info_state=np.zeros(3), action_probs=np.ones(2)))
+        buffer.add_many(np.arange(1, 7)[:, None] * np.ones(3), np.ones((6, 2)))
+        self.assertEqual(len(buffer), 7)
+        info_states, action_probs = buffer.sample(7)
+        self.assertEqual(info_states.dtype, np.float32)
+        self.assertEqual(sorted(info_states[:, 0].tolist()), list(range(7)))
+        self.assertEqual(action_probs.shape, (7, 2))
+        with self.assertRaises(ValueError):
+            buffer.sample(8)
+
+        buffer = io.BytesIO()
+        reservoir_buffer = ReservoirBuffer(10)
+        reservoir_buffer.add_many(np.arange(30)[:, None], np.ones((30, 2)))
+        torch.save(reservoir_buffer.checkpoint_attributes(), buffer)
+        buffer.seek(0)
+        restored = ReservoirBuffer.from_checkpoint(torch.load(buffer, weights_only=True))
+        self.assertEqual(len(restored), 10)
+        self.assertEqual(restored._add_calls, 30)
+        self.assertEqual([t.info_state[0] for t in restored], [t.info_state[0] for t in reservoir_buffer])
+
+        # every element of the stream is kept with probability capacity / stream size
+        counts = np.zeros(100)
+        for _ in range(2000):
+            reservoir_buffer = ReservoirBuffer(10)
+            reservoir_buffer.add_many(np.arange(50)[:, None], np.ones((50, 2)))
+            reservoir_buffer.add_many(np.arange(50, 100)[:, None], np.ones((50, 2)))
+            counts[[int(t.info_state[0]) for t in reservoir_buffer]] += 1
+        self.assertTrue((np.abs(counts - 200) < 70).all())
+
+    def test_step_batch(self):
+        agent = NFSPAgent(num_actions=4,
+                          state_shape=[3],
+                          hidden_layers_sizes=[10,10],
+                          q_mlp_layers=[10,10],
+                          device=torch.device('cpu'))
+        obs = np.random.random_sample((20, 3))
+        legal_mask = np.random.randint(2, size=(20, 4)).astype(bool)
+        legal_mask[:, 1] = True
+        actions, info = agent.eval_step_batch(obs, legal_mask)
+        self.assertTrue(legal_mask[np.arange(20), actions].all())
+        self.assertTrue(np.allclose(info['probs'].sum(axis=1), 1))
+        for i in range(20):
+            legal_actions = {action: None for action in np.flatnonzero(legal_mask[i])}
+            state = {'obs': obs[i], 'legal_actions': legal_actions, 'raw_legal_actions': list(legal_actions)}
+            _, expected = agent.eval_step(state)
+            for action, prob in expected['probs'].items():
+                self.assertAlmostEqual(info['probs'][i, action], prob, places=5)
+
+        agent._mode = 'average_policy'
+        actions = agent.step_batch(obs, legal_mask)
+        self.assertTrue(legal_mask[np.arange(20), actions].all())
+        self.assertEqual(len(agent._episode_transitions), 0)
+        agent._mode = 'best_response'
+        actions = agent.step_batch(obs, legal_mask)
+        self.assertTrue(legal_mask[np.arange(20), actions].all())
+        self.assertEqual(len(agent._episode_transitions), 20)
+
+    def test_train_async(self):
+        agent = NFSPAgent(num_actions=2,
+                          state_shape=[2],
+                          hidden_layers_sizes=[10,10],
+                          reservoir_buffer_capacity=50,
+                          anticipatory_param=1.0,
+                          batch_size=4,
+                          min_buffer_size_to_learn=20,
+                          q_replay_memory_size=50,
+                          q_replay_memory_init_size=20,
+                          q_batch_size=4,
+                          q_mlp_layers=[10,10],
+                          async_training=True,
+                          device=torch.device('cpu'))
+        for _ in range(100):
+            agent.sample_episode_policy()
+            state = {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}
+            agent.step(state)
+            agent.feed([state, np.random.randint(2), 0, state, True])
+        agent.stop_learner()
+        # the reservoir buffer reaches 20 transitions at the 20th step
+        self.assertEqual(agent._sl_learner.num_updates, 81)
+        self.assertEqual(agent.train_t, 81)
+        self.assertEqual(agent._rl_agent.learner.num_updates, 81)
+        for name, tensor in agent.policy_network.state_dict().items():
+            self.assertTrue(torch.equal(tensor, agent.acting_policy_network.state_dict()[name]))
@@ -0,0 +1,57 @@
+'''
+    File name: tests/envs/test_bridge_env.py
+'''
+
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.envs.bridge import DefaultBridgeStateExtractor, FastBridgeStateExtractor
+from rlcard.games.bridge.utils.action_event import ActionEvent, BidAction, PassAction, PlayCardAction
+from rlcard.games.bridge.utils.bridge_card import BridgeCard
+
+
+class TestBridgeEnv(unittest.TestCase):
+
+    def test_reset_and_extract_state(self):
+        env = rlcard.make('bridge')
+        state, _ = env.reset()
+        self.assertEqual(state['obs'].size, env.state_shape[0][1])
+        self.assertEqual(state['obs'].dtype, np.int8)
+
+    def test_fast_state_extractor(self):
+        env = rlcard.make('bridge', config={'seed': 0})
+        default_extractor = DefaultBridgeStateExtractor()
+        fast_extractor = FastBridgeStateExtractor()
+        np_random = np.random.RandomState(0)
+        for _ in range(10):
+            env.reset()
+            while True:
+                expected = default_extractor.extract_state(env.game)
+                state = fast_extractor.extract_state(env.game)
+                self.assertTrue(np.array_equal(state['obs'], expected['obs']))
+                self.assertEqual(list(state['legal_actions']), list(expected['legal_actions']))
+                if env.game.is_over():
+                    break
+                legal_actions = list(state['legal_actions'])
+                env.step(legal_actions[np_random.randint(len(legal_actions))])
+
+    def test_action_events(self):
+        for action_id in range(1, ActionEvent.get_num_actions()):
+            action = ActionEvent.from_action_id(action_id)
+            self.assertEqual(action.action_id, action_id)
+            self.assertIs(ActionEvent.from_action_id(action_id), action)
+        self.assertEqual(ActionEvent.from_action_id(ActionEvent.pass_action_id), PassAction())
+        self.assertEqual(str(ActionEvent.from_action_id(BidAction(3, None).action_id)), '3NT')
+        self.assertEqual(ActionEvent.from_action_id(ActionEvent.first_play_card_action_id + 51).card, BridgeCard.card(51))
+        self.assertIsInstance(ActionEvent.from_action_id(ActionEvent.first_play_card_action_id), PlayCardAction)
+        with self.assertRaises(Exception):
+            ActionEvent.from_action_id(ActionEvent.get_num_actions())
+        env = rlcard.make('bridge')
+        env.reset()
+        for action in env.game.judger.get_legal_actions():
+            self.assertIs(action, ActionEvent.from_action_id(action.action_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ import numpy as np
 
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
+from rlcard.games.gin_rummy.utils import utils
 from .determism_util import is_deterministic
 
 
@@ -38,6 +39,25 @@ class TestGinRummyEnv(unittest.TestCase):
         current_player_id = env.game.round.get_current_player().player_id
         self.assertEqual(player_id, current_player_id)
 
+    def test_extract_state_matches_card_piles(self):
+        env = rlcard.make('gin-rummy', config={'seed': 7})
+        np_random = np.random.RandomState(7)
+        for _ in range(5):
+            state, _ = env.reset()
+            while not env.is_over():
+                dealer = env.game.round.dealer
+                discard_pile = dealer.discard_pile
+                top_discard = [] if not discard_pile else [discard_pile[-1]]
+                current_player = env.game.get_current_player()
+                opponent = env.game.round.players[(current_player.player_id + 1) % 2]
+                known_cards = opponent.known_cards
+                unknown_cards = dealer.stock_pile + [card for card in opponent.hand if card not in known_cards]
+                piles = [current_player.hand, top_discard, discard_pile[:-1], known_cards, unknown_cards]
+                expected = np.array([utils.encode_cards(pile) for pile in piles])
+                self.assertTrue(np.array_equal(state['obs'], expected))
+                legal_actions = list(state['legal_actions'].keys())
+                state, _ = env.step(legal_actions[np_random.randint(len(legal_actions))])
+
     def test_run(self):
         env = rlcard.make('gin-rummy')
         env.set_agents([RandomAgent(env.num_actions) for _ in range(env.num_players)])
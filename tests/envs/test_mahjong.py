@@ -12,6 +12,25 @@ class TestMahjongEnv(unittest.TestCase):
         state, _ = env.reset()
         self.assertEqual(state['obs'].size, 816)
 
+    def test_shanten_features(self):
+        env = rlcard.make('mahjong', config={'shanten_features': True})
+        state, _ = env.reset()
+        self.assertEqual(env.state_shape[0], [8, 34, 4])
+        self.assertEqual(state['obs'].shape, (8, 34, 4))
+        # The first player has 14 tiles and has to discard one of them
+        hand_tiles = state['obs'][0].sum(axis=1) > 0
+        best_discards = state['obs'][7].sum(axis=1) > 0
+        self.assertTrue(best_discards.any())
+        self.assertTrue((hand_tiles | ~best_discards).all())
+
+    def test_rule_agent(self):
+        from rlcard import models
+        env = rlcard.make('mahjong')
+        agents = models.load('mahjong-rule-v1').agents
+        env.set_agents(agents)
+        _, payoffs = env.run(is_training=False)
+        self.assertEqual(len(payoffs), env.num_players)
+
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('mahjong'))
 
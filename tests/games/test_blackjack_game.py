@@ -1,7 +1,12 @@
 import unittest
+from itertools import permutations, product
 import numpy as np
 
 from rlcard.games.blackjack.game import BlackjackGame as Game
+from rlcard.games.blackjack.judger import BlackjackJudger as Judger
+from rlcard.games.blackjack.solver import BlackjackSolver, HIT, STAND
+from rlcard.games.blackjack.vector_game import VectorBlackjackGame, get_policy_array
+from rlcard.games.base import Card
 from rlcard.envs.blackjack import DEFAULT_GAME_CONFIG
 
 class TestBlackjackGame(unittest.TestCase):
@@ -70,5 +75,83 @@ class TestBlackjackGame(unittest.TestCase):
         game.step('stand')
         self.assertGreater(len(game.get_state(0)['state'][1]), 1)
 
+    def test_solver_dealer_probs(self):
+        judger = Judger(np.random.RandomState())
+        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', 'T']
+        shoe = (1, 1, 0, 1, 1, 2, 0, 0, 0, 2)
+        cards = [ranks[index] for index, count in enumerate(shoe) for _ in range(count)]
+        for up_rank in ['A', '6', 'T']:
+            # the dealer draws every order of the shoe in turn
+            counts = np.zeros(6)
+            for order in permutations(cards):
+                hand = [Card('S', up_rank)]
+                for rank in order:
+                    if judger.judge_score(hand) >= 17:
+                        break
+                    hand.append(Card('S', rank))
+                counts[min(judger.judge_score(hand), 22) - 17] += 1
+            solver = BlackjackSolver(1)
+            probs = solver.get_dealer_probs(ranks.index(up_rank) + 1, shoe)
+            self.assertTrue(np.allclose(probs, counts / counts.sum()))
+        probs = BlackjackSolver(0).get_dealer_probs(6)
+        self.assertAlmostEqual(sum(probs), 1)
+        self.assertAlmostEqual(probs[-1], 0.4232, places=4)
+
+    def test_solver_strategy_table(self):
+        table = BlackjackSolver(0).get_strategy_table()
+        hard = table['hard']
+        self.assertTrue((hard['actions'][hard['totals'].index(11)] == HIT).all())
+        self.assertTrue((hard['actions'][hard['totals'].index(17):] == STAND).all())
+        self.assertEqual(hard['actions'][hard['totals'].index(16), 9], HIT)
+        self.assertEqual(hard['actions'][hard['totals'].index(12), 3], STAND)
+        soft = table['soft']
+        self.assertEqual(soft['actions'][soft['totals'].index(18), 8], HIT)
+        self.assertEqual(soft['actions'][soft['totals'].index(18), 6], STAND)
+
+        solver = BlackjackSolver(1)
+        hit_value, stand_value = solver.get_action_values(['ST', 'H9', 'C2'], 'D9')
+        self.assertGreater(stand_value, hit_value)
+        self.assertAlmostEqual(hit_value, -1)
+        # the composition of the shoe changes the decision
+        self.assertEqual(solver.get_best_action([10, 2], 4), HIT)
+        self.assertEqual(solver.get_best_action([7, 5], 4), STAND)
+        self.assertEqual(solver.get_best_action([10, 2], 4, seen=[2, 3, 4, 5, 6] * 2), STAND)
+
+    def test_vector_game(self):
+        game = VectorBlackjackGame(1000, num_players=3, num_decks=1, np_random=np.random.RandomState(0))
+        obs, current_player = game.init_game()
+        self.assertEqual(obs.shape, (1000, 2))
+        self.assertTrue((current_player == 0).all())
+        self.assertTrue((game.counts.sum(axis=1) == 52 - 8).all())
+        scores = game.get_scores()
+        self.assertTrue(((scores >= 4) & (scores <= 21)).all())
+        self.assertTrue((obs[:, 0] == scores[:, 0]).all())
+        obs, current_player = game.step(np.full(1000, HIT))
+        self.assertTrue((game.counts.sum(axis=1) == 52 - 9).all())
+        self.assertTrue((current_player[game.get_scores()[:, 0] > 21] == 1).all())
+        while not game.is_over():
+            game.step(np.full(1000, STAND))
+        payoffs = game.get_payoffs()
+        scores = game.get_scores()
+        dealer_scores = game.get_dealer_scores()
+        self.assertTrue((payoffs[scores > 21] == -1).all())
+        alive = scores <= 21
+        self.assertTrue((payoffs[alive & (dealer_scores[:, None] > 21)] == 1).all())
+        self.assertTrue((payoffs[alive & (scores == dealer_scores[:, None])] == 0).all())
+        self.assertTrue((dealer_scores >= 17).all())
+
+    def test_vector_game_payoff(self):
+        # the optimal payoff of the infinite deck, averaged over the first cards
+        solver = BlackjackSolver(0)
+        probs = [4 / 52] * 9 + [16 / 52]
+        expected = 0
+        for first, second, up in product(range(1, 11), repeat=3):
+            values = solver.get_action_values([first, second], up)
+            expected += probs[first - 1] * probs[second - 1] * probs[up - 1] * max(values)
+
+        game = VectorBlackjackGame(200000, num_decks=0, np_random=np.random.RandomState(0))
+        payoffs = game.play(get_policy_array(solver.get_strategy_table()))
+        self.assertAlmostEqual(payoffs.mean(), expected, delta=0.01)
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,13 +4,19 @@
     Date created: 11/25/2021
 '''
 
+import os
+import tempfile
 import unittest
 import numpy as np
 
+import rlcard
+
 from rlcard.games.bridge.game import BridgeGame as Game
+from rlcard.games.bridge.double_dummy import DoubleDummySolver, calc_dd_table, get_hand_mask, has_dds, solve_round
 from rlcard.games.bridge.dealer import BridgeDealer
+from rlcard.games.bridge.deal_library import BridgeDealLibrary, create_deal_library, pack_decks, unpack_decks
 from rlcard.games.bridge.player import BridgePlayer
-from rlcard.games.bridge.utils.action_event import PassAction
+from rlcard.games.bridge.utils.action_event import PassAction, BidAction, PlayCardAction
 from rlcard.games.bridge.utils.bridge_card import BridgeCard
 from rlcard.games.bridge.utils.move import DealHandMove
 
@@ -133,6 +139,130 @@ class TestBridgeGame(unittest.TestCase):
             hand = player.hand
             self.assertTrue(not hand)
 
+    def test_double_dummy_small_deals(self):
+        np_random = np.random.RandomState(0)
+        for _ in range(10):
+            card_ids = np_random.permutation(52)
+            hands = [get_hand_mask([BridgeCard.card(card_id) for card_id in card_ids[3*i:3*i+3]]) for i in range(4)]
+            for strain in range(5):
+                solver = DoubleDummySolver(hands, strain)
+                for leader in range(4):
+                    trump = strain if strain < 4 else None
+                    self.assertEqual(solver.solve(leader), _get_minimax_tricks(list(hands), trump, leader, []))
+
+    def test_double_dummy_table(self):
+        # N holds the spades, E the hearts, S the diamonds and W the clubs
+        hands = [get_hand_mask([card for card in BridgeCard.get_deck() if card.suit == suit]) for suit in 'SHDC']
+        for use_dds in [False, True]:
+            table = calc_dd_table(hands, use_dds)
+            self.assertEqual(table[0], [0, 13, 0, 13])
+            self.assertEqual(table[1], [13, 0, 13, 0])
+            self.assertEqual(table[2], [0, 13, 0, 13])
+            self.assertEqual(table[3], [13, 0, 13, 0])
+            # the left hand opponent leads and takes every trick
+            self.assertEqual(table[4], [0, 0, 0, 0])
+
+    @unittest.skipUnless(has_dds(), 'DDS is not installed')
+    def test_double_dummy_dds(self):
+        # each hand has one sequence of each suit
+        deal = [('AKQJ', 'T98', '765', '432'), ('T98', '765', '432', 'AKQJ'),
+                ('765', '432', 'AKQJ', 'T98'), ('432', 'AKQJ', 'T98', '765')]
+        hands = [get_hand_mask([BridgeCard(suit, rank) for suit, ranks in zip('SHDC', hand) for rank in ranks])
+                 for hand in deal]
+        table = calc_dd_table(hands)
+        self.assertEqual(table, calc_dd_table(hands, use_dds=False))
+        self.assertEqual(table[4], [5, 5, 5, 5])
+
+    def test_solve_round(self):
+        game = Game()
+        game.init_game()
+        game.step(BidAction(1, 'S'))
+        for _ in range(3):
+            game.step(PassAction())
+        self.assertEqual(game.round.round_phase, 'play card')
+        np_random = np.random.RandomState(1)
+        tricks = None
+        while not game.is_over():
+            current_player = game.round.get_current_player()
+            if len(current_player.hand) <= 3:
+                # perfect play is only lost by the side that makes a mistake
+                next_tricks = solve_round(game.round)
+                if tricks is not None:
+                    if is_declarer_side:
+                        self.assertLessEqual(next_tricks, tricks)
+                    else:
+                        self.assertGreaterEqual(next_tricks, tricks)
+                tricks = next_tricks
+            is_declarer_side = current_player.player_id % 2 == game.round.get_declarer().player_id % 2
+            legal_actions = game.judger.get_legal_actions()
+            game.step(legal_actions[np_random.randint(len(legal_actions))])
+        declarer_side = game.round.get_declarer().player_id % 2
+        self.assertEqual(solve_round(game.round), game.round.won_trick_counts[declarer_side])
+
+    def test_deal_library(self):
+        decks = np.array([np.random.RandomState(seed).permutation(52) for seed in range(8)])
+        self.assertTrue((unpack_decks(pack_decks(decks)) == decks).all())
+        self.assertEqual(pack_decks(decks).shape, (8, 39))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'deals.npy')
+            library = create_deal_library(path, 20, np.random.RandomState(0))
+            self.assertEqual(len(library), 20)
+            self.assertIsNone(library.get_dd_table(3))
+            game = Game()
+            game.configure({'game_deal_library': library})
+            for deal_index in [3, 17]:
+                game.init_game(deal_index=deal_index)
+                self.assertEqual(game.deal_index, deal_index)
+                self.assertEqual(game.round.board_id, library.get_board_id(deal_index))
+                self.assertEqual(game.round.board_id, deal_index % 16 + 1)
+                hands = [get_hand_mask(player.hand) for player in game.round.players]
+                self.assertEqual(hands, library.get_hands(deal_index))
+            # the same deal again, as in duplicate
+            first_hands = [player.hand for player in game.round.players]
+            game.init_game(deal_index=17)
+            self.assertEqual([player.hand for player in game.round.players], first_hands)
+            # double dummy tables are stored with the deals
+            deals = np.load(path, mmap_mode='r+')
+            deals['dd_table'][5] = np.arange(20).reshape(5, 4)
+            deals.flush()
+            del deals
+            self.assertEqual(BridgeDealLibrary(path).get_dd_table(5).tolist(), np.arange(20).reshape(5, 4).tolist())
+            env = rlcard.make('bridge', config={'game_deal_library': path})
+            env.reset()
+            self.assertEqual([get_hand_mask(player.hand) for player in env.game.round.players],
+                             env.game.deal_library.get_hands(env.game.deal_index))
+            del env, game, library
+
+
+def _get_minimax_tricks(hands, trump, leader, trick_cards):
+    # tricks taken by N-S with a plain minimax search
+    player = (leader + len(trick_cards)) % 4
+    if not hands[player]:
+        return 0
+    cards = [card_id for card_id in range(52) if hands[player] >> card_id & 1]
+    if trick_cards:
+        follow_cards = [card_id for card_id in cards if card_id // 13 == trick_cards[0] // 13]
+        cards = follow_cards or cards
+    results = []
+    for card_id in cards:
+        hands[player] ^= 1 << card_id
+        trick = trick_cards + [card_id]
+        if len(trick) == 4:
+            winner_index = 0
+            for i in range(1, 4):
+                winning_card = trick[winner_index]
+                if trick[i] // 13 == winning_card // 13:
+                    if trick[i] > winning_card:
+                        winner_index = i
+                elif trick[i] // 13 == trump:
+                    winner_index = i
+            winner = (leader + winner_index) % 4
+            results.append(_get_minimax_tricks(hands, trump, winner, []) + (1 if winner % 2 == 0 else 0))
+        else:
+            results.append(_get_minimax_tricks(hands, trump, leader, trick))
+        hands[player] ^= 1 << card_id
+    return max(results) if player % 2 == 0 else min(results)
+
 
 if __name__ == '__main__':
     unittest.main()
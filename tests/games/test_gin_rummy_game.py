@@ -13,11 +13,14 @@ import rlcard.games.gin_rummy.utils.utils as utils
 from rlcard.games.gin_rummy.dealer import GinRummyDealer
 from rlcard.games.gin_rummy.game import GinRummyGame as Game
 from rlcard.games.gin_rummy.player import GinRummyPlayer
+from rlcard.games.gin_rummy.utils.action_event import ActionEvent, DrawCardAction, DiscardAction
 from rlcard.games.gin_rummy.utils.action_event import score_player_1_action_id
 from rlcard.games.gin_rummy.utils.action_event import draw_card_action_id, pick_up_discard_action_id
 from rlcard.games.gin_rummy.utils.action_event import declare_dead_hand_action_id
 from rlcard.games.gin_rummy.utils.action_event import gin_action_id, discard_action_id, knock_action_id
 from rlcard.games.gin_rummy.utils.melding import get_all_set_melds, get_all_run_melds, get_meld_clusters
+from rlcard.games.gin_rummy.utils.melding import get_best_meld_clusters, get_best_deadwood_count
+from rlcard.games.gin_rummy.utils.melding import get_hand_mask, get_mask_deadwood_count
 from rlcard.games.gin_rummy.utils.settings import Setting, Settings
 from rlcard.games.gin_rummy.utils.thinker import Thinker
 
@@ -79,6 +82,31 @@ class TestGinRummyGame(unittest.TestCase):
             _, _ = game.step(action)
         self.assertEqual(game.actions[-1].action_id, score_player_1_action_id)
 
+    def test_drawn_card_count(self):
+        game = Game()
+        game.settings.max_drawn_card_count = 5
+        game.init_game()
+        while not game.is_over():
+            legal_actions = game.judge.get_legal_actions()
+            action = np.random.choice(legal_actions)
+            _, _ = game.step(action)
+            drawn_card_actions = [action for action in game.actions if isinstance(action, DrawCardAction)]
+            self.assertEqual(game.drawn_card_count, len(drawn_card_actions))
+        self.assertLessEqual(game.drawn_card_count, 5)
+
+    def test_decode_action(self):
+        for action_id in range(ActionEvent.get_num_actions()):
+            action_event = ActionEvent.decode_action(action_id)
+            self.assertEqual(action_event.action_id, action_id)
+            self.assertIs(action_event, ActionEvent.decode_action(action_id))
+        card = utils.card_from_text('7D')
+        discard_action = ActionEvent.decode_action(discard_action_id + utils.get_card_id(card))
+        self.assertIsInstance(discard_action, DiscardAction)
+        self.assertEqual(discard_action, DiscardAction(card=card))
+        self.assertEqual(discard_action.card, card)
+        with self.assertRaises(Exception):
+            ActionEvent.decode_action(ActionEvent.get_num_actions())
+
     def test_get_state(self):
         game = Game()
         state, _ = game.init_game()
@@ -136,15 +164,6 @@ class TestGinRummyGame(unittest.TestCase):
         going_out_deadwood_count = 10
         knock_cards, gin_cards = judge.get_going_out_cards(hand=hand, going_out_deadwood_count=going_out_deadwood_count)
 
-        player = GinRummyPlayer(player_id=0, np_random=np.random.RandomState())
-        player.hand = hand
-        player.did_populate_hand()
-        meld_clusters = player.get_meld_clusters()
-        alpha, beta = judge._get_going_out_cards(meld_clusters=meld_clusters,
-                                                 hand=hand,
-                                                 going_out_deadwood_count=going_out_deadwood_count)
-        self.assertEqual(set(alpha), set(knock_cards))
-        self.assertEqual(beta, [])
         self.assertEqual(knock_cards, [utils.card_from_text('8D')])
         self.assertEqual(gin_cards, [])
 
@@ -154,20 +173,88 @@ class TestGinRummyGame(unittest.TestCase):
         going_out_deadwood_count = 10
         knock_cards, gin_cards = judge.get_going_out_cards(hand=hand, going_out_deadwood_count=going_out_deadwood_count)
 
-        player = GinRummyPlayer(player_id=0, np_random=np.random.RandomState())
-        player.hand = hand
-        player.did_populate_hand()
-        meld_clusters = player.get_meld_clusters()
-        alpha, beta = judge._get_going_out_cards(meld_clusters=meld_clusters,
-                                                 hand=hand,
-                                                 going_out_deadwood_count=going_out_deadwood_count)
-        self.assertEqual(set(alpha), set(knock_cards))
-        self.assertEqual(beta, [])
-
         correct_knock_cards = [utils.card_from_text(x) for x in ['7H', '4S', '4H', '3H', '2S', 'AS', 'AH', 'AD', 'AC']]
         self.assertEqual(set(knock_cards), set(correct_knock_cards))
         self.assertEqual(gin_cards, [])
 
+    def test_hand_mask(self):
+        hand_text = ['KC', 'TD', '9H', '3S', 'AS']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        hand_mask = get_hand_mask(hand)
+        self.assertEqual(hand_mask, sum(1 << utils.get_card_id(card) for card in hand))
+        self.assertEqual(get_mask_deadwood_count(hand_mask), 10 + 10 + 9 + 3 + 1)
+
+        player = GinRummyPlayer(player_id=0, np_random=np.random.RandomState())
+        player.hand = hand[:3]
+        player.did_populate_hand()
+        player.add_card_to_hand(hand[3])
+        player.add_card_to_hand(hand[4])
+        self.assertEqual(player.hand_mask, hand_mask)
+        player.remove_card_from_hand(hand[0])
+        self.assertEqual(player.hand_mask, get_hand_mask(hand[1:]))
+
+    def test_best_meld_clusters(self):
+        hand_text = ['5S', '5H', '5D', '5C', '4S', '3S', '9D', '9C', 'KH', 'AC']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        best_meld_clusters = get_best_meld_clusters(hand=hand)
+        meld_clusters = get_meld_clusters(hand=hand)
+        deadwood_counts = [utils.get_deadwood_count(hand=hand, meld_cluster=meld_cluster)
+                           for meld_cluster in meld_clusters]
+        self.assertEqual(get_best_deadwood_count(hand=hand), min(deadwood_counts))
+        self.assertEqual(get_best_deadwood_count(hand=hand), 9 + 9 + 10 + 1)
+        best_meld_clusters_as_set = set(frozenset(frozenset(str(card) for card in meld_pile)
+                                                  for meld_pile in meld_cluster)
+                                        for meld_cluster in best_meld_clusters)
+        correct_result = [[['5H', '5D', '5C'], ['5S', '4S', '3S']]]
+        correct_result_as_set = set(frozenset(frozenset(meld_pile) for meld_pile in meld_cluster)
+                                    for meld_cluster in correct_result)
+        self.assertEqual(best_meld_clusters_as_set, correct_result_as_set)
+
+        # without melds the whole hand is deadwood
+        hand_text = ['KS', 'QH', 'JD', 'TC', '8S', '6H', '4D', '2C', 'AS', '3H']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        self.assertEqual(get_best_meld_clusters(hand=hand), [])
+        self.assertEqual(get_best_deadwood_count(hand=hand), utils.get_deadwood_count(hand=hand, meld_cluster=[]))
+
+    def test_meld_clusters_order(self):
+        def get_reference_meld_clusters(hand):
+            # the enumeration of the list-based melding
+            all_melds = [frozenset(str(card) for card in meld) for meld in get_all_run_melds(hand) + get_all_set_melds(hand)]
+            result = []
+            for i, first_meld in enumerate(all_melds):
+                result.append([first_meld])
+                for j in range(i + 1, len(all_melds)):
+                    second_meld = all_melds[j]
+                    if second_meld & first_meld:
+                        continue
+                    result.append([first_meld, second_meld])
+                    for third_meld in all_melds[j + 1:]:
+                        if not third_meld & (first_meld | second_meld):
+                            result.append([first_meld, second_meld, third_meld])
+            return result
+
+        def as_sets(meld_clusters):
+            return [[frozenset(str(card) for card in meld) for meld in meld_cluster] for meld_cluster in meld_clusters]
+
+        np_random = np.random.RandomState(0)
+        # four of a kind, sets whose rank characters sort apart from their ranks, and runs
+        hand_text = ['TC', 'TS', 'TH', 'TD', 'AS', 'AH', 'AD', '9S', '8S', '7S']
+        for _ in range(10):
+            hand = [utils.card_from_text(x) for x in np_random.permutation(hand_text)]
+            self.assertEqual(as_sets(get_meld_clusters(hand=hand)), get_reference_meld_clusters(hand))
+        deck = utils.get_deck()
+        for _ in range(200):
+            hand = [deck[i] for i in np_random.choice(52, 10, replace=False)]
+            self.assertEqual(as_sets(get_meld_clusters(hand=hand)), get_reference_meld_clusters(hand))
+
+    def test_gin_cards(self):
+        hand_text = ['5S', '6S', '7S', '8S', '9H', '9D', '9C', 'KH', 'KD', 'KC', 'KS']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        _, gin_cards = judge.get_going_out_cards(hand=hand, going_out_deadwood_count=10)
+        # removing a gin card must leave 10 melded cards: never a middle card of the run
+        correct_gin_cards = [utils.card_from_text(x) for x in ['5S', '8S', 'KS', 'KH', 'KD', 'KC']]
+        self.assertEqual(gin_cards, correct_gin_cards)
+
     def test_corrected_settings(self):
         default_setting = Setting.default_setting()
         config = {Setting.max_drawn_card_count: 10,
@@ -1,10 +1,16 @@
+import os
+import tempfile
 import unittest
 import numpy as np
+import torch
 
 from rlcard.games.leducholdem.game import LeducholdemGame as Game
 from rlcard.games.leducholdem.player import LeducholdemPlayer as Player
 from rlcard.games.leducholdem.judger import LeducholdemJudger as Judger
+from rlcard.games.leducholdem.tree import compile_leducholdem_tree, LeducholdemTree, CHANCE, TERMINAL
 from rlcard.games.base import Card
+from rlcard.agents.dqn_agent import DQNAgent
+import rlcard
 
 class TestLeducholdemMethods(unittest.TestCase):
 
@@ -103,6 +109,59 @@ class TestLeducholdemMethods(unittest.TestCase):
         game.step('check')
         self.assertEqual(game.is_over(), True)
 
+    def test_compile_tree(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        tree = compile_leducholdem_tree(env)
+        self.assertEqual(tree.node_player[0], CHANCE)
+        self.assertEqual(tree.child_offsets[1], 2 * 6 * 5)
+        self.assertTrue((tree.depth[1:] == tree.depth[tree.parent[1:]] + 1).all())
+        self.assertTrue((tree.child_ids == np.flatnonzero(tree.parent >= 0)).all())
+        chance = np.flatnonzero(tree.node_player == CHANCE)
+        for node in chance:
+            children = tree.child_ids[tree.child_offsets[node]:tree.child_offsets[node + 1]]
+            self.assertAlmostEqual(tree.chance_probs[children].sum(), 1)
+        decision = tree.node_player >= 0
+        self.assertTrue((tree.legal_mask[decision] == tree.info_set_legal_mask[tree.info_set[decision]]).all())
+        self.assertTrue((tree.node_player[decision] == tree.info_set_player[tree.info_set[decision]]).all())
+        terminal = tree.node_player == TERMINAL
+        self.assertTrue(np.allclose(tree.payoffs[terminal].sum(axis=1), 0))
+
+        # Player 0 plays uniformly at random, player 1 raises when it can
+        policy = tree.info_set_legal_mask / tree.info_set_legal_mask.sum(axis=1, keepdims=True)
+        raise_first = np.where(tree.info_set_legal_mask[:, 1:2], [0, 1, 0, 0], tree.info_set_legal_mask * [1, 0, 0, 1])
+        policy[tree.info_set_player == 1] = raise_first[tree.info_set_player == 1]
+        expected = tree.get_expected_payoffs(policy)
+        np_random = np.random.RandomState(0)
+        payoffs = []
+        for _ in range(20000):
+            env.reset()
+            while not env.is_over():
+                player_id = env.get_player_id()
+                legal_actions = env.game.get_legal_actions()
+                if player_id == 0:
+                    action = legal_actions[np_random.randint(len(legal_actions))]
+                else:
+                    action = 'raise' if 'raise' in legal_actions else ('call' if 'call' in legal_actions else 'check')
+                env.game.step(action)
+            payoffs.append(env.get_payoffs())
+        self.assertTrue(np.allclose(np.mean(payoffs, axis=0), expected, atol=0.1))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'leduc_tree.npz')
+            tree.save(path)
+            loaded = LeducholdemTree.load(path)
+        self.assertTrue(np.allclose(loaded.get_expected_payoffs(policy), expected))
+
+    def test_tree_policy_batch(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True})
+        tree = compile_leducholdem_tree(env)
+        agent = DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[10, 10], device=torch.device('cpu'))
+        policy = tree.get_policy([agent, agent])
+        for info_set in range(tree.num_info_sets):
+            action, _ = agent.eval_step(tree.get_state(info_set))
+            self.assertEqual(policy[info_set, action], 1)
+        self.assertTrue(np.allclose(policy.sum(axis=1), 1))
+
 
 
 
@@ -3,6 +3,26 @@ import numpy as np
 
 from rlcard.games.mahjong.game import MahjongGame as Game
 from rlcard.games.mahjong.player import MahjongPlayer as Player
+from rlcard.games.mahjong.judger import MahjongJudger as Judger
+from rlcard.games.mahjong.dealer import MahjongDealer as Dealer
+from rlcard.games.mahjong.card import MahjongCard as Card
+from rlcard.games.mahjong.utils import cards2counts, count_melds
+from rlcard.games.mahjong.shanten import calculate_shanten, get_effective_tiles, get_best_discards
+
+def make_cards(tiles):
+    cards = []
+    for tile in tiles:
+        card = Card(*tile.split('-'))
+        if card.trait.isdigit():
+            card.set_index_num(int(card.trait) - 1)
+        cards.append(card)
+    return cards
+
+def set_hand(player, cards):
+    player.hand = []
+    player.counts = [0] * 34
+    for card in cards:
+        player.add_card(card)
 
 class TestMahjongMethods(unittest.TestCase):
 
@@ -72,5 +92,120 @@ class TestMahjongMethods(unittest.TestCase):
         player = Player(0, np.random.RandomState())
         self.assertEqual(0, player.get_player_id())
 
+    def test_cards2counts(self):
+        counts = cards2counts(make_cards(['bamboo-1', 'bamboo-1', 'dots-9', 'winds-south']))
+        self.assertEqual(len(counts), 34)
+        self.assertEqual(counts[0], 2)
+        self.assertEqual(counts[26], 1)
+        self.assertEqual(counts[33], 1)
+        self.assertEqual(sum(counts), 4)
+
+    def test_count_melds(self):
+        counts = cards2counts(make_cards(['bamboo-1', 'bamboo-2', 'bamboo-3', 'dragons-red', 'dragons-red', 'dragons-red']))
+        self.assertEqual(count_melds(counts), (2, 1))
+        counts = cards2counts(make_cards(['bamboo-1', 'bamboo-3', 'dots-5']))
+        self.assertEqual(count_melds(counts), (0, -1))
+
+    def test_judge_hu(self):
+        judger = Judger(np.random.RandomState())
+        player = Player(0, np.random.RandomState())
+        # Pair taken from a triplet: 11 + 123 + c123 + c456 + d789
+        set_hand(player, make_cards(['bamboo-1', 'bamboo-1', 'bamboo-1', 'bamboo-2', 'bamboo-3',
+                                  'characters-1', 'characters-2', 'characters-3',
+                                  'characters-4', 'characters-5', 'characters-6',
+                                  'dots-7', 'dots-8', 'dots-9']))
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+        # Greedy sliding window misses 122334 = 123 + 234: plus c123 + c456 + red pair
+        set_hand(player, make_cards(['bamboo-1', 'bamboo-2', 'bamboo-2', 'bamboo-3', 'bamboo-3', 'bamboo-4',
+                                  'characters-1', 'characters-2', 'characters-3',
+                                  'characters-4', 'characters-5', 'characters-6',
+                                  'dragons-red', 'dragons-red']))
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+        # One tile away from winning
+        player.remove_card(player.hand[-1])
+        player.add_card(Card('dragons', 'green'))
+        self.assertEqual(judger.judge_hu(player)[0], False)
+        # Melds in the pile count towards the win
+        set_hand(player, make_cards(['bamboo-5', 'bamboo-5', 'dots-1', 'dots-2', 'dots-3']))
+        player.pile = [make_cards(['winds-east'] * 3)] * 3
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+
+    def test_calculate_shanten(self):
+        complete = ['bamboo-1', 'bamboo-1', 'bamboo-1', 'bamboo-2', 'bamboo-3',
+                    'characters-1', 'characters-2', 'characters-3',
+                    'characters-4', 'characters-5', 'characters-6',
+                    'dots-7', 'dots-8', 'dots-9']
+        self.assertEqual(calculate_shanten(cards2counts(make_cards(complete))), -1)
+        self.assertEqual(calculate_shanten(cards2counts(make_cards(complete[:-1]))), 0)
+        counts = cards2counts(make_cards(complete[:-1] + ['winds-east']))
+        self.assertEqual(calculate_shanten(counts), 0)
+        honors = ['dragons-green', 'dragons-red', 'dragons-white', 'winds-east', 'winds-west', 'winds-north', 'winds-south']
+        counts = cards2counts(make_cards(honors + ['bamboo-1', 'bamboo-5', 'bamboo-9', 'dots-1', 'dots-5', 'dots-9']))
+        self.assertEqual(calculate_shanten(counts), 8)
+        # Three melds in the pile, one meld and a pair to go
+        counts = cards2counts(make_cards(['bamboo-5', 'bamboo-5', 'dots-1', 'dots-2']))
+        self.assertEqual(calculate_shanten(counts, num_melds=1), 0)
+
+    def test_get_effective_tiles(self):
+        counts = cards2counts(make_cards(['bamboo-5', 'bamboo-5', 'dots-1', 'dots-2']))
+        shanten, effective = get_effective_tiles(counts, num_melds=1)
+        self.assertEqual(shanten, 0)
+        self.assertEqual([tile for tile, num in enumerate(effective) if num], [20])
+        self.assertEqual(effective[20], 4)
+        visible = [0] * 34
+        visible[20] = 3
+        _, effective = get_effective_tiles(counts, num_melds=1, visible=visible)
+        self.assertEqual(effective[20], 1)
+
+    def test_get_best_discards(self):
+        counts = cards2counts(make_cards(['bamboo-5', 'bamboo-5', 'dots-1', 'dots-2', 'winds-east']))
+        shanten, best = get_best_discards(counts, num_melds=1)
+        self.assertEqual(shanten, 0)
+        self.assertEqual(list(best.keys()), [30])
+
+    def test_player_counts(self):
+        game = Game()
+        state, _ = game.init_game()
+        while not game.is_over():
+            for player in game.players:
+                self.assertEqual(player.counts, cards2counts(player.hand))
+            actions = game.get_legal_actions(state)
+            action = np.random.choice(actions)
+            state, _ = game.step(action)
+
+    def test_judge_pong_gong(self):
+        judger = Judger(np.random.RandomState())
+        dealer = Dealer(np.random.RandomState())
+        players = [Player(i, np.random.RandomState()) for i in range(4)]
+        set_hand(players[1], make_cards(['dots-5', 'dots-5', 'bamboo-1']))
+        set_hand(players[2], make_cards(['dots-5', 'bamboo-1', 'bamboo-1', 'bamboo-1']))
+        dealer.table = make_cards(['dots-5'])
+        valid_act, player, cards = judger.judge_pong_gong(dealer, players, 0)
+        self.assertEqual((valid_act, player.player_id, len(cards)), ('pong', 1, 3))
+        valid_act, _, _ = judger.judge_pong_gong(dealer, players, 1)
+        self.assertEqual(valid_act, False)
+        dealer.table = make_cards(['bamboo-1'])
+        valid_act, player, cards = judger.judge_pong_gong(dealer, players, 0)
+        self.assertEqual((valid_act, player.player_id, len(cards)), ('gong', 2, 4))
+
+    def test_judge_chow(self):
+        judger = Judger(np.random.RandomState())
+        dealer = Dealer(np.random.RandomState())
+        players = [Player(i, np.random.RandomState()) for i in range(4)]
+        set_hand(players[1], make_cards(['dots-3', 'dots-4', 'bamboo-2', 'bamboo-3']))
+        dealer.table = make_cards(['dots-5'])
+        valid_act, player, cards = judger.judge_chow(dealer, players, 0)
+        self.assertEqual((valid_act, player.player_id), ('chow', 1))
+        self.assertEqual([card.get_str() for card in cards], ['dots-3', 'dots-4', 'dots-5'])
+        # Only the next player can chow
+        valid_act, _, _ = judger.judge_chow(dealer, players, 2)
+        self.assertEqual(valid_act, False)
+        dealer.table = make_cards(['bamboo-1'])
+        valid_act, player, cards = judger.judge_chow(dealer, players, 0)
+        self.assertEqual([card.get_str() for card in cards], ['bamboo-2', 'bamboo-3', 'bamboo-1'])
+        dealer.table = make_cards(['dragons-red'])
+        valid_act, _, _ = judger.judge_chow(dealer, players, 0)
+        self.assertEqual(valid_act, False)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,12 @@
 import unittest
+from copy import deepcopy
 import numpy as np
 
 from rlcard.games.uno.game import UnoGame as Game
 from rlcard.games.uno.player import UnoPlayer as Player
 from rlcard.games.uno.utils import ACTION_LIST
-from rlcard.games.uno.utils import hand2dict, encode_hand, encode_target
+from rlcard.games.uno.card import UnoCard as Card
+from rlcard.games.uno.utils import hand2dict, encode_hand, encode_target, cards2list
 
 class TestUnoMethods(unittest.TestCase):
 
@@ -69,6 +71,31 @@ class TestUnoMethods(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+    def test_step_back_restores_state(self):
+        def snapshot(game):
+            cards = lambda cards: [(card.color, card.trait) for card in cards]
+            return (cards(game.dealer.deck), cards(game.round.played_cards),
+                    [cards(player.hand) for player in game.players],
+                    [list(player.counts) for player in game.players],
+                    [player.hand_plane.tolist() for player in game.players],
+                    (game.round.target.color, game.round.target.trait),
+                    game.round.current_player, game.round.direction, game.round.is_over,
+                    game.np_random.get_state()[2])
+
+        game = Game(allow_step_back=True)
+        game.init_game()
+        while not game.is_over():
+            copied = deepcopy(game)
+            expected = snapshot(copied)
+            actions = game.get_legal_actions()
+            game.step(np.random.choice(actions))
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(game), expected)
+            action = np.random.choice(actions)
+            game.step(action)
+            copied.round.proceed_round(copied.players, action)
+            self.assertEqual(snapshot(game), snapshot(copied))
+
     def test_hand2dict(self):
         hand_1 = ['y-1', 'r-8', 'b-9', 'y-reverse', 'r-skip']
         hand1_dict = hand2dict(hand_1)
@@ -105,5 +132,43 @@ class TestUnoMethods(unittest.TestCase):
         player = Player(0, np.random.RandomState())
         self.assertEqual(0, player.get_player_id())
 
+    def test_player_hand_plane(self):
+        game = Game()
+        game.init_game()
+        while not game.is_over():
+            for player in game.players:
+                plane = np.zeros((3, 4, 15), dtype=int)
+                encode_hand(plane, cards2list(player.hand))
+                self.assertTrue((plane == player.hand_plane).all())
+                self.assertEqual(sum(player.counts), len(player.hand))
+            action = np.random.choice(game.get_legal_actions())
+            game.step(action)
+
+    def test_legal_actions_from_counts(self):
+        game = Game()
+        game.init_game()
+        player = Player(0, np.random.RandomState())
+        for card in [Card('number', 'r', '5'), Card('number', 'g', '5'), Card('action', 'b', 'skip'),
+                     Card('wild', 'y', 'wild_draw_4')]:
+            player.add_card(card)
+        game.round.target = Card('number', 'g', '7')
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['g-5'])
+        game.round.target = Card('number', 'y', '5')
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['r-5', 'g-5'])
+        # Wild draw 4 can only be played without other legal cards
+        game.round.target = Card('number', 'y', '8')
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['r-wild_draw_4', 'g-wild_draw_4', 'b-wild_draw_4', 'y-wild_draw_4'])
+        player.add_card(Card('wild', 'b', 'wild'))
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['r-wild', 'g-wild', 'b-wild', 'y-wild'])
+        player.remove_card(0)
+        player.remove_card(0)
+        player.remove_card(1)
+        game.round.target = Card('action', 'y', 'skip')
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['r-wild', 'g-wild', 'b-skip', 'b-wild', 'y-wild'])
+        player.remove_card(1)
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['b-skip'])
+        game.round.target = Card('action', 'y', 'reverse')
+        self.assertEqual(game.round.get_legal_actions([player], 0), ['draw'])
+
 if __name__ == '__main__':
     unittest.main()
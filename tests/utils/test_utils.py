@@ -1,8 +1,9 @@
 import unittest
 import numpy as np
-from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament
+from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament, exact_tournament, remove_illegal, remove_illegal_batch, sample_actions
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
+from rlcard.models.leducholdem_rule_models import LeducHoldemRuleAgentV1
 
 class TestUtils(unittest.TestCase):
 
@@ -43,5 +44,28 @@ class TestUtils(unittest.TestCase):
         payoffs = tournament(env,1000)
         self.assertEqual(len(payoffs), 2)
 
+    def test_exact_tournament(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        env.set_agents([RandomAgent(env.num_actions), LeducHoldemRuleAgentV1()])
+        payoffs = exact_tournament(env)
+        self.assertAlmostEqual(sum(payoffs), 0)
+        self.assertTrue(np.allclose(payoffs, tournament(env, 20000), atol=0.1))
+        self.assertEqual(exact_tournament(env), payoffs)
+        with self.assertRaises(ValueError):
+            exact_tournament(rlcard.make('blackjack'))
+
+    def test_remove_illegal_batch(self):
+        action_probs = np.array([[0.1, 0.2, 0.3, 0.4], [0.5, 0.5, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0]])
+        legal_mask = np.array([[1, 0, 1, 1], [0, 0, 1, 1], [1, 1, 1, 1]], dtype=bool)
+        probs = remove_illegal_batch(action_probs, legal_mask)
+        for row, mask, expected in zip(action_probs, legal_mask, probs):
+            self.assertTrue(np.allclose(remove_illegal(row, np.flatnonzero(mask)), expected))
+
+        np_random = np.random.RandomState(0)
+        actions = sample_actions(np.tile([[0.2, 0.0, 0.8, 0.0]], (10000, 1)), np_random)
+        counts = np.bincount(actions, minlength=4)
+        self.assertEqual(counts[1] + counts[3], 0)
+        self.assertAlmostEqual(counts[0] / 10000, 0.2, delta=0.02)
+
 if __name__ == '__main__':
     unittest.main()